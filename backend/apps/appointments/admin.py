@@ -1,11 +1,21 @@
 from django.contrib import admin
-from .models import Doctor, DoctorAppointment, Prescription
+from .models import Doctor, DoctorAppointment, DoctorScheduleException, DoctorWorkingHours, Prescription
+
+class DoctorWorkingHoursInline(admin.TabularInline):
+    model = DoctorWorkingHours
+    extra = 0
+
+class DoctorScheduleExceptionInline(admin.TabularInline):
+    model = DoctorScheduleException
+    extra = 0
 
 @admin.register(Doctor)
 class DoctorAdmin(admin.ModelAdmin):
     list_display = ('name', 'speciality', 'email', 'phone', 'average_rating')
     list_filter = ('speciality', 'average_rating')
     search_fields = ('name', 'email')
+    readonly_fields = ('available_days_mask',)
+    inlines = (DoctorWorkingHoursInline, DoctorScheduleExceptionInline)
 
 @admin.register(DoctorAppointment)
 class DoctorAppointmentAdmin(admin.ModelAdmin):
@@ -0,0 +1,281 @@
+"""
+Slot-availability engine for doctors.
+
+A doctor's day is split into fixed slots of SLOT_MINUTES. Booked slots are kept
+as a bitmap in DoctorDaySlots, one row per doctor and date, which is updated
+incrementally as appointments are created, cancelled or rescheduled. Working
+slots are derived from the doctor's schedule (day bitmask, per-weekday hours
+and dated exceptions), so free slots are simply ``working & ~booked`` and no
+appointment rows need to be read to answer availability queries.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef
+from django.utils.dateparse import parse_date, parse_time
+
+from .models import Doctor, DoctorAppointment, DoctorDaySlots, DoctorScheduleException, DoctorWorkingHours, weekday_bit
+from . import directory_cache
+
+SLOT_MINUTES = 30
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+# Statuses that do not occupy a slot
+RELEASED_STATUSES = ('cancelled',)
+
+
+def _as_date(value):
+    if isinstance(value, str):
+        return parse_date(value)
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+def _as_time(value):
+    if isinstance(value, str):
+        return parse_time(value)
+    return value
+
+
+def _minutes(value):
+    value = _as_time(value)
+    return value.hour * 60 + value.minute
+
+
+def slot_index(value):
+    """Index of the slot a time falls into"""
+    return _minutes(value) // SLOT_MINUTES
+
+
+def slot_time(index):
+    """Start time of the slot with the given index"""
+    minutes = index * SLOT_MINUTES
+    return time(minutes // 60, minutes % 60)
+
+
+def range_mask(start_minute, end_minute):
+    """Bitmap of every slot overlapping [start_minute, end_minute)"""
+    first = max(start_minute // SLOT_MINUTES, 0)
+    last = min(-(-end_minute // SLOT_MINUTES), SLOTS_PER_DAY)
+    if last <= first:
+        return 0
+    return ((1 << (last - first)) - 1) << first
+
+
+def appointment_mask(appointment_time, duration_minutes):
+    """Bitmap of the slots taken by an appointment"""
+    start = _minutes(appointment_time)
+    return range_mask(start, start + (duration_minutes or SLOT_MINUTES))
+
+
+def preload_schedule(doctors, start, end=None):
+    """
+    Load weekly hours and exceptions from ``start`` (to ``end``) for many doctors
+    in two queries, so ``working_mask`` on those dates runs no queries.
+    """
+    by_id = {doctor.pk: doctor for doctor in doctors}
+    for doctor in by_id.values():
+        doctor._weekly_hours = {}
+        doctor._exceptions = {}
+        doctor._exceptions_range = (start, end)
+    for row in DoctorWorkingHours.objects.filter(doctor_id__in=by_id):
+        by_id[row.doctor_id]._weekly_hours[row.weekday] = (row.start_time, row.end_time)
+    exceptions = DoctorScheduleException.objects.filter(doctor_id__in=by_id, date__gte=start)
+    if end is not None:
+        exceptions = exceptions.filter(date__lte=end)
+    for row in exceptions:
+        by_id[row.doctor_id]._exceptions[row.date] = row
+    return list(by_id.values())
+
+
+def forget_schedule(doctor):
+    """Drop schedule data cached on a doctor instance"""
+    for name in ('_weekly_hours', '_exceptions', '_exceptions_range'):
+        doctor.__dict__.pop(name, None)
+
+
+def _weekly_hours(doctor):
+    if not hasattr(doctor, '_weekly_hours'):
+        doctor._weekly_hours = {
+            row.weekday: (row.start_time, row.end_time)
+            for row in DoctorWorkingHours.objects.filter(doctor_id=doctor.pk)
+        } if doctor.pk else {}
+    return doctor._weekly_hours
+
+
+def _schedule_exception(doctor, day):
+    start, end = getattr(doctor, '_exceptions_range', (None, None))
+    if start is None or day < start or (end is not None and day > end):
+        if not hasattr(doctor, '_exceptions'):
+            doctor._exceptions = {}
+        if day not in doctor._exceptions:
+            doctor._exceptions[day] = (
+                DoctorScheduleException.objects.filter(doctor_id=doctor.pk, date=day).first()
+                if doctor.pk else None
+            )
+    return doctor._exceptions.get(day)
+
+
+def working_hours(doctor, day):
+    """(start, end) a doctor works on a date, or None on a day off"""
+    exception = _schedule_exception(doctor, day)
+    if exception is not None:
+        return (exception.start_time, exception.end_time) if exception.is_available else None
+    if not doctor.available_days_mask & weekday_bit(day.weekday()):
+        return None
+    return _weekly_hours(doctor).get(day.weekday(), (doctor.start_time, doctor.end_time))
+
+
+def working_mask(doctor, day):
+    """Bitmap of the whole slots a doctor works on a given date"""
+    hours = working_hours(doctor, day)
+    if hours is None:
+        return 0
+    first = -(-_minutes(hours[0]) // SLOT_MINUTES)
+    last = _minutes(hours[1]) // SLOT_MINUTES
+    if last <= first:
+        return 0
+    return ((1 << (last - first)) - 1) << first
+
+
+def mask_to_times(mask):
+    """Expand a bitmap into the list of slot start times"""
+    times = []
+    index = 0
+    while mask:
+        if mask & 1:
+            times.append(slot_time(index))
+        mask >>= 1
+        index += 1
+    return times
+
+
+def appointment_slot_key(appointment):
+    """(doctor_id, date, mask) an appointment occupies, or None if it occupies nothing"""
+    if appointment.doctor_id is None or appointment.status in RELEASED_STATUSES:
+        return None
+    if appointment.appointment_date is None or appointment.appointment_time is None:
+        return None
+    return (
+        appointment.doctor_id,
+        _as_date(appointment.appointment_date),
+        appointment_mask(appointment.appointment_time, appointment.duration_minutes),
+    )
+
+
+def lock_day(doctor_id, day):
+    """Lock and return the doctor-day row; must be called inside a transaction"""
+    # Only the day row: locking the joined doctor too would deadlock with the
+    # key-share lock a concurrent insert of a new day row takes on it
+    row, created = DoctorDaySlots.objects.select_for_update(of=('self',)).select_related('doctor').get_or_create(
+        doctor_id=doctor_id, date=day
+    )
+    return row
+
+
+def _update_day(doctor_id, day, set_mask=0, clear_mask=0):
+    with transaction.atomic():
+        row = lock_day(doctor_id, day)
+        was_full, was_booked = row.is_full, row.booked_mask
+        row.booked_mask = (row.booked_mask & ~clear_mask) | set_mask
+        row.is_full = not (working_mask(row.doctor, day) & ~row.booked_mask)
+        row.save(update_fields=['booked_mask', 'is_full', 'updated_at'])
+        if row.is_full != was_full:
+            directory_cache.bump_slots_version(day)
+        if row.booked_mask != was_booked:
+            directory_cache.bump_bookings_version(day)
+    return row
+
+
+def book(key):
+    """Mark the slots of an appointment key as booked"""
+    if key is not None:
+        doctor_id, day, mask = key
+        _update_day(doctor_id, day, set_mask=mask)
+
+
+def release(key):
+    """Mark the slots of an appointment key as free again"""
+    if key is not None:
+        doctor_id, day, mask = key
+        _update_day(doctor_id, day, clear_mask=mask)
+
+
+def booking_conflicts(doctor_id):
+    """
+    (overlapping appointments, days whose bitmap disagrees, active appointments)
+    of a doctor, recomputed from the appointment rows
+    """
+    by_day = {}
+    for appointment in DoctorAppointment.objects.filter(doctor_id=doctor_id):
+        key = appointment_slot_key(appointment)
+        if key is not None:
+            by_day.setdefault(key[1], []).append(key[2])
+    booked = dict(DoctorDaySlots.objects.filter(doctor_id=doctor_id).values_list('date', 'booked_mask'))
+    overlaps = mismatched = 0
+    for day in by_day.keys() | booked.keys():
+        taken = 0
+        for mask in by_day.get(day, ()):
+            if taken & mask:
+                overlaps += 1
+            taken |= mask
+        if taken != booked.get(day, 0):
+            mismatched += 1
+    return overlaps, mismatched, sum(len(masks) for masks in by_day.values())
+
+
+def refresh_doctor(doctor, since=None):
+    """Recompute ``is_full`` for a doctor's upcoming days after a schedule change"""
+    rows = DoctorDaySlots.objects.filter(doctor=doctor)
+    if since is not None:
+        rows = rows.filter(date__gte=since)
+        preload_schedule([doctor], since)
+    changed = []
+    for row in rows:
+        is_full = not (working_mask(doctor, row.date) & ~row.booked_mask)
+        if is_full != row.is_full:
+            row.is_full = is_full
+            changed.append(row)
+    DoctorDaySlots.objects.bulk_update(changed, ['is_full'])
+
+
+def free_slots(doctor, start, end):
+    """Free slots for a doctor between two dates (inclusive)"""
+    booked = dict(
+        DoctorDaySlots.objects.filter(doctor=doctor, date__range=(start, end))
+        .values_list('date', 'booked_mask')
+    )
+    preload_schedule([doctor], start, end)
+    days = []
+    day = start
+    while day <= end:
+        free = working_mask(doctor, day) & ~booked.get(day, 0)
+        if free:
+            days.append({'date': day, 'slots': mask_to_times(free)})
+        day += timedelta(days=1)
+    return days
+
+
+def exclude_full(queryset, day, start=None, end=None):
+    """
+    Drop doctors with no free slot on a date, or between ``start`` and ``end``
+    when both are given.
+
+    The window check assumes the doctors work the whole window, as selected by
+    ``Doctor.objects.available_on(day, start, end)``.
+    """
+    rows = DoctorDaySlots.objects.filter(doctor=OuterRef('pk'), date=day)
+    if start is None or end is None:
+        full = rows.filter(is_full=True)
+    else:
+        window = range_mask(_minutes(start), _minutes(end))
+        full = rows.annotate(window_booked=F('booked_mask').bitand(window)).filter(window_booked=window)
+    return queryset.filter(~Exists(full))
+
+
+def doctors_with_free_slot(day, queryset=None, start=None, end=None):
+    """Doctors with at least one free slot on a date, optionally within ``start``-``end``"""
+    if queryset is None:
+        queryset = Doctor.objects.all()
+    return exclude_full(queryset.available_on(day, start, end), day, start, end)
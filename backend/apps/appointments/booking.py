@@ -0,0 +1,117 @@
+"""
+Atomic booking of doctor slots.
+
+Bookings for the same doctor and day are serialized by a row lock on that
+doctor-day's DoctorDaySlots row, so concurrent requests for different doctors
+or days never wait on each other. That lock is what prevents overlapping
+bookings: the partial unique constraint on DoctorAppointment only rejects two
+active appointments with the exact same start time. ``ConcurrentBookingTests``
+checks this on databases with row locks; ``manage.py stress_booking`` does so
+under heavier, configurable load.
+"""
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from . import availability
+from .models import DoctorAppointment, DoctorDaySlots
+
+ALTERNATIVES_LIMIT = 5
+ALTERNATIVES_HORIZON_DAYS = 14
+
+
+class SlotUnavailable(Exception):
+    """Raised when the requested slot is already taken"""
+
+    def __init__(self, alternatives):
+        super().__init__('This slot is no longer available')
+        self.alternatives = alternatives
+
+
+def _fits(free, mask):
+    return free & mask == mask
+
+
+def suggest_alternatives(doctor, day, appointment_time, duration_minutes,
+                         limit=ALTERNATIVES_LIMIT, horizon_days=ALTERNATIVES_HORIZON_DAYS):
+    """
+    Free start times that fit the requested duration, closest to the request first.
+
+    Slots on the requested day are ordered by distance from the requested time,
+    then the following days are scanned in chronological order.
+    """
+    now = timezone.localtime()
+    start = max(day, now.date())
+    end = start + timedelta(days=horizon_days)
+    booked = dict(
+        DoctorDaySlots.objects.filter(doctor=doctor, date__range=(start, end))
+        .values_list('date', 'booked_mask')
+    )
+    availability.preload_schedule([doctor], start, end)
+    base_mask = availability.range_mask(0, duration_minutes)
+    requested = availability.slot_index(appointment_time)
+
+    alternatives = []
+    current = start
+    while current <= end and len(alternatives) < limit:
+        free = availability.working_mask(doctor, current) & ~booked.get(current, 0)
+        starts = [
+            index for index in range(availability.SLOTS_PER_DAY)
+            if free >> index and _fits(free, base_mask << index)
+        ]
+        if current == now.date():
+            starts = [i for i in starts if availability.slot_time(i) > now.time()]
+        if current == day:
+            starts.sort(key=lambda i: (abs(i - requested), i))
+        for index in starts[:limit - len(alternatives)]:
+            alternatives.append({'date': current, 'time': availability.slot_time(index)})
+        current += timedelta(days=1)
+    return alternatives
+
+
+def _check_free(row, mask, own_mask=0):
+    free = availability.working_mask(row.doctor, row.date) & ~(row.booked_mask & ~own_mask)
+    return _fits(free, mask)
+
+
+def book(serializer, **save_kwargs):
+    """Save a validated create serializer, raising SlotUnavailable on conflict"""
+    data = serializer.validated_data
+    doctor = data['doctor']
+    day = data['appointment_date']
+    duration = data.get('duration_minutes') or DoctorAppointment._meta.get_field('duration_minutes').get_default()
+    mask = availability.appointment_mask(data['appointment_time'], duration)
+
+    try:
+        with transaction.atomic():
+            row = availability.lock_day(doctor.pk, day)
+            if not _check_free(row, mask):
+                raise SlotUnavailable(None)
+            return serializer.save(**save_kwargs)
+    except (SlotUnavailable, IntegrityError):
+        raise SlotUnavailable(suggest_alternatives(doctor, day, data['appointment_time'], duration))
+
+
+def reschedule(appointment, day, appointment_time):
+    """Move an appointment to a new date/time, raising SlotUnavailable on conflict"""
+    doctor = appointment.doctor
+    duration = appointment.duration_minutes
+    mask = availability.appointment_mask(appointment_time, duration)
+    old_key = availability.appointment_slot_key(appointment)
+
+    try:
+        with transaction.atomic():
+            # Lock doctor-days in date order so two reschedules cannot deadlock
+            days = sorted({day} | ({old_key[1]} if old_key else set()))
+            rows = {d: availability.lock_day(doctor.pk, d) for d in days}
+            own_mask = old_key[2] if old_key and old_key[1] == day else 0
+            if not _check_free(rows[day], mask, own_mask):
+                raise SlotUnavailable(None)
+            appointment.appointment_date = day
+            appointment.appointment_time = appointment_time
+            appointment.status = 'rescheduled'
+            appointment.save()
+            return appointment
+    except (SlotUnavailable, IntegrityError):
+        raise SlotUnavailable(suggest_alternatives(doctor, day, appointment_time, duration))
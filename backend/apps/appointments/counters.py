@@ -0,0 +1,102 @@
+"""
+Per-user appointment counters.
+
+When APPOINTMENT_COUNTERS_ENABLED is set, AppointmentCounters is kept in step
+with every appointment create, status change and delete inside the same
+transaction, so the dashboard totals can be read from one row. Upcoming
+appointments depend on today's date, which no write event tracks, so they are
+counted alongside in the same query from the (user, date) index; moves
+between scheduled and rescheduled, or to statuses without a counter, write
+nothing.
+"""
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import AppointmentCounters, DoctorAppointment
+
+STATUS_COUNTERS = {
+    'completed': 'completed',
+    'cancelled': 'cancelled',
+}
+
+
+def enabled():
+    return getattr(settings, 'APPOINTMENT_COUNTERS_ENABLED', False)
+
+
+def status_deltas(old_status, new_status, created=False, deleted=False):
+    """Counter deltas for an appointment transition"""
+    deltas = {}
+    if created:
+        deltas['total'] = 1
+    if deleted:
+        deltas['total'] = -1
+    old_counter = None if created else STATUS_COUNTERS.get(old_status)
+    new_counter = None if deleted else STATUS_COUNTERS.get(new_status)
+    if old_counter != new_counter:
+        if old_counter:
+            deltas[old_counter] = deltas.get(old_counter, 0) - 1
+        if new_counter:
+            deltas[new_counter] = deltas.get(new_counter, 0) + 1
+    return deltas
+
+
+def count_appointments(user_ids):
+    """{user_id: {counter: value}} computed from the appointments table"""
+    rows = (
+        DoctorAppointment.objects
+        .filter(user_id__in=user_ids)
+        .values('user_id')
+        .annotate(
+            total=Count('id'),
+            completed=Count('id', filter=Q(status='completed')),
+            cancelled=Count('id', filter=Q(status='cancelled')),
+        )
+    )
+    return {row.pop('user_id'): row for row in rows}
+
+
+def apply(user_id, deltas, create=True):
+    """
+    Apply counter deltas for a user.
+
+    A missing row is initialised from the appointments table, which already
+    reflects the change being applied, so it never needs the deltas.
+    """
+    if not deltas:
+        return
+    updated = AppointmentCounters.objects.filter(user_id=user_id).update(
+        **{name: F(name) + delta for name, delta in deltas.items()}
+    )
+    if updated or not create:
+        return
+    values = count_appointments([user_id]).get(user_id, {})
+    try:
+        with transaction.atomic():
+            AppointmentCounters.objects.create(user_id=user_id, **values)
+    except IntegrityError:
+        # Created concurrently from a snapshot that cannot include our uncommitted change
+        apply(user_id, deltas, create=False)
+
+
+def read(user_id):
+    """Stats dict from the counters row, or None if the user has no row yet"""
+    upcoming = (
+        DoctorAppointment.objects.filter(user_id=OuterRef('user_id')).upcoming()
+        .order_by().values('user_id').annotate(count=Count('id')).values('count')
+    )
+    counters = (
+        AppointmentCounters.objects.filter(user_id=user_id)
+        .annotate(upcoming=Coalesce(Subquery(upcoming), 0))
+        .first()
+    )
+    if counters is None:
+        return None
+    return {
+        'total_appointments': counters.total,
+        'completed_appointments': counters.completed,
+        'upcoming_appointments': counters.upcoming,
+        'cancelled_appointments': counters.cancelled,
+    }
@@ -0,0 +1,109 @@
+"""
+Versioned cache for the doctor directory.
+
+Cached pages are keyed by a directory version that is bumped whenever a
+doctor changes, so invalidation is a single counter increment and stale pages
+simply stop being read. Availability pages are additionally keyed by a
+per-date version bumped when a doctor-day fills up or frees up, and pages
+restricted to a time window by one bumped on every booking change that day,
+since a booking can fill a window without filling the day. Responses carry
+an ETag derived from the key, so unchanged pages are answered with 304
+before touching the database.
+"""
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+DIRECTORY_VERSION_KEY = 'doctors:directory:version'
+SLOTS_VERSION_KEY = 'doctors:slots:{date}:version'
+BOOKINGS_VERSION_KEY = 'doctors:bookings:{date}:version'
+SEARCH_VERSION_KEY = 'doctors:search:version'
+CACHE_TIMEOUT = 60 * 60
+
+# Query parameters that select a cached page; anything else is ignored
+CACHE_PARAMS = ('specialty', 'page', 'page_size', 'date', 'start', 'end')
+
+
+def _get_version(key):
+    version = cache.get(key)
+    if version is None:
+        # Start from a timestamp so a lost counter never reuses an old version
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+def _bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, int(time.time() * 1000), None)
+
+
+def directory_version():
+    return _get_version(DIRECTORY_VERSION_KEY)
+
+
+def slots_version(day):
+    return _get_version(SLOTS_VERSION_KEY.format(date=day.isoformat()))
+
+
+def bookings_version(day):
+    return _get_version(BOOKINGS_VERSION_KEY.format(date=day.isoformat()))
+
+
+def bump_bookings_version(day):
+    """Invalidate cached pages that depend on individual bookings of a date once the transaction commits"""
+    transaction.on_commit(lambda: _bump_version(BOOKINGS_VERSION_KEY.format(date=day.isoformat())))
+
+
+def search_version():
+    return _get_version(SEARCH_VERSION_KEY)
+
+
+def bump_search_version():
+    """Tell every process's search index to catch up once the current transaction commits"""
+    transaction.on_commit(lambda: _bump_version(SEARCH_VERSION_KEY))
+
+
+def bump_directory_version():
+    """Invalidate every cached directory page once the current transaction commits"""
+    transaction.on_commit(lambda: _bump_version(DIRECTORY_VERSION_KEY))
+
+
+def bump_slots_version(day):
+    """Invalidate cached availability pages for one date once the transaction commits"""
+    transaction.on_commit(lambda: _bump_version(SLOTS_VERSION_KEY.format(date=day.isoformat())))
+
+
+def cached_response(request, scope, build, versions=()):
+    """
+    Serve a directory page from cache, or build and cache it.
+
+    ``build`` returns a Response; only 200 responses are cached.
+    """
+    params = '&'.join(
+        f'{name}={request.query_params[name]}'
+        for name in CACHE_PARAMS if name in request.query_params
+    )
+    version = ':'.join(str(v) for v in (directory_version(),) + tuple(versions))
+    key = f'doctors:{version}:{scope}:{params}'
+    etag = quote_etag(hashlib.md5(key.encode()).hexdigest())
+
+    if_none_match = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+    if etag in if_none_match or '*' in if_none_match:
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+    data = cache.get(key)
+    if data is None:
+        response = build()
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        data = response.data
+        cache.set(key, data, CACHE_TIMEOUT)
+    return Response(data, headers={'ETag': etag})
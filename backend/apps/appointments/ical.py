@@ -0,0 +1,113 @@
+"""
+iCalendar (RFC 5545) feed of a user's appointments.
+
+Feeds are addressed by a signed token instead of a JWT so calendar clients can
+poll them. The token carries the user's token version, so changing the
+password or revoking all sessions also kills every feed link issued before;
+tokens of inactive users are rejected too. The body is generated line by line
+from a chunked queryset iterator and never built in memory as a whole.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core import signing
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from apps.users.authentication import token_version_is_current
+
+from .models import DoctorAppointment
+
+TOKEN_SALT = 'appointments.calendar'
+FEED_HISTORY_DAYS = 90
+CHUNK_SIZE = 500
+
+
+def make_token(user):
+    """Calendar feed token for a user"""
+    return signing.Signer(salt=TOKEN_SALT).sign(f'{user.pk}:{user.token_version}')
+
+
+def read_token(token):
+    """User id from a feed token, or None if the token is invalid or revoked"""
+    try:
+        user_id, version = map(int, signing.Signer(salt=TOKEN_SALT).unsign(token or '').split(':'))
+    except (signing.BadSignature, ValueError):
+        return None
+    return user_id if token_version_is_current(user_id, version) else None
+
+
+def feed_queryset(user_id):
+    """Appointments published in a user's feed"""
+    since = timezone.localdate() - timedelta(days=FEED_HISTORY_DAYS)
+    return DoctorAppointment.objects.filter(user_id=user_id, appointment_date__gte=since)
+
+
+def feed_state(user_id):
+    """(last modified, count) of a user's feed, computed in one query"""
+    state = feed_queryset(user_id).order_by().aggregate(last_modified=Max('updated_at'), count=Count('id'))
+    return state['last_modified'], state['count']
+
+
+def _escape(text):
+    return (
+        (text or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def _fold(line):
+    """Fold a content line at 75 octets as required by RFC 5545"""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    parts = []
+    while encoded:
+        limit = 75 if not parts else 74
+        cut = min(limit, len(encoded))
+        # Do not split a multi-byte character
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode('utf-8'))
+        encoded = encoded[cut:]
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def _utc(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _event(appointment, host):
+    start = timezone.make_aware(datetime.combine(appointment.appointment_date, appointment.appointment_time))
+    end = start + timedelta(minutes=appointment.duration_minutes)
+    doctor = appointment.doctor.name if appointment.doctor else 'your doctor'
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:appointment-{appointment.pk}@{host}',
+        f'DTSTAMP:{_utc(appointment.updated_at)}',
+        f'LAST-MODIFIED:{_utc(appointment.updated_at)}',
+        f'DTSTART:{_utc(start)}',
+        f'DTEND:{_utc(end)}',
+        f'SUMMARY:{_escape(f"Appointment with Dr. {doctor}")}',
+        f'DESCRIPTION:{_escape(appointment.reason_for_visit)}',
+        'STATUS:' + ('CANCELLED' if appointment.status == 'cancelled' else 'CONFIRMED'),
+    ]
+    location = appointment.location or appointment.video_call_link
+    if location:
+        lines.append(f'LOCATION:{_escape(location)}')
+    if appointment.video_call_link:
+        lines.append(f'URL:{appointment.video_call_link}')
+    lines.append('END:VEVENT')
+    return ''.join(_fold(line) for line in lines)
+
+
+def stream_feed(user_id, host):
+    """Yield the iCalendar document for a user's appointments chunk by chunk"""
+    yield _fold('BEGIN:VCALENDAR')
+    yield _fold('VERSION:2.0')
+    yield _fold('PRODID:-//Pridally//Appointments//EN')
+    yield _fold('CALSCALE:GREGORIAN')
+    yield _fold('X-WR-CALNAME:Pridally appointments')
+    appointments = feed_queryset(user_id).select_related('doctor').order_by('appointment_date', 'appointment_time', 'id')
+    for appointment in appointments.iterator(chunk_size=CHUNK_SIZE):
+        yield _event(appointment, host)
+    yield _fold('END:VCALENDAR')
@@ -0,0 +1,102 @@
+"""
+Background jobs for appointments.
+
+These are plain functions so they can be run from the management commands,
+cron or any task queue.
+"""
+import time
+from datetime import timedelta
+from itertools import islice
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import counters
+from .models import DoctorAppointment, DoctorAppointmentQuerySet, JobCheckpoint
+
+SWEEP_JOB_NAME = 'sweep_overdue_appointments'
+SWEEP_POLICIES = ('no_show', 'completed', 'auto')
+
+
+def _target_status(appointment, policy):
+    if policy == 'auto':
+        return 'completed' if appointment.doctor_notes else 'no_show'
+    return policy
+
+
+def _batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def sweep_overdue_appointments(policy='no_show', grace=timedelta(hours=2), batch_size=1000,
+                               resume=True, dry_run=False, progress=None):
+    """
+    Move scheduled/rescheduled appointments that are past their start time.
+
+    Overdue ids are streamed in primary key order; each batch is re-read under
+    a short row lock, updated with ``bulk_update`` and committed together with
+    the checkpoint, so an interrupted run resumes where it stopped and no lock
+    outlives a batch. ``policy`` is ``no_show``, ``completed`` or ``auto``
+    (completed when the doctor left notes, otherwise no-show).
+    """
+    if policy not in SWEEP_POLICIES:
+        raise ValueError(f"Unknown policy {policy!r}")
+
+    checkpoint, created = JobCheckpoint.objects.get_or_create(name=SWEEP_JOB_NAME)
+    start_after = checkpoint.position if resume else 0
+    cutoff = timezone.now() - grace
+
+    overdue_ids = (
+        DoctorAppointment.objects.overdue(cutoff)
+        .filter(pk__gt=start_after)
+        .order_by('pk')
+        .values_list('pk', flat=True)
+    )
+
+    started = time.monotonic()
+    scanned = updated = 0
+    for batch in _batched(overdue_ids.iterator(chunk_size=batch_size), batch_size):
+        with transaction.atomic():
+            appointments = list(
+                DoctorAppointment.objects.select_for_update(skip_locked=True)
+                .filter(pk__in=batch, status__in=DoctorAppointmentQuerySet.ACTIVE_STATUSES)
+            )
+            now = timezone.now()
+            deltas = {}
+            for appointment in appointments:
+                new_status = _target_status(appointment, policy)
+                user_deltas = deltas.setdefault(appointment.user_id, {})
+                for name, delta in counters.status_deltas(appointment.status, new_status).items():
+                    user_deltas[name] = user_deltas.get(name, 0) + delta
+                appointment.status = new_status
+                appointment.updated_at = now
+
+            if not dry_run:
+                DoctorAppointment.objects.bulk_update(appointments, ['status', 'updated_at'])
+                # bulk_update bypasses signals, so keep the counters in step here
+                if counters.enabled():
+                    for user_id, user_deltas in deltas.items():
+                        counters.apply(user_id, user_deltas)
+                checkpoint.position = batch[-1]
+                checkpoint.save(update_fields=['position', 'updated_at'])
+
+        scanned += len(batch)
+        updated += len(appointments)
+        if progress:
+            elapsed = time.monotonic() - started
+            progress(scanned, updated, scanned / elapsed if elapsed else 0.0)
+
+    if not dry_run:
+        # Finished: the next run starts from the beginning again
+        checkpoint.position = 0
+        checkpoint.save(update_fields=['position', 'updated_at'])
+
+    elapsed = time.monotonic() - started
+    return {
+        'scanned': scanned,
+        'updated': updated,
+        'seconds': round(elapsed, 2),
+        'rows_per_second': round(scanned / elapsed, 1) if elapsed else 0.0,
+    }
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from apps.appointments.models import Doctor
+from apps.appointments.ratings import rating_aggregates
+from apps.appointments import directory_cache
+
+
+class Command(BaseCommand):
+    help = "Rebuild doctor rating count, sum and average from appointment ratings"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        last_id = 0
+        updated = 0
+        while True:
+            with transaction.atomic():
+                # Lock the chunk so concurrent ratings are applied on top of the rebuilt values
+                doctors = list(
+                    Doctor.objects.select_for_update()
+                    .filter(pk__gt=last_id)
+                    .order_by('pk')[:chunk_size]
+                )
+                if not doctors:
+                    break
+                aggregates = rating_aggregates([d.pk for d in doctors])
+                for doctor in doctors:
+                    count, total = aggregates.get(doctor.pk, (0, 0))
+                    doctor.rating_count = count
+                    doctor.rating_sum = total
+                    doctor.average_rating = total / count if count else 0
+                Doctor.objects.bulk_update(doctors, ['rating_count', 'rating_sum', 'average_rating'])
+            updated += len(doctors)
+            last_id = doctors[-1].pk
+            directory_cache.bump_directory_version()
+            self.stdout.write(f"Rebuilt ratings for {updated} doctors")
+
+        self.stdout.write(self.style.SUCCESS(f"Done, {updated} doctors updated"))
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from apps.appointments.models import Doctor, DoctorAppointment, DoctorDaySlots
+from apps.appointments import availability, directory_cache
+
+
+class Command(BaseCommand):
+    help = "Rebuild the doctor-day slot bitmaps from existing appointments"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='since', help="First date to rebuild (YYYY-MM-DD), defaults to today")
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        since = timezone.now().date()
+        if options['since']:
+            since = parse_date(options['since'])
+            if since is None:
+                raise CommandError("--from must be a date in YYYY-MM-DD format")
+
+        appointments = (
+            DoctorAppointment.objects
+            .filter(appointment_date__gte=since, doctor__isnull=False)
+            .exclude(status__in=availability.RELEASED_STATUSES)
+            .values_list('doctor_id', 'appointment_date', 'appointment_time', 'duration_minutes')
+        )
+        masks = {}
+        for doctor_id, day, start, duration in appointments.iterator(chunk_size=options['chunk_size']):
+            key = (doctor_id, day)
+            masks[key] = masks.get(key, 0) | availability.appointment_mask(start, duration)
+
+        doctors = Doctor.objects.in_bulk({doctor_id for doctor_id, day in masks})
+        availability.preload_schedule(doctors.values(), since)
+        rows = [
+            DoctorDaySlots(
+                doctor_id=doctor_id,
+                date=day,
+                booked_mask=mask,
+                is_full=not (availability.working_mask(doctors[doctor_id], day) & ~mask),
+            )
+            for (doctor_id, day), mask in masks.items()
+        ]
+
+        with transaction.atomic():
+            DoctorDaySlots.objects.filter(date__gte=since).delete()
+            DoctorDaySlots.objects.bulk_create(rows, batch_size=options['chunk_size'])
+            directory_cache.bump_directory_version()
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(rows)} doctor-day bitmaps from {since}"))
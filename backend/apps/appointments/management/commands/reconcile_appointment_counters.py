@@ -0,0 +1,63 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from apps.appointments.models import AppointmentCounters
+from apps.appointments.counters import count_appointments
+
+User = get_user_model()
+
+COUNTER_FIELDS = ('total', 'completed', 'cancelled')
+
+
+class Command(BaseCommand):
+    help = "Detect and optionally repair drift in per-user appointment counters"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help="Rewrite drifted or missing counter rows")
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        last_id = 0
+        checked = drifted = 0
+        while True:
+            with transaction.atomic():
+                user_ids = list(
+                    User.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:chunk_size]
+                )
+                if not user_ids:
+                    break
+                # Lock existing rows so concurrent writers apply their deltas after the repair
+                existing = {
+                    row.user_id: row
+                    for row in AppointmentCounters.objects.select_for_update().filter(user_id__in=user_ids)
+                }
+                actual = count_appointments(user_ids)
+
+                to_update, to_create = [], []
+                for user_id in user_ids:
+                    values = actual.get(user_id, dict.fromkeys(COUNTER_FIELDS, 0))
+                    row = existing.get(user_id)
+                    if row is None:
+                        if values['total']:
+                            drifted += 1
+                            to_create.append(AppointmentCounters(user_id=user_id, **values))
+                        continue
+                    if any(getattr(row, name) != values[name] for name in COUNTER_FIELDS):
+                        drifted += 1
+                        self.stdout.write(f"User {user_id}: " + ', '.join(
+                            f"{name} {getattr(row, name)} -> {values[name]}" for name in COUNTER_FIELDS
+                        ))
+                        for name in COUNTER_FIELDS:
+                            setattr(row, name, values[name])
+                        to_update.append(row)
+
+                if options['fix']:
+                    AppointmentCounters.objects.bulk_update(to_update, COUNTER_FIELDS)
+                    AppointmentCounters.objects.bulk_create(to_create, ignore_conflicts=True)
+
+            checked += len(user_ids)
+            last_id = user_ids[-1]
+
+        action = 'repaired' if options['fix'] else 'found'
+        self.stdout.write(self.style.SUCCESS(f"Checked {checked} users, {action} {drifted} drifted counters"))
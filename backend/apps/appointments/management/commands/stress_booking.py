@@ -0,0 +1,105 @@
+import random
+import threading
+import uuid
+from collections import Counter
+from datetime import time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.appointments import availability
+from apps.appointments.models import Doctor
+from apps.appointments.views import DoctorAppointmentViewSet
+
+# Contended window: a few overlapping start times on a few days
+START_TIMES = [time(9, 0), time(9, 30), time(10, 0), time(10, 30), time(11, 0), time(11, 30)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Book and reschedule one doctor's slots from many threads through the API views, "
+        "then check that no two active appointments overlap; creates and deletes its own data"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--requests', type=int, default=40, help="Requests per thread")
+        parser.add_argument('--days', type=int, default=2)
+        parser.add_argument('--reschedule-ratio', type=float, default=0.3)
+        parser.add_argument('--keep', action='store_true', help="Keep the generated doctor, users and appointments")
+
+    def _client(self, user, days, options, statuses, lock):
+        factory = APIRequestFactory()
+        create = DoctorAppointmentViewSet.as_view({'post': 'create'})
+        reschedule = DoctorAppointmentViewSet.as_view({'post': 'reschedule'})
+        rng = random.Random(user.pk)
+        booked = []
+        try:
+            for _ in range(options['requests']):
+                slot = {
+                    'appointment_date': rng.choice(days).isoformat(),
+                    'appointment_time': rng.choice(START_TIMES).strftime('%H:%M'),
+                }
+                if booked and rng.random() < options['reschedule_ratio']:
+                    action, pk = 'reschedule', rng.choice(booked)
+                    request = factory.post(f'/api/appointments/{pk}/reschedule/', slot, format='json')
+                    force_authenticate(request, user=user)
+                    call = lambda: reschedule(request, pk=pk)
+                else:
+                    action = 'create'
+                    data = {'doctor': self.doctor.pk, 'appointment_type': 'in_person', 'reason_for_visit': 'stress', **slot}
+                    request = factory.post('/api/appointments/', data, format='json')
+                    force_authenticate(request, user=user)
+                    call = lambda: create(request)
+                try:
+                    response = call()
+                    outcome = response.status_code
+                    if action == 'create' and outcome == 201:
+                        booked.append(response.data['id'])
+                except Exception as error:
+                    outcome = type(error).__name__
+                with lock:
+                    statuses[action, outcome] += 1
+        finally:
+            connection.close()
+
+    def handle(self, *args, **options):
+        run = uuid.uuid4().hex[:8]
+        self.doctor = Doctor.objects.create(
+            name=f'Stress {run}', email=f'stress-{run}@example.com', phone='0', speciality='general_practice',
+            available_days='Mon,Tue,Wed,Thu,Fri,Sat,Sun',
+            start_time=time(9, 0), end_time=time(17, 0),
+        )
+        User = get_user_model()
+        users = [
+            User.objects.create_user(username=f'stress-{run}-{i}', email=f'stress-{run}-{i}@example.com')
+            for i in range(options['threads'])
+        ]
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        days = [tomorrow + timedelta(days=i) for i in range(options['days'])]
+
+        statuses, lock = Counter(), threading.Lock()
+        try:
+            threads = [
+                threading.Thread(target=self._client, args=(user, days, options, statuses, lock))
+                for user in users
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            for (action, outcome), count in sorted(statuses.items(), key=str):
+                self.stdout.write(f"{action:<11} {outcome}: {count}")
+            overlaps, mismatched, active = availability.booking_conflicts(self.doctor.pk)
+            self.stdout.write(f"{active} active appointments")
+            if overlaps or mismatched:
+                raise CommandError(f"{overlaps} double bookings, {mismatched} days with a stale bitmap")
+            self.stdout.write(self.style.SUCCESS("Done, no double bookings"))
+        finally:
+            if not options['keep']:
+                User.objects.filter(pk__in=[user.pk for user in users]).delete()
+                self.doctor.delete()
@@ -0,0 +1,33 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from apps.appointments.jobs import SWEEP_POLICIES, sweep_overdue_appointments
+
+
+class Command(BaseCommand):
+    help = "Mark overdue scheduled appointments as no-show or completed"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--policy', choices=SWEEP_POLICIES, default='no_show',
+                            help="auto: completed if the doctor left notes, otherwise no_show")
+        parser.add_argument('--grace-minutes', type=int, default=120,
+                            help="How long after its start an appointment counts as overdue")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--restart', action='store_true', help="Ignore the saved checkpoint")
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        def progress(scanned, updated, rate):
+            self.stdout.write(f"Scanned {scanned}, updated {updated} ({rate:.0f} rows/s)")
+
+        result = sweep_overdue_appointments(
+            policy=options['policy'],
+            grace=timedelta(minutes=options['grace_minutes']),
+            batch_size=options['batch_size'],
+            resume=not options['restart'],
+            dry_run=options['dry_run'],
+            progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Scanned {result['scanned']} and updated {result['updated']} appointments "
+            f"in {result['seconds']}s ({result['rows_per_second']} rows/s)"
+        ))
@@ -0,0 +1,84 @@
+# Generated by Django 4.2.8 on 2026-10-18 15:20
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Doctor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('email', models.EmailField(max_length=254, unique=True)),
+                ('phone', models.CharField(max_length=20)),
+                ('speciality', models.CharField(choices=[('general_practice', 'General Practice'), ('cardiology', 'Cardiology'), ('neurology', 'Neurology'), ('orthopedics', 'Orthopedics'), ('dermatology', 'Dermatology'), ('psychiatry', 'Psychiatry'), ('nutrition', 'Nutrition'), ('physical_therapy', 'Physical Therapy')], max_length=50)),
+                ('bio', models.TextField(blank=True)),
+                ('profile_picture', models.ImageField(blank=True, null=True, upload_to='doctors/')),
+                ('hospital', models.CharField(blank=True, max_length=100)),
+                ('available_days', models.CharField(default='Monday,Tuesday,Wednesday,Thursday,Friday', help_text='Comma-separated days', max_length=50)),
+                ('start_time', models.TimeField(default='09:00')),
+                ('end_time', models.TimeField(default='17:00')),
+                ('average_rating', models.FloatField(default=0, help_text='Average rating out of 5')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DoctorAppointment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('appointment_type', models.CharField(choices=[('in_person', 'In Person'), ('video_call', 'Video Call'), ('phone_call', 'Phone Call')], default='in_person', max_length=20)),
+                ('appointment_date', models.DateField()),
+                ('appointment_time', models.TimeField()),
+                ('duration_minutes', models.IntegerField(default=30)),
+                ('status', models.CharField(choices=[('scheduled', 'Scheduled'), ('completed', 'Completed'), ('cancelled', 'Cancelled'), ('no_show', 'No Show'), ('rescheduled', 'Rescheduled')], default='scheduled', max_length=20)),
+                ('reason_for_visit', models.TextField()),
+                ('doctor_notes', models.TextField(blank=True, help_text='Notes from doctor after appointment')),
+                ('patient_notes', models.TextField(blank=True, help_text="Patient's additional notes")),
+                ('video_call_link', models.URLField(blank=True, help_text='Zoom/Meet link for video appointments')),
+                ('location', models.CharField(blank=True, help_text='Hospital/Clinic location', max_length=200)),
+                ('rating', models.IntegerField(blank=True, choices=[(1, 1), (2, 2), (3, 3), (4, 4), (5, 5)], null=True)),
+                ('review', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('doctor', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='appointments', to='appointments.doctor')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='doctor_appointments', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Doctor Appointments',
+                'ordering': ['-appointment_date', '-appointment_time'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Prescription',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('medication_name', models.CharField(max_length=100)),
+                ('dosage', models.CharField(help_text='e.g., 500mg', max_length=50)),
+                ('frequency', models.CharField(help_text='e.g., Twice daily', max_length=100)),
+                ('duration', models.CharField(help_text='e.g., 10 days', max_length=100)),
+                ('instructions', models.TextField(blank=True)),
+                ('side_effects', models.TextField(blank=True)),
+                ('is_completed', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('appointment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='prescriptions', to='appointments.doctorappointment')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.8 on 2026-10-18 15:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DoctorDaySlots',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('booked_mask', models.BigIntegerField(default=0)),
+                ('is_full', models.BooleanField(default=False, help_text='No free slot left within working hours')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='day_slots', to='appointments.doctor')),
+            ],
+            options={
+                'verbose_name_plural': 'Doctor Day Slots',
+                'indexes': [models.Index(fields=['date', 'is_full'], name='appointment_date_c762af_idx')],
+                'unique_together': {('doctor', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.8 on 2026-10-18 15:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0002_doctordayslots'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='doctorappointment',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'cancelled'), _negated=True), fields=('doctor', 'appointment_date', 'appointment_time'), name='unique_active_doctor_slot'),
+        ),
+    ]
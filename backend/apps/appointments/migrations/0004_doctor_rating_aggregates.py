@@ -0,0 +1,23 @@
+# Generated by Django 4.2.8 on 2026-10-18 15:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0003_unique_active_doctor_slot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='doctor',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, help_text='Number of rated appointments'),
+        ),
+        migrations.AddField(
+            model_name='doctor',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, help_text='Sum of all appointment ratings'),
+        ),
+    ]
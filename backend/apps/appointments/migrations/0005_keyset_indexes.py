@@ -0,0 +1,17 @@
+# Generated by Django 4.2.8 on 2026-10-18 15:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0004_doctor_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='doctorappointment',
+            index=models.Index(fields=['user', 'appointment_date', 'appointment_time', 'id'], name='appointment_user_keyset_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations
+
+INDEX_NAME = 'appointments_doctor_search_idx'
+
+# Must stay identical to apps.appointments.search.search_vector() so the planner can use it
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('simple'::regconfig, COALESCE(\"name\", '')), 'A')"
+    " || setweight(to_tsvector('simple'::regconfig, COALESCE(\"speciality\", '')), 'B')"
+    " || setweight(to_tsvector('simple'::regconfig, COALESCE(\"hospital\", '')), 'C')"
+    " || setweight(to_tsvector('simple'::regconfig, COALESCE(\"bio\", '')), 'D')"
+)
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    table = schema_editor.quote_name(apps.get_model('appointments', 'Doctor')._meta.db_table)
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON {table} USING gin (({SEARCH_VECTOR_SQL}))"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f"DROP INDEX IF EXISTS {INDEX_NAME}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0006_appointmentcounters'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,109 @@
+# Generated by Django 4.2.8 on 2026-10-18 15:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+WEEKDAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+
+
+def days_to_mask(text):
+    # Frozen copy of models.days_to_mask
+    mask = 0
+    for token in (text or '').split(','):
+        token = token.strip().lower()
+        if len(token) < 2:
+            continue
+        for index, name in enumerate(WEEKDAYS):
+            if name.startswith(token):
+                mask |= 1 << index
+    return mask
+
+
+def populate_day_masks(apps, schema_editor):
+    Doctor = apps.get_model('appointments', 'Doctor')
+    batch = []
+    for doctor in Doctor.objects.only('id', 'available_days').iterator(chunk_size=1000):
+        doctor.available_days_mask = days_to_mask(doctor.available_days)
+        batch.append(doctor)
+        if len(batch) >= 1000:
+            Doctor.objects.bulk_update(batch, ['available_days_mask'])
+            batch = []
+    Doctor.objects.bulk_update(batch, ['available_days_mask'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0008_jobcheckpoint_overdue_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DoctorScheduleException',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('is_available', models.BooleanField(default=False)),
+                ('start_time', models.TimeField(blank=True, null=True)),
+                ('end_time', models.TimeField(blank=True, null=True)),
+                ('reason', models.CharField(blank=True, max_length=200)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DoctorWorkingHours',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField(choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')])),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+            ],
+            options={
+                'verbose_name_plural': 'Doctor Working Hours',
+            },
+        ),
+        migrations.AddField(
+            model_name='doctor',
+            name='available_days_mask',
+            field=models.PositiveSmallIntegerField(db_index=True, default=31, help_text='Bit i set means the doctor works on weekday i (Monday is 0); derived from available_days'),
+        ),
+        migrations.RunPython(populate_day_masks, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='doctor',
+            index=models.Index(fields=['speciality', 'available_days_mask'], name='appointment_special_e17da3_idx'),
+        ),
+        migrations.AddField(
+            model_name='doctorworkinghours',
+            name='doctor',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='working_hours', to='appointments.doctor'),
+        ),
+        migrations.AddField(
+            model_name='doctorscheduleexception',
+            name='doctor',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='schedule_exceptions', to='appointments.doctor'),
+        ),
+        migrations.AddIndex(
+            model_name='doctorworkinghours',
+            index=models.Index(fields=['weekday', 'start_time', 'end_time'], name='appointment_weekday_1c636b_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='doctorworkinghours',
+            constraint=models.CheckConstraint(check=models.Q(('start_time__lt', models.F('end_time'))), name='working_hours_start_before_end'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='doctorworkinghours',
+            unique_together={('doctor', 'weekday')},
+        ),
+        migrations.AddIndex(
+            model_name='doctorscheduleexception',
+            index=models.Index(fields=['date', 'is_available'], name='appointment_date_c65a31_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='doctorscheduleexception',
+            constraint=models.CheckConstraint(check=models.Q(('is_available', False), models.Q(('end_time__isnull', False), ('start_time__isnull', False), ('start_time__lt', models.F('end_time'))), _connector='OR'), name='schedule_exception_hours'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='doctorscheduleexception',
+            unique_together={('doctor', 'date')},
+        ),
+    ]
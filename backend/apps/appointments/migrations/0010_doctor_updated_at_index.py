@@ -0,0 +1,18 @@
+# Generated by Django 4.2.8 on 2026-10-18 16:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0009_doctor_schedule'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='doctor',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
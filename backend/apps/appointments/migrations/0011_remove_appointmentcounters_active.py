@@ -0,0 +1,17 @@
+# Generated by Django 4.2.8 on 2026-10-18 16:29
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0010_doctor_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='appointmentcounters',
+            name='active',
+        ),
+    ]
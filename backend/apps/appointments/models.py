@@ -4,6 +4,75 @@ from django.utils import timezone
 
 User = get_user_model()
 
+WEEKDAYS = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+ALL_DAYS_MASK = (1 << len(WEEKDAYS)) - 1
+
+
+def weekday_bit(weekday):
+    """Bit of a weekday (Monday is 0) in ``Doctor.available_days_mask``"""
+    return 1 << weekday
+
+
+def days_to_mask(text):
+    """Day bitmask of a comma-separated list of day names such as 'Monday,Tue'"""
+    mask = 0
+    for token in (text or '').split(','):
+        token = token.strip().lower()
+        if len(token) < 2:
+            continue
+        for index, name in enumerate(WEEKDAYS):
+            if name.lower().startswith(token):
+                mask |= weekday_bit(index)
+    return mask
+
+
+def masks_with_day(weekday):
+    """Every day bitmask containing ``weekday``, so the filter is an indexable IN list"""
+    bit = weekday_bit(weekday)
+    return [mask for mask in range(ALL_DAYS_MASK + 1) if mask & bit]
+
+
+class DoctorQuerySet(models.QuerySet):
+    """Schedule filters that run as SQL predicates"""
+    
+    @staticmethod
+    def _weekly_condition(weekday, start, end):
+        condition = models.Q(available_days_mask__in=masks_with_day(weekday))
+        if start is None and end is None:
+            return condition
+        hours = DoctorWorkingHours.objects.filter(doctor=models.OuterRef('pk'), weekday=weekday)
+        covering, default = hours, models.Q()
+        if start is not None:
+            covering = covering.filter(start_time__lte=start)
+            default &= models.Q(start_time__lte=start)
+        if end is not None:
+            covering = covering.filter(end_time__gte=end)
+            default &= models.Q(end_time__gte=end)
+        # Per-weekday hours take precedence over the doctor's default hours
+        return condition & (models.Exists(covering) | (~models.Exists(hours) & default))
+    
+    def works_on(self, weekday, start=None, end=None):
+        """Doctors whose weekly schedule covers ``start``-``end`` on a weekday (Monday is 0)"""
+        return self.filter(self._weekly_condition(weekday, start, end))
+    
+    def available_on(self, day, start=None, end=None):
+        """Doctors working ``start``-``end`` on a date, honouring schedule exceptions"""
+        exceptions = DoctorScheduleException.objects.filter(doctor=models.OuterRef('pk'), date=day)
+        open_exceptions = exceptions.filter(is_available=True)
+        if start is not None:
+            open_exceptions = open_exceptions.filter(start_time__lte=start)
+        if end is not None:
+            open_exceptions = open_exceptions.filter(end_time__gte=end)
+        return self.filter(
+            models.Exists(open_exceptions)
+            | (~models.Exists(exceptions) & self._weekly_condition(day.weekday(), start, end))
+        )
+    
+    def available_today(self, start=None, end=None):
+        """Doctors working ``start``-``end`` today"""
+        return self.available_on(timezone.localdate(), start, end)
+
+
 class Doctor(models.Model):
     """Doctor/Healthcare provider information"""
     SPECIALTIES = [
@@ -31,21 +100,146 @@ class Doctor(models.Model):
         default='Monday,Tuesday,Wednesday,Thursday,Friday',
         help_text="Comma-separated days"
     )
+    available_days_mask = models.PositiveSmallIntegerField(
+        default=0b0011111,
+        db_index=True,
+        help_text="Bit i set means the doctor works on weekday i (Monday is 0); derived from available_days"
+    )
     start_time = models.TimeField(default='09:00')
     end_time = models.TimeField(default='17:00')
     
     # Rating
     average_rating = models.FloatField(default=0, help_text="Average rating out of 5")
+    rating_count = models.PositiveIntegerField(default=0, help_text="Number of rated appointments")
+    rating_sum = models.PositiveIntegerField(default=0, help_text="Sum of all appointment ratings")
     
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    # Indexed so search indexes can catch up on recently changed doctors
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    
+    objects = DoctorQuerySet.as_manager()
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [models.Index(fields=['speciality', 'available_days_mask'])]
     
     def __str__(self):
         return f"Dr. {self.name} ({self.speciality})"
+    
+    def save(self, *args, **kwargs):
+        self.available_days_mask = days_to_mask(self.available_days)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'available_days' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'available_days_mask'}
+        super().save(*args, **kwargs)
+
+
+class DoctorWorkingHours(models.Model):
+    """Working hours for one weekday, overriding the doctor's default hours"""
+    doctor = models.ForeignKey(Doctor, on_delete=models.CASCADE, related_name='working_hours')
+    weekday = models.PositiveSmallIntegerField(choices=list(enumerate(WEEKDAYS)))
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    
+    class Meta:
+        unique_together = ('doctor', 'weekday')
+        indexes = [models.Index(fields=['weekday', 'start_time', 'end_time'])]
+        constraints = [
+            models.CheckConstraint(check=models.Q(start_time__lt=models.F('end_time')),
+                                   name='working_hours_start_before_end'),
+        ]
+        verbose_name_plural = 'Doctor Working Hours'
+    
+    def __str__(self):
+        return f"Dr. {self.doctor.name} - {WEEKDAYS[self.weekday]} {self.start_time}-{self.end_time}"
+
+
+class DoctorScheduleException(models.Model):
+    """A date on which a doctor's weekly schedule does not apply, e.g. a holiday"""
+    doctor = models.ForeignKey(Doctor, on_delete=models.CASCADE, related_name='schedule_exceptions')
+    date = models.DateField()
+    
+    # Unavailable for the whole day, or available during the given hours instead
+    is_available = models.BooleanField(default=False)
+    start_time = models.TimeField(null=True, blank=True)
+    end_time = models.TimeField(null=True, blank=True)
+    reason = models.CharField(max_length=200, blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ('doctor', 'date')
+        indexes = [models.Index(fields=['date', 'is_available'])]
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(is_available=False)
+                | models.Q(start_time__isnull=False, end_time__isnull=False, start_time__lt=models.F('end_time')),
+                name='schedule_exception_hours',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"Dr. {self.doctor.name} - {self.date}"
+
+
+class DoctorAppointmentQuerySet(models.QuerySet):
+    """Queryset helpers for listing appointments"""
+    ACTIVE_STATUSES = ('scheduled', 'rescheduled')
+    
+    def for_serializer(self):
+        """Join the doctor, prefetch prescriptions and annotate timing flags"""
+        return self.select_related('doctor').prefetch_related('prescriptions').with_timing()
+    
+    def with_timing(self):
+        """Annotate ``upcoming_flag``/``past_flag`` in SQL instead of per-row Python"""
+        now = timezone.localtime()
+        today, current_time = now.date(), now.time()
+        return self.annotate(
+            upcoming_flag=models.ExpressionWrapper(
+                models.Q(appointment_date__gt=today)
+                | models.Q(appointment_date=today, appointment_time__gt=current_time),
+                output_field=models.BooleanField(),
+            ),
+            past_flag=models.ExpressionWrapper(
+                models.Q(appointment_date__lt=today)
+                | models.Q(appointment_date=today, appointment_time__lt=current_time),
+                output_field=models.BooleanField(),
+            ),
+        )
+    
+    def upcoming(self):
+        """Active appointments from today onwards, soonest first"""
+        return self.filter(
+            appointment_date__gte=timezone.localdate(),
+            status__in=self.ACTIVE_STATUSES,
+        ).order_by('appointment_date', 'appointment_time')
+    
+    def past(self):
+        """Appointments before today, most recent first"""
+        return self.filter(
+            appointment_date__lt=timezone.localdate()
+        ).order_by('-appointment_date', '-appointment_time')
+    
+    def overdue(self, cutoff):
+        """Active appointments that started at or before ``cutoff``"""
+        cutoff = timezone.localtime(cutoff)
+        return self.filter(status__in=self.ACTIVE_STATUSES).filter(
+            models.Q(appointment_date__lt=cutoff.date())
+            | models.Q(appointment_date=cutoff.date(), appointment_time__lte=cutoff.time())
+        )
+    
+    def stats(self):
+        """Total, completed, upcoming and cancelled counts in a single query"""
+        return self.aggregate(
+            total_appointments=models.Count('id'),
+            completed_appointments=models.Count('id', filter=models.Q(status='completed')),
+            upcoming_appointments=models.Count('id', filter=models.Q(
+                appointment_date__gte=timezone.localdate(),
+                status__in=self.ACTIVE_STATUSES,
+            )),
+            cancelled_appointments=models.Count('id', filter=models.Q(status='cancelled')),
+        )
 
 
 class DoctorAppointment(models.Model):
@@ -93,22 +287,88 @@ class DoctorAppointment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = DoctorAppointmentQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-appointment_date', '-appointment_time']
         verbose_name_plural = 'Doctor Appointments'
+        indexes = [
+            models.Index(fields=['user', 'appointment_date', 'appointment_time', 'id'],
+                         name='appointment_user_keyset_idx'),
+            models.Index(fields=['status', 'appointment_date'], name='appointment_status_date_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['doctor', 'appointment_date', 'appointment_time'],
+                condition=~models.Q(status='cancelled'),
+                name='unique_active_doctor_slot',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.user.email} - Dr. {self.doctor.name} - {self.appointment_date}"
     
+    def _appointment_datetime(self):
+        return timezone.make_aware(timezone.datetime.combine(self.appointment_date, self.appointment_time))
+    
     def is_upcoming(self):
         """Check if appointment is upcoming"""
-        appointment_datetime = timezone.datetime.combine(self.appointment_date, self.appointment_time)
-        return appointment_datetime > timezone.now()
+        if hasattr(self, 'upcoming_flag'):
+            return self.upcoming_flag
+        return self._appointment_datetime() > timezone.now()
     
     def is_past(self):
         """Check if appointment has passed"""
-        appointment_datetime = timezone.datetime.combine(self.appointment_date, self.appointment_time)
-        return appointment_datetime < timezone.now()
+        if hasattr(self, 'past_flag'):
+            return self.past_flag
+        return self._appointment_datetime() < timezone.now()
+
+
+class DoctorDaySlots(models.Model):
+    """Precomputed slot bitmap for one doctor on one day"""
+    doctor = models.ForeignKey(Doctor, on_delete=models.CASCADE, related_name='day_slots')
+    date = models.DateField()
+    
+    # Bit i set means the i-th slot of the day (see availability.SLOT_MINUTES) is booked
+    booked_mask = models.BigIntegerField(default=0)
+    is_full = models.BooleanField(default=False, help_text="No free slot left within working hours")
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ('doctor', 'date')
+        indexes = [models.Index(fields=['date', 'is_full'])]
+        verbose_name_plural = 'Doctor Day Slots'
+    
+    def __str__(self):
+        return f"Dr. {self.doctor.name} - {self.date}"
+
+
+class AppointmentCounters(models.Model):
+    """Per-user appointment counters maintained on every appointment write"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='appointment_counters')
+    
+    total = models.PositiveIntegerField(default=0)
+    completed = models.PositiveIntegerField(default=0)
+    cancelled = models.PositiveIntegerField(default=0)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name_plural = 'Appointment Counters'
+    
+    def __str__(self):
+        return f"{self.user.email} - {self.total} appointments"
+
+
+class JobCheckpoint(models.Model):
+    """Resume position of a long-running background job"""
+    name = models.CharField(max_length=100, unique=True)
+    position = models.BigIntegerField(default=0, help_text="Last processed primary key")
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.name} @ {self.position}"
 
 
 class Prescription(models.Model):
@@ -0,0 +1,11 @@
+from core.pagination import KeysetPagination
+
+
+class AppointmentPagination(KeysetPagination):
+    """Most recent appointments first"""
+    ordering = ('-appointment_date', '-appointment_time', '-id')
+
+
+class UpcomingAppointmentPagination(KeysetPagination):
+    """Soonest appointments first"""
+    ordering = ('appointment_date', 'appointment_time', 'id')
@@ -0,0 +1,74 @@
+"""
+Incremental doctor rating aggregates.
+
+Doctor keeps a running count and sum of appointment ratings. Every rating
+change is applied as a single UPDATE with database-side expressions, so its
+cost does not depend on how many appointments the doctor has and concurrent
+raters never overwrite each other's averages. Signals apply the change
+whenever an appointment's rating or doctor changes or a rated appointment is
+deleted, whichever view or the admin made it.
+"""
+from django.db.models import Case, Count, ExpressionWrapper, F, FloatField, Sum, Value, When
+from django.db.models.functions import Cast
+from django.db.models.lookups import GreaterThan
+
+from .models import Doctor, DoctorAppointment
+from . import directory_cache
+
+
+def apply_rating_change(doctor_id, old_rating, new_rating):
+    """Apply the change of one appointment's rating to its doctor's aggregates"""
+    count_delta = (new_rating is not None) - (old_rating is not None)
+    sum_delta = (new_rating or 0) - (old_rating or 0)
+    if not count_delta and not sum_delta:
+        return
+    
+    count = F('rating_count') + count_delta
+    total = F('rating_sum') + sum_delta
+    Doctor.objects.filter(pk=doctor_id).update(
+        rating_count=count,
+        rating_sum=total,
+        average_rating=Case(
+            When(GreaterThan(count, 0), then=ExpressionWrapper(
+                Cast(total, FloatField()) / Cast(count, FloatField()),
+                output_field=FloatField(),
+            )),
+            default=Value(0.0),
+            output_field=FloatField(),
+        ),
+    )
+    directory_cache.bump_directory_version()
+
+
+def rating_key(appointment):
+    """(doctor_id, rating) an appointment counts towards, or None if it counts for nothing"""
+    if appointment.doctor_id is None or appointment.rating is None:
+        return None
+    return appointment.doctor_id, appointment.rating
+
+
+def move_rating(old_key, new_key):
+    """Move one appointment's contribution from one rating key to another (either may be None)"""
+    if old_key == new_key:
+        return
+    old_doctor, old_rating = old_key or (None, None)
+    new_doctor, new_rating = new_key or (None, None)
+    if old_doctor == new_doctor:
+        apply_rating_change(old_doctor, old_rating, new_rating)
+        return
+    if old_key is not None:
+        apply_rating_change(old_doctor, old_rating, None)
+    if new_key is not None:
+        apply_rating_change(new_doctor, None, new_rating)
+
+
+def rating_aggregates(doctor_ids):
+    """{doctor_id: (count, sum)} computed from the appointments table"""
+    rows = (
+        DoctorAppointment.objects
+        .filter(doctor_id__in=doctor_ids, rating__isnull=False)
+        .values('doctor_id')
+        .annotate(count=Count('rating'), total=Sum('rating'))
+        .values_list('doctor_id', 'count', 'total')
+    )
+    return {doctor_id: (count, total) for doctor_id, count, total in rows}
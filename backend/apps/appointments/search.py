@@ -0,0 +1,230 @@
+"""
+Doctor search.
+
+On PostgreSQL, search runs as full-text search over a weighted tsvector of
+name, speciality, hospital and bio, backed by a GIN expression index that the
+database keeps current on every write. Other databases (SQLite in development
+and tests) use an in-process inverted index with the same prefix-aware, ranked
+semantics. The inverted index is updated from Doctor signals in this process
+once the change commits, and catches up with changes committed by other
+processes when the search version moves; that version is bumped only when a
+doctor's indexed text changes or a doctor is deleted, not on rating or
+schedule updates. Catching up reads only recently updated rows; doctors
+deleted elsewhere are dropped from results by the database lookup and purged
+from the index by a full rebuild at most every REBUILD_INTERVAL.
+"""
+import re
+import threading
+from bisect import bisect_left, insort
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import directory_cache
+from .models import Doctor
+
+FIELD_WEIGHTS = {'name': 4, 'speciality': 3, 'hospital': 2, 'bio': 1}
+INDEXED_FIELDS = tuple(FIELD_WEIGHTS)
+EXACT_MATCH_BONUS = 2
+SYNC_SLACK = timedelta(minutes=5)
+REBUILD_INTERVAL = timedelta(hours=1)
+
+_TOKEN_RE = re.compile(r'[^\W_]+')
+_SPECIALTY_LABELS = dict(Doctor.SPECIALTIES)
+
+
+def tokenize(text):
+    """Lower-cased word tokens of a text"""
+    return _TOKEN_RE.findall((text or '').lower())
+
+
+def _document(doctor):
+    """{term: weight} for a doctor row or dict"""
+    get = doctor.get if isinstance(doctor, dict) else lambda name: getattr(doctor, name)
+    fields = {
+        'name': get('name'),
+        'speciality': f"{get('speciality')} {_SPECIALTY_LABELS.get(get('speciality'), '')}",
+        'hospital': get('hospital'),
+        'bio': get('bio'),
+    }
+    terms = {}
+    for field, text in fields.items():
+        for term in tokenize(text):
+            terms[term] = max(terms.get(term, 0), FIELD_WEIGHTS[field])
+    return terms
+
+
+class InvertedIndex:
+    """In-process prefix-aware inverted index over the doctor directory"""
+
+    def __init__(self):
+        self.postings = {}
+        self.terms = []
+        self.doc_terms = {}
+        self.version = None
+        self.synced_at = None
+        self.built_at = None
+        self.lock = threading.RLock()
+
+    def add(self, doctor_id, document):
+        with self.lock:
+            self.remove(doctor_id)
+            for term, weight in document.items():
+                if term not in self.postings:
+                    self.postings[term] = {}
+                    insort(self.terms, term)
+                self.postings[term][doctor_id] = weight
+            self.doc_terms[doctor_id] = set(document)
+
+    def remove(self, doctor_id):
+        with self.lock:
+            for term in self.doc_terms.pop(doctor_id, ()):
+                postings = self.postings[term]
+                postings.pop(doctor_id, None)
+                if not postings:
+                    del self.postings[term]
+                    del self.terms[bisect_left(self.terms, term)]
+
+    def _prefix_matches(self, token):
+        start = bisect_left(self.terms, token)
+        for term in self.terms[start:]:
+            if not term.startswith(token):
+                break
+            yield term
+
+    def search(self, tokens):
+        """[(doctor_id, score)] matching every token, best first"""
+        with self.lock:
+            scores = None
+            for token in tokens:
+                token_scores = {}
+                for term in self._prefix_matches(token):
+                    bonus = EXACT_MATCH_BONUS if term == token else 1
+                    for doctor_id, weight in self.postings[term].items():
+                        token_scores[doctor_id] = max(token_scores.get(doctor_id, 0), weight * bonus)
+                if scores is None:
+                    scores = token_scores
+                else:
+                    scores = {
+                        doctor_id: score + token_scores[doctor_id]
+                        for doctor_id, score in scores.items() if doctor_id in token_scores
+                    }
+                if not scores:
+                    return []
+            return sorted((scores or {}).items(), key=lambda item: (-item[1], item[0]))
+
+    def sync(self):
+        """Catch up with doctor changes committed by any process since the last sync"""
+        version = directory_cache.search_version()
+        if version == self.version:
+            return
+        with self.lock:
+            started_at = timezone.now()
+            rows = Doctor.objects.values('id', *INDEXED_FIELDS)
+            if self.synced_at is None or started_at - self.built_at >= REBUILD_INTERVAL:
+                self.postings, self.terms, self.doc_terms = {}, [], {}
+                self.built_at = started_at
+            else:
+                rows = rows.filter(updated_at__gte=self.synced_at - SYNC_SLACK)
+            for row in rows.iterator(chunk_size=2000):
+                self.add(row['id'], _document(row))
+            self.version = version
+            self.synced_at = started_at
+
+
+index = InvertedIndex()
+
+
+def indexed_text(doctor):
+    """Loaded values of the indexed fields, without loading deferred ones"""
+    return tuple(doctor.__dict__.get(name) for name in INDEXED_FIELDS)
+
+
+def doctor_saved(doctor, created):
+    """Re-index a saved doctor once the transaction commits, if its indexed text changed"""
+    text = indexed_text(doctor)
+    if not created and text == getattr(doctor, '_indexed_text', None):
+        return
+    doctor._indexed_text = text
+    doctor_id, document = doctor.pk, _document(doctor)
+
+    def add():
+        if index.synced_at is not None:
+            index.add(doctor_id, document)
+
+    transaction.on_commit(add)
+    directory_cache.bump_search_version()
+
+
+def doctor_deleted(doctor_id):
+    """Drop a doctor from the index once the transaction commits"""
+    transaction.on_commit(lambda: index.remove(doctor_id))
+    directory_cache.bump_search_version()
+
+
+def uses_full_text_search():
+    return connection.vendor == 'postgresql'
+
+
+def search_vector():
+    """Weighted tsvector expression; must match the GIN index in migration 0007"""
+    from django.contrib.postgres.search import SearchVector
+
+    return (
+        SearchVector('name', weight='A', config='simple')
+        + SearchVector('speciality', weight='B', config='simple')
+        + SearchVector('hospital', weight='C', config='simple')
+        + SearchVector('bio', weight='D', config='simple')
+    )
+
+
+def _full_text_search(tokens, queryset):
+    from django.contrib.postgres.search import SearchQuery, SearchRank
+
+    query = SearchQuery(' & '.join(f'{token}:*' for token in tokens), search_type='raw', config='simple')
+    vector = search_vector()
+    return (
+        queryset.annotate(search=vector, rank=SearchRank(vector, query))
+        .filter(search=query)
+        .order_by('-rank', 'id')
+    )
+
+
+def _ranked_candidates(tokens, queryset, chunk_size):
+    index.sync()
+    ranked = [doctor_id for doctor_id, score in index.search(tokens)]
+    # Apply the queryset filters in the database, best candidates first
+    for start in range(0, len(ranked), chunk_size):
+        chunk = ranked[start:start + chunk_size]
+        found = queryset.in_bulk(chunk)
+        for doctor_id in chunk:
+            if doctor_id in found:
+                yield found[doctor_id]
+
+
+def search_doctors(text, queryset=None, accept=None, limit=50, chunk_size=500):
+    """
+    Doctors matching every word of ``text`` as a prefix, best match first.
+
+    ``queryset`` narrows the candidates in SQL; ``accept`` is an optional
+    per-doctor check for conditions that cannot be expressed in SQL.
+    """
+    if queryset is None:
+        queryset = Doctor.objects.all()
+    tokens = tokenize(text)
+    if not tokens:
+        return []
+
+    if uses_full_text_search():
+        candidates = _full_text_search(tokens, queryset).iterator(chunk_size=chunk_size)
+    else:
+        candidates = _ranked_candidates(tokens, queryset, chunk_size)
+
+    results = []
+    for doctor in candidates:
+        if accept is None or accept(doctor):
+            results.append(doctor)
+            if len(results) >= limit:
+                break
+    return results
@@ -1,5 +1,7 @@
 from rest_framework import serializers
+from django.utils import timezone
 from .models import Doctor, DoctorAppointment, Prescription
+from . import availability
 
 class DoctorSerializer(serializers.ModelSerializer):
     """Serializer for Doctor model"""
@@ -10,6 +12,21 @@ class DoctorSerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
 
 
+class DoctorSearchParamsSerializer(serializers.Serializer):
+    """Query parameters for doctor search"""
+    q = serializers.CharField()
+    specialty = serializers.ChoiceField(choices=Doctor.SPECIALTIES, required=False)
+    min_rating = serializers.FloatField(min_value=0, max_value=5, required=False)
+    available_on = serializers.DateField(required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+
+class DoctorSlotsSerializer(serializers.Serializer):
+    """Serializer for a doctor's free slots on one day"""
+    date = serializers.DateField()
+    slots = serializers.ListField(child=serializers.TimeField(format='%H:%M'))
+
+
 class PrescriptionSerializer(serializers.ModelSerializer):
     """Serializer for Prescription"""
     class Meta:
@@ -43,18 +60,58 @@ class DoctorAppointmentSerializer(serializers.ModelSerializer):
         return obj.is_past()
 
 
+def validate_slot(doctor, appointment_date, appointment_time, duration_minutes):
+    """Check that a slot is in the future and within the doctor's working hours"""
+    now = timezone.localtime()
+    if (appointment_date, appointment_time) <= (now.date(), now.time()):
+        raise serializers.ValidationError("Appointment must be in the future")
+    
+    mask = availability.appointment_mask(appointment_time, duration_minutes)
+    if availability.working_mask(doctor, appointment_date) & mask != mask:
+        raise serializers.ValidationError("Doctor is not available at this time")
+
+
 class DoctorAppointmentCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating appointments"""
     class Meta:
         model = DoctorAppointment
-        fields = ('doctor', 'appointment_type', 'appointment_date', 'appointment_time',
+        fields = ('id', 'doctor', 'appointment_type', 'appointment_date', 'appointment_time',
                   'reason_for_visit', 'patient_notes')
+        read_only_fields = ('id',)
+        extra_kwargs = {'doctor': {'required': True, 'allow_null': False}}
     
     def validate(self, data):
-        # Add additional validation if needed
+        duration = DoctorAppointment._meta.get_field('duration_minutes').get_default()
+        validate_slot(data['doctor'], data['appointment_date'], data['appointment_time'], duration)
         return data
 
 
+class AppointmentRescheduleSerializer(serializers.Serializer):
+    """Serializer for rescheduling an appointment"""
+    appointment_date = serializers.DateField()
+    appointment_time = serializers.TimeField()
+    
+    def validate(self, data):
+        appointment = self.context['appointment']
+        if appointment.doctor is None:
+            raise serializers.ValidationError("Appointment has no doctor")
+        validate_slot(appointment.doctor, data['appointment_date'], data['appointment_time'],
+                      appointment.duration_minutes)
+        return data
+
+
+class AppointmentRatingSerializer(serializers.Serializer):
+    """Serializer for rating an appointment; a null rating clears it"""
+    rating = serializers.IntegerField(min_value=1, max_value=5, allow_null=True, default=None)
+    review = serializers.CharField(allow_blank=True, default='')
+
+
+class AlternativeSlotSerializer(serializers.Serializer):
+    """Serializer for a suggested alternative slot"""
+    date = serializers.DateField()
+    time = serializers.TimeField(format='%H:%M')
+
+
 class AppointmentStatsSerializer(serializers.Serializer):
     """Serializer for appointment statistics"""
     total_appointments = serializers.IntegerField()
@@ -0,0 +1,112 @@
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from .models import Doctor, DoctorAppointment, DoctorScheduleException, DoctorWorkingHours
+from . import availability, counters, directory_cache, ratings, search
+
+
+@receiver(post_init, sender=DoctorAppointment)
+def remember_slot(sender, instance, **kwargs):
+    """Remember which slots and status the appointment had when it was loaded"""
+    instance._slot_key = availability.appointment_slot_key(instance) if instance.pk else None
+    instance._loaded_status = instance.status
+
+
+@receiver(post_save, sender=DoctorAppointment)
+def update_slots_on_save(sender, instance, created, **kwargs):
+    """Move the appointment's slots in the doctor-day bitmap"""
+    old_key = None if created else getattr(instance, '_slot_key', None)
+    new_key = availability.appointment_slot_key(instance)
+    if old_key != new_key:
+        availability.release(old_key)
+        availability.book(new_key)
+    instance._slot_key = new_key
+
+
+@receiver(post_delete, sender=DoctorAppointment)
+def update_slots_on_delete(sender, instance, **kwargs):
+    """Free the slots of a deleted appointment"""
+    availability.release(getattr(instance, '_slot_key', None))
+
+
+@receiver(post_init, sender=DoctorAppointment)
+def remember_rating(sender, instance, **kwargs):
+    """Remember which doctor the appointment's rating counted towards when it was loaded"""
+    instance._rating_key = ratings.rating_key(instance) if instance.pk else None
+
+
+@receiver(post_save, sender=DoctorAppointment)
+def update_ratings_on_save(sender, instance, created, **kwargs):
+    """Move the rating between doctors' aggregates when it or the doctor changes"""
+    old_key = None if created else getattr(instance, '_rating_key', None)
+    new_key = ratings.rating_key(instance)
+    ratings.move_rating(old_key, new_key)
+    instance._rating_key = new_key
+
+
+@receiver(post_delete, sender=DoctorAppointment)
+def update_ratings_on_delete(sender, instance, **kwargs):
+    """Take a deleted appointment's rating out of its doctor's aggregates"""
+    ratings.move_rating(getattr(instance, '_rating_key', None), None)
+
+
+@receiver(post_save, sender=DoctorAppointment)
+def update_counters_on_save(sender, instance, created, **kwargs):
+    """Keep the user's appointment counters in step with status changes"""
+    if counters.enabled():
+        deltas = counters.status_deltas(instance._loaded_status, instance.status, created=created)
+        counters.apply(instance.user_id, deltas)
+    instance._loaded_status = instance.status
+
+
+@receiver(post_delete, sender=DoctorAppointment)
+def update_counters_on_delete(sender, instance, **kwargs):
+    """Remove a deleted appointment from the user's counters"""
+    if counters.enabled():
+        deltas = counters.status_deltas(instance._loaded_status, None, deleted=True)
+        # Never create a row here: the user itself may be being deleted
+        counters.apply(instance.user_id, deltas, create=False)
+
+
+@receiver(post_save, sender=Doctor)
+def update_slots_on_schedule_change(sender, instance, created, **kwargs):
+    """Re-evaluate full days when a doctor's working hours change"""
+    if not created:
+        availability.refresh_doctor(instance, since=timezone.now().date())
+
+
+@receiver(post_save, sender=DoctorWorkingHours)
+@receiver(post_delete, sender=DoctorWorkingHours)
+@receiver(post_save, sender=DoctorScheduleException)
+@receiver(post_delete, sender=DoctorScheduleException)
+def update_slots_on_schedule_entry_change(sender, instance, **kwargs):
+    """Re-evaluate full days and cached pages when weekly hours or exceptions change"""
+    doctor = Doctor.objects.filter(pk=instance.doctor_id).first()
+    if doctor is not None:
+        availability.refresh_doctor(doctor, since=timezone.now().date())
+    directory_cache.bump_directory_version()
+
+
+@receiver(post_save, sender=Doctor)
+@receiver(post_delete, sender=Doctor)
+def invalidate_directory_cache(sender, instance, **kwargs):
+    """Drop cached directory pages when any doctor changes"""
+    directory_cache.bump_directory_version()
+
+
+@receiver(post_init, sender=Doctor)
+def remember_indexed_text(sender, instance, **kwargs):
+    """Remember the indexed text the doctor had when it was loaded"""
+    instance._indexed_text = search.indexed_text(instance) if instance.pk else None
+
+
+@receiver(post_save, sender=Doctor)
+def update_search_index(sender, instance, created, **kwargs):
+    """Re-index the doctor if its indexed text changed"""
+    search.doctor_saved(instance, created)
+
+
+@receiver(post_delete, sender=Doctor)
+def remove_from_search_index(sender, instance, **kwargs):
+    """Drop the doctor from the search index"""
+    search.doctor_deleted(instance.pk)
@@ -0,0 +1,213 @@
+import random
+import threading
+from datetime import time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TransactionTestCase, skipUnlessDBFeature
+from django.utils import timezone
+from rest_framework.test import APIClient, APITestCase
+
+from . import availability
+from .models import Doctor, DoctorAppointment, Prescription
+
+User = get_user_model()
+
+# Abbreviated to fit Doctor.available_days (50 characters)
+EVERY_DAY = 'Mon,Tue,Wed,Thu,Fri,Sat,Sun'
+
+
+class AppointmentListQueryCountTests(APITestCase):
+    """Appointment listings run a fixed number of queries whatever the page size"""
+
+    # One query for the page (doctor joined), one for the prescriptions prefetch
+    LIST_QUERIES = 2
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='patient@example.com', email='patient@example.com')
+        cls.doctors = [
+            Doctor.objects.create(
+                name=f'Doctor {i}', email=f'doctor{i}@example.com', phone='0', speciality='cardiology',
+                available_days=EVERY_DAY,
+            )
+            for i in range(3)
+        ]
+        today = timezone.localdate()
+        for i in range(12):
+            day = today + timedelta(days=i + 1) if i % 2 else today - timedelta(days=i + 1)
+            appointment = DoctorAppointment.objects.create(
+                user=cls.user, doctor=cls.doctors[i % 3], appointment_date=day,
+                appointment_time=time(9 + i % 8), reason_for_visit='Checkup',
+            )
+            for n in range(2):
+                Prescription.objects.create(
+                    appointment=appointment, medication_name=f'Medication {n}',
+                    dosage='5mg', frequency='Daily', duration='7 days',
+                )
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def assert_fixed_queries(self, url, page_sizes=(1, 3, 10)):
+        for page_size in page_sizes:
+            with self.subTest(page_size=page_size):
+                with self.assertNumQueries(self.LIST_QUERIES):
+                    response = self.client.get(url, {'page_size': page_size})
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.data['results'])
+                for item in response.data['results']:
+                    self.assertEqual(len(item['prescriptions']), 2)
+
+    def test_list(self):
+        self.assert_fixed_queries('/api/appointments/')
+
+    def test_upcoming(self):
+        self.assert_fixed_queries('/api/appointments/upcoming/')
+
+    def test_past(self):
+        self.assert_fixed_queries('/api/appointments/past/')
+
+    def test_next_page(self):
+        first = self.client.get('/api/appointments/', {'page_size': 3})
+        with self.assertNumQueries(self.LIST_QUERIES):
+            response = self.client.get(first.data['next'])
+        self.assertEqual(len(response.data['results']), 3)
+
+    def test_detail(self):
+        appointment = DoctorAppointment.objects.filter(user=self.user).first()
+        with self.assertNumQueries(self.LIST_QUERIES):
+            response = self.client.get(f'/api/appointments/{appointment.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['doctor_name'], appointment.doctor.name)
+        self.assertEqual(len(response.data['prescriptions']), 2)
+
+
+
+class DoctorRatingAggregateTests(APITestCase):
+    """Doctor rating aggregates follow rating changes, deletions and doctor changes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='patient@example.com', email='patient@example.com')
+        cls.doctors = [
+            Doctor.objects.create(
+                name=f'Doctor {i}', email=f'doctor{i}@example.com', phone='0', speciality='cardiology',
+                available_days=EVERY_DAY,
+            )
+            for i in range(2)
+        ]
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+        day = timezone.localdate() - timedelta(days=1)
+        self.appointments = [
+            DoctorAppointment.objects.create(
+                user=self.user, doctor=self.doctors[0], appointment_date=day,
+                appointment_time=time(9 + i), reason_for_visit='Checkup',
+            )
+            for i in range(2)
+        ]
+
+    def rate(self, appointment, rating):
+        response = self.client.post(f'/api/appointments/{appointment.pk}/rate/', {'rating': rating}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def assert_aggregates(self, doctor, count, total, average):
+        doctor.refresh_from_db()
+        self.assertEqual((doctor.rating_count, doctor.rating_sum), (count, total))
+        self.assertAlmostEqual(doctor.average_rating, average)
+
+    def test_rate_and_rerate(self):
+        self.rate(self.appointments[0], 4)
+        self.rate(self.appointments[1], 5)
+        self.rate(self.appointments[0], 2)
+        self.assert_aggregates(self.doctors[0], 2, 7, 3.5)
+        self.rate(self.appointments[1], None)
+        self.assert_aggregates(self.doctors[0], 1, 2, 2.0)
+
+    def test_delete_rated_appointment(self):
+        self.rate(self.appointments[0], 4)
+        self.rate(self.appointments[1], 5)
+        response = self.client.delete(f'/api/appointments/{self.appointments[1].pk}/')
+        self.assertEqual(response.status_code, 204)
+        self.assert_aggregates(self.doctors[0], 1, 4, 4.0)
+        DoctorAppointment.objects.get(pk=self.appointments[0].pk).delete()
+        self.assert_aggregates(self.doctors[0], 0, 0, 0.0)
+
+    def test_change_doctor_of_rated_appointment(self):
+        self.rate(self.appointments[0], 4)
+        self.rate(self.appointments[1], 2)
+        appointment = DoctorAppointment.objects.get(pk=self.appointments[0].pk)
+        appointment.doctor = self.doctors[1]
+        appointment.save()
+        self.assert_aggregates(self.doctors[0], 1, 2, 2.0)
+        self.assert_aggregates(self.doctors[1], 1, 4, 4.0)
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ConcurrentBookingTests(TransactionTestCase):
+    """Bookings and reschedules racing from many threads never share a slot"""
+
+    THREADS = 12
+    REQUESTS = 15
+    START_TIMES = (time(9), time(9, 30), time(10), time(10, 30), time(11))
+
+    def setUp(self):
+        self.doctor = Doctor.objects.create(
+            name='Doctor', email='doctor@example.com', phone='0', speciality='cardiology',
+            available_days=EVERY_DAY,
+            start_time=time(9), end_time=time(17),
+        )
+        self.users = [
+            User.objects.create_user(username=f'patient{i}@example.com', email=f'patient{i}@example.com')
+            for i in range(self.THREADS)
+        ]
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        self.days = [tomorrow, tomorrow + timedelta(days=1)]
+
+    def _patient(self, user, barrier, statuses, errors):
+        client = APIClient()
+        client.force_authenticate(user)
+        rng = random.Random(user.pk)
+        booked = []
+        try:
+            barrier.wait()
+            for _ in range(self.REQUESTS):
+                slot = {
+                    'appointment_date': rng.choice(self.days).isoformat(),
+                    'appointment_time': rng.choice(self.START_TIMES).strftime('%H:%M'),
+                }
+                if booked and rng.random() < 0.4:
+                    response = client.post(f'/api/appointments/{rng.choice(booked)}/reschedule/', slot, format='json')
+                else:
+                    response = client.post('/api/appointments/', {
+                        'doctor': self.doctor.pk, 'appointment_type': 'in_person', 'reason_for_visit': 'Checkup', **slot,
+                    }, format='json')
+                    if response.status_code == 201:
+                        booked.append(response.data['id'])
+                statuses.append(response.status_code)
+        except Exception as error:
+            errors.append(error)
+        finally:
+            connection.close()
+
+    def test_no_double_booking(self):
+        barrier = threading.Barrier(self.THREADS)
+        statuses, errors = [], []
+        threads = [
+            threading.Thread(target=self._patient, args=(user, barrier, statuses, errors))
+            for user in self.users
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertLessEqual(set(statuses), {200, 201, 409})
+        self.assertIn(409, statuses)
+        overlaps, mismatched, active = availability.booking_conflicts(self.doctor.pk)
+        self.assertEqual((overlaps, mismatched), (0, 0))
+        self.assertEqual(active, DoctorAppointment.objects.filter(doctor=self.doctor).count())
+        self.assertGreater(active, 0)
@@ -2,13 +2,40 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.db import transaction
+from django.http import HttpResponseNotFound, StreamingHttpResponse
+from django.urls import reverse
 from django.utils import timezone
+from django.views.decorators.http import condition, require_GET
+from django.utils.dateparse import parse_date, parse_time
 from datetime import timedelta
 from .models import Doctor, DoctorAppointment, Prescription
 from .serializers import (
     DoctorSerializer, DoctorAppointmentSerializer, DoctorAppointmentCreateSerializer,
-    PrescriptionSerializer, AppointmentStatsSerializer
+    PrescriptionSerializer, AppointmentStatsSerializer, DoctorSlotsSerializer,
+    AppointmentRescheduleSerializer, AlternativeSlotSerializer, AppointmentRatingSerializer,
+    DoctorSearchParamsSerializer
 )
+from .pagination import AppointmentPagination, UpcomingAppointmentPagination
+from . import availability, booking, counters, directory_cache, ical, search
+
+MAX_SLOT_RANGE_DAYS = 31
+
+
+def _parse_date_param(value):
+    """Parse a YYYY-MM-DD query parameter, returning None when missing or invalid"""
+    try:
+        return parse_date(value) if value else None
+    except ValueError:
+        return None
+
+
+def _parse_time_param(value):
+    """Parse a HH:MM query parameter, returning None when missing or invalid"""
+    try:
+        return parse_time(value) if value else None
+    except ValueError:
+        return None
 
 class DoctorViewSet(viewsets.ReadOnlyModelViewSet):
     """ViewSet for Doctor model (read-only)"""
@@ -16,6 +43,10 @@ class DoctorViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = DoctorSerializer
     permission_classes = [IsAuthenticated]
     
+    def list(self, request, *args, **kwargs):
+        parent_list = super().list
+        return directory_cache.cached_response(request, 'list', lambda: parent_list(request, *args, **kwargs))
+    
     @action(detail=False, methods=['get'])
     def by_specialty(self, request):
         """Get doctors by specialty"""
@@ -24,62 +55,136 @@ class DoctorViewSet(viewsets.ReadOnlyModelViewSet):
             return Response({'detail': 'specialty parameter required'}, 
                           status=status.HTTP_400_BAD_REQUEST)
         
-        doctors = Doctor.objects.filter(speciality=specialty)
-        serializer = self.get_serializer(doctors, many=True)
-        return Response(serializer.data)
+        def build():
+            doctors = Doctor.objects.filter(speciality=specialty)
+            page = self.paginate_queryset(doctors)
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        
+        return directory_cache.cached_response(request, 'by_specialty', build)
     
     @action(detail=False, methods=['get'])
     def available(self, request):
-        """Get available doctors"""
-        today = timezone.now().date()
-        day_name = today.strftime('%A')
+        """Get doctors with a free slot on a date (defaults to today), optionally between start and end"""
+        day = timezone.now().date()
+        if request.query_params.get('date'):
+            day = _parse_date_param(request.query_params['date'])
+            if day is None:
+                return Response({'detail': 'date must be in YYYY-MM-DD format'},
+                              status=status.HTTP_400_BAD_REQUEST)
+        
+        start, end = request.query_params.get('start'), request.query_params.get('end')
+        if start or end:
+            start, end = _parse_time_param(start), _parse_time_param(end)
+            if start is None or end is None or end <= start:
+                return Response({'detail': 'start and end must be given together as HH:MM, with start before end'},
+                              status=status.HTTP_400_BAD_REQUEST)
+        
+        specialty = request.query_params.get('specialty')
+        
+        def build():
+            doctors = Doctor.objects.all()
+            if specialty:
+                doctors = doctors.filter(speciality=specialty)
+            available_doctors = availability.doctors_with_free_slot(day, doctors, start, end)
+            serializer = self.get_serializer(available_doctors, many=True)
+            return Response(serializer.data)
+        
+        versions = (directory_cache.slots_version(day),)
+        if start is not None:
+            # A booking can fill the window without filling the day
+            versions += (directory_cache.bookings_version(day),)
+        return directory_cache.cached_response(request, f'available:{day.isoformat()}', build,
+                                               versions=versions)
+    
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Ranked prefix search over name, hospital, bio and speciality"""
+        params = DoctorSearchParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        filters = params.validated_data
         
         doctors = Doctor.objects.all()
-        available_doctors = [d for d in doctors if day_name in d.available_days]
+        if filters.get('specialty'):
+            doctors = doctors.filter(speciality=filters['specialty'])
+        if filters.get('min_rating') is not None:
+            doctors = doctors.filter(average_rating__gte=filters['min_rating'])
+        
+        day = filters.get('available_on')
+        if day:
+            doctors = availability.doctors_with_free_slot(day, doctors)
         
-        serializer = self.get_serializer(available_doctors, many=True)
+        results = search.search_doctors(filters['q'], doctors, limit=filters['limit'])
+        serializer = self.get_serializer(results, many=True)
+        return Response(serializer.data)
+    
+    @action(detail=True, methods=['get'])
+    def slots(self, request, pk=None):
+        """Get a doctor's free slots between two dates"""
+        doctor = self.get_object()
+        today = timezone.now().date()
+        start = _parse_date_param(request.query_params.get('start')) or today
+        end = _parse_date_param(request.query_params.get('end')) or start + timedelta(days=6)
+        
+        if end < start:
+            return Response({'detail': 'end must not be before start'},
+                          status=status.HTTP_400_BAD_REQUEST)
+        if (end - start).days >= MAX_SLOT_RANGE_DAYS:
+            return Response({'detail': f'date range is limited to {MAX_SLOT_RANGE_DAYS} days'},
+                          status=status.HTTP_400_BAD_REQUEST)
+        
+        days = availability.free_slots(doctor, max(start, today), end)
+        serializer = DoctorSlotsSerializer(days, many=True)
         return Response(serializer.data)
 
 
 class DoctorAppointmentViewSet(viewsets.ModelViewSet):
     """ViewSet for Doctor Appointments"""
     permission_classes = [IsAuthenticated]
+    pagination_class = AppointmentPagination
     
     def get_queryset(self):
-        return DoctorAppointment.objects.filter(user=self.request.user)
+        return DoctorAppointment.objects.filter(user=self.request.user).for_serializer()
     
     def get_serializer_class(self):
         if self.action == 'create':
             return DoctorAppointmentCreateSerializer
         return DoctorAppointmentSerializer
     
-    def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            booking.book(serializer, user=request.user)
+        except booking.SlotUnavailable as exc:
+            return self._slot_conflict(exc)
+        headers = self.get_success_headers(serializer.data)
+        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
     
-    @action(detail=False, methods=['get'])
+    def _slot_conflict(self, exc):
+        """409 response listing alternative slots"""
+        return Response({
+            'detail': str(exc),
+            'alternatives': AlternativeSlotSerializer(exc.alternatives, many=True).data,
+        }, status=status.HTTP_409_CONFLICT)
+    
+    @action(detail=False, methods=['get'], pagination_class=UpcomingAppointmentPagination)
     def upcoming(self, request):
         """Get upcoming appointments"""
-        today = timezone.now().date()
-        appointments = DoctorAppointment.objects.filter(
-            user=request.user,
-            appointment_date__gte=today,
-            status__in=['scheduled', 'rescheduled']
-        ).order_by('appointment_date', 'appointment_time')
+        appointments = DoctorAppointment.objects.filter(user=request.user).upcoming().for_serializer()
         
-        serializer = DoctorAppointmentSerializer(appointments, many=True)
-        return Response(serializer.data)
+        page = self.paginate_queryset(appointments)
+        serializer = DoctorAppointmentSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
     
     @action(detail=False, methods=['get'])
     def past(self, request):
         """Get past appointments"""
-        today = timezone.now().date()
-        appointments = DoctorAppointment.objects.filter(
-            user=request.user,
-            appointment_date__lt=today
-        ).order_by('-appointment_date', '-appointment_time')
+        appointments = DoctorAppointment.objects.filter(user=request.user).past().for_serializer()
         
-        serializer = DoctorAppointmentSerializer(appointments, many=True)
-        return Response(serializer.data)
+        page = self.paginate_queryset(appointments)
+        serializer = DoctorAppointmentSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
     
     @action(detail=True, methods=['post'])
     def cancel(self, request, pk=None):
@@ -94,11 +199,19 @@ class DoctorAppointmentViewSet(viewsets.ModelViewSet):
     def reschedule(self, request, pk=None):
         """Reschedule appointment"""
         appointment = self.get_object()
-        appointment.appointment_date = request.data.get('appointment_date', appointment.appointment_date)
-        appointment.appointment_time = request.data.get('appointment_time', appointment.appointment_time)
-        appointment.status = 'rescheduled'
-        appointment.save()
-        serializer = self.get_serializer(appointment)
+        serializer = AppointmentRescheduleSerializer(data={
+            'appointment_date': request.data.get('appointment_date', appointment.appointment_date),
+            'appointment_time': request.data.get('appointment_time', appointment.appointment_time),
+        }, context={'appointment': appointment})
+        serializer.is_valid(raise_exception=True)
+        
+        try:
+            booking.reschedule(appointment, serializer.validated_data['appointment_date'],
+                               serializer.validated_data['appointment_time'])
+        except booking.SlotUnavailable as exc:
+            return self._slot_conflict(exc)
+        # Reload so the timing annotations reflect the new slot
+        serializer = self.get_serializer(self.get_object())
         return Response(serializer.data)
     
     @action(detail=True, methods=['post'])
@@ -115,35 +228,69 @@ class DoctorAppointmentViewSet(viewsets.ModelViewSet):
     def rate(self, request, pk=None):
         """Rate appointment"""
         appointment = self.get_object()
-        appointment.rating = request.data.get('rating')
-        appointment.review = request.data.get('review', '')
-        appointment.save()
+        serializer = AppointmentRatingSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
         
-        # Update doctor's average rating
-        doctor = appointment.doctor
-        all_ratings = [a.rating for a in doctor.appointments.all() if a.rating]
-        if all_ratings:
-            doctor.average_rating = sum(all_ratings) / len(all_ratings)
-            doctor.save()
+        with transaction.atomic():
+            # Lock the appointment so the previous rating the save signal subtracts is the one stored
+            appointment = DoctorAppointment.objects.select_for_update().get(pk=appointment.pk)
+            appointment.rating = serializer.validated_data.get('rating')
+            appointment.review = serializer.validated_data.get('review', '')
+            appointment.save(update_fields=['rating', 'review', 'updated_at'])
         
         serializer = self.get_serializer(appointment)
         return Response(serializer.data)
     
+    @action(detail=False, methods=['get'])
+    def calendar_link(self, request):
+        """Get the private iCalendar feed URL for the current user"""
+        url = reverse('appointment_calendar') + f'?token={ical.make_token(request.user)}'
+        return Response({'url': request.build_absolute_uri(url)})
+    
     @action(detail=False, methods=['get'])
     def stats(self, request):
         """Get appointment statistics"""
-        today = timezone.now().date()
-        appointments = DoctorAppointment.objects.filter(user=request.user)
-        
-        stats_data = {
-            'total_appointments': appointments.count(),
-            'completed_appointments': appointments.filter(status='completed').count(),
-            'upcoming_appointments': appointments.filter(
-                appointment_date__gte=today,
-                status__in=['scheduled', 'rescheduled']
-            ).count(),
-            'cancelled_appointments': appointments.filter(status='cancelled').count(),
-        }
+        stats_data = counters.read(request.user.id) if counters.enabled() else None
+        if stats_data is None:
+            stats_data = DoctorAppointment.objects.filter(user=request.user).stats()
         
         serializer = AppointmentStatsSerializer(stats_data)
         return Response(serializer.data)
+
+
+def _calendar_state(request):
+    """Feed state for the request's token, computed once per request"""
+    if not hasattr(request, '_calendar_state'):
+        user_id = ical.read_token(request.GET.get('token'))
+        request._calendar_state = (user_id, ical.feed_state(user_id) if user_id else None)
+    return request._calendar_state
+
+
+def _calendar_etag(request):
+    user_id, state = _calendar_state(request)
+    if state is None:
+        return None
+    last_modified, count = state
+    stamp = last_modified.isoformat() if last_modified else ''
+    return f'{user_id}:{count}:{stamp}'
+
+
+def _calendar_last_modified(request):
+    user_id, state = _calendar_state(request)
+    return state[0] if state else None
+
+
+@require_GET
+@condition(etag_func=_calendar_etag, last_modified_func=_calendar_last_modified)
+def appointment_calendar_feed(request):
+    """iCalendar feed of a user's appointments, addressed by a signed token"""
+    user_id, state = _calendar_state(request)
+    if user_id is None:
+        return HttpResponseNotFound('Unknown calendar')
+    response = StreamingHttpResponse(
+        ical.stream_feed(user_id, request.get_host().split(':')[0]),
+        content_type='text/calendar; charset=utf-8',
+    )
+    response['Content-Disposition'] = 'inline; filename="appointments.ics"'
+    response['Cache-Control'] = 'private, no-cache'
+    return response
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import DailyCheckIn, HealthGoal, HealthMetric
+from .models import CheckInSummary, DailyCheckIn, HealthGoal, HealthMetric
 
 @admin.register(DailyCheckIn)
 class DailyCheckInAdmin(admin.ModelAdmin):
@@ -20,3 +20,9 @@ class HealthMetricAdmin(admin.ModelAdmin):
     list_filter = ('metric_type', 'recorded_at')
     search_fields = ('user__email',)
     date_hierarchy = 'recorded_at'
+
+@admin.register(CheckInSummary)
+class CheckInSummaryAdmin(admin.ModelAdmin):
+    list_display = ('user', 'current_streak', 'longest_streak', 'total_checkins', 'last_check_in_date')
+    search_fields = ('user__email',)
+    readonly_fields = ('calendar',)
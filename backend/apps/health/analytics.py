@@ -0,0 +1,145 @@
+"""
+Check-in analytics computed in the database.
+
+Every figure is derived from one grouped aggregate: per-bucket counts, sums
+and per-choice counts for mood and energy. Averages, distributions and modes
+for the whole window are then combined from the bucket rows, whose number is
+bounded by the window and granularity rather than by the number of check-ins.
+
+Mood and energy are stored as ordinals, so their means are true averages of
+the 1-5 scale, and percentiles are exact reads of the per-choice counts.
+"""
+from datetime import date, timedelta
+
+from django.db.models import Count, DateField, Q, Sum
+from django.db.models.functions import Trunc
+
+from .models import DailyCheckIn
+
+GRANULARITIES = ('day', 'week', 'month')
+MAX_BUCKETS = 400
+
+SUM_FIELDS = ('sleep_hours', 'exercise_minutes', 'water_intake', 'meals_logged')
+DISTRIBUTIONS = {
+    'mood': DailyCheckIn.MOOD_ORDINALS,
+    'energy_level': DailyCheckIn.ENERGY_ORDINALS,
+}
+PERCENTILES = (25, 50, 75, 90)
+
+
+def bucket_start(day, granularity):
+    """First day of the bucket containing ``day``"""
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(day, granularity):
+    if granularity == 'week':
+        return day + timedelta(days=7)
+    if granularity == 'month':
+        return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+    return day + timedelta(days=1)
+
+
+def bucket_count(start, end, granularity):
+    """Number of buckets between two dates (inclusive)"""
+    if granularity == 'week':
+        return (bucket_start(end, 'week') - bucket_start(start, 'week')).days // 7 + 1
+    if granularity == 'month':
+        return (end.year - start.year) * 12 + end.month - start.month + 1
+    return (end - start).days + 1
+
+
+def _aggregates():
+    aggregates = {'checkins': Count('id')}
+    for field in SUM_FIELDS:
+        aggregates[f'total_{field}'] = Sum(field)
+    for field, ordinals in DISTRIBUTIONS.items():
+        aggregates[f'total_{field}'] = Sum(field)
+        for choice, ordinal in ordinals.items():
+            aggregates[f'{field}:{choice}'] = Count('id', filter=Q(**{field: ordinal}))
+    return aggregates
+
+
+def _mode(distribution):
+    """Most frequent choice; ties go to the earlier choice"""
+    best = max(distribution.items(), key=lambda item: item[1], default=(None, 0))
+    return best[0] if best[1] else None
+
+
+def percentile(distribution, percent):
+    """Choice at the given percentile (nearest rank) of an ordered distribution"""
+    total = sum(distribution.values())
+    if not total:
+        return None
+    rank = max(1, -(-total * percent // 100))
+    seen = 0
+    for choice, count in distribution.items():
+        seen += count
+        if seen >= rank:
+            return choice
+
+
+def _shape(row):
+    """Turn a flat aggregate row into totals, averages, distributions and modes"""
+    checkins = row['checkins'] or 0
+    result = {'checkins': checkins}
+    for field in SUM_FIELDS:
+        total = row[f'total_{field}'] or 0
+        result[f'total_{field}'] = total
+        result[f'average_{field}'] = round(total / checkins, 2) if checkins else None
+    for field, ordinals in DISTRIBUTIONS.items():
+        distribution = {choice: row[f'{field}:{choice}'] for choice in ordinals}
+        result[f'average_{field}'] = round((row[f'total_{field}'] or 0) / checkins, 2) if checkins else None
+        result[f'{field}_distribution'] = distribution
+        result[f'{field}_mode'] = _mode(distribution)
+        result[f'{field}_percentiles'] = {f'p{p}': percentile(distribution, p) for p in PERCENTILES}
+    return result
+
+
+def _combine(rows):
+    """Add flat aggregate rows together"""
+    keys = list(_aggregates())
+    total = dict.fromkeys(keys, 0)
+    for row in rows:
+        for key in keys:
+            total[key] += row[key] or 0
+    return total
+
+
+def summary(queryset):
+    """Totals, averages, distributions and modes of a check-in queryset in one query"""
+    return _shape(queryset.order_by().aggregate(**_aggregates()))
+
+
+def analyze(queryset, start, end, granularity='day'):
+    """
+    Summary and a gap-free bucketed series of check-ins between two dates
+    (inclusive), computed with a single grouped query.
+    """
+    rows = (
+        queryset.filter(check_in_date__range=(start, end))
+        .annotate(period=Trunc('check_in_date', granularity, output_field=DateField()))
+        .values('period')
+        .annotate(**_aggregates())
+        .order_by('period')
+    )
+    by_period = {row['period']: row for row in rows}
+
+    empty = dict.fromkeys(_aggregates(), 0)
+    series = []
+    period = bucket_start(start, granularity)
+    while period <= end:
+        series.append({'period': period, **_shape(by_period.get(period, empty))})
+        period = next_bucket(period, granularity)
+
+    return {
+        'from': start,
+        'to': end,
+        'granularity': granularity,
+        'summary': _shape(_combine(by_period.values())),
+        'series': series,
+    }
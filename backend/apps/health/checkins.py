@@ -0,0 +1,74 @@
+"""
+Single-statement upsert of a user's check-in for today.
+
+Check-ins are unique per (user, check_in_date), so storing today's check-in
+is one ``INSERT ... ON CONFLICT DO UPDATE ... RETURNING`` statement
+(PostgreSQL, SQLite 3.35+) instead of a lookup followed by a create or an
+update. Concurrent submissions cannot fail with an integrity error; the last
+one wins.
+
+The derived state is updated in the same transaction, without savepoints:
+one query locks the user's goals following check-in fields and one update
+per such goal, plus, for a fresh insert only, the streak summary (a locking
+read and a write). Replacing a check-in of a user without such goals is
+therefore the upsert and one goal lookup.
+"""
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import DailyCheckIn
+from . import goals, streaks
+
+# Fields replaced by a submission; the rest keep the values of the first insert
+UPSERT_FIELDS = (
+    'mood', 'energy_level', 'sleep_hours', 'exercise_minutes', 'water_intake',
+    'notes', 'symptoms', 'meals_logged', 'updated_at',
+)
+
+
+def _upsert_sql():
+    opts = DailyCheckIn._meta
+    quote = connection.ops.quote_name
+    columns = [field.column for field in opts.concrete_fields if not field.primary_key]
+    updates = [opts.get_field(name).column for name in UPSERT_FIELDS]
+    key = [opts.get_field(name).column for name in ('user', 'check_in_date')]
+    returning = [field.column for field in opts.concrete_fields]
+    return (
+        f'INSERT INTO {quote(opts.db_table)} ({", ".join(map(quote, columns))}) '
+        f'VALUES ({", ".join(["%s"] * len(columns))}) '
+        f'ON CONFLICT ({", ".join(map(quote, key))}) DO UPDATE SET '
+        f'{", ".join(f"{quote(column)} = EXCLUDED.{quote(column)}" for column in updates)} '
+        f'RETURNING {", ".join(map(quote, returning))}'
+    )
+
+
+def upsert_today(user, data):
+    """
+    (check-in, created) after storing ``data`` as the user's check-in for today.
+
+    ``data`` is validated serializer data; fields it leaves out are reset to
+    their defaults, as a PUT replaces the whole check-in.
+    """
+    now = timezone.now()
+    values = {
+        field.attname: field.get_default()
+        for field in DailyCheckIn._meta.concrete_fields if not field.primary_key
+    }
+    values.update(data)
+    values.update(user_id=user.pk, check_in_date=timezone.localdate(now), created_at=now, updated_at=now)
+
+    params = [
+        field.get_db_prep_save(values[field.attname], connection)
+        for field in DailyCheckIn._meta.concrete_fields if not field.primary_key
+    ]
+    with transaction.atomic():
+        # raw() applies the database converters to the returned row
+        checkin = list(DailyCheckIn.objects.raw(_upsert_sql(), params))[0]
+        # An existing row keeps its created_at, so only a fresh insert has both timestamps equal
+        created = checkin.created_at == checkin.updated_at
+        # Raw SQL sends no post_save, so keep the streak summary and goals current here;
+        # a replaced check-in leaves the days checked in, and so the streaks, unchanged
+        if created:
+            streaks.record(user.pk, checkin.check_in_date)
+        goals.apply_checkin(checkin)
+    return checkin, created
@@ -0,0 +1,250 @@
+"""
+Automatic progress of structured health goals.
+
+A goal with a ``target_metric`` keeps running per-day sums and counts of that
+metric over its window, plus the latest value, in ``window_state``. New
+check-ins and readings are folded in without reading history: only active
+goals of the user that follow one of the changed metrics are loaded, and each
+is updated from the new values alone. Goals are recomputed from the (window
+bounded) history when their target changes, when a reading is edited or
+deleted, or when a check-in is deleted.
+"""
+import re
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import DailyCheckIn, HealthGoal, HealthMetric
+from .units import CANONICAL_UNITS
+
+CHECKIN_TARGETS = ('sleep_hours', 'exercise_minutes', 'water_intake', 'meals_logged', 'mood', 'energy_level')
+
+
+def _window_start(goal, today):
+    return today - timedelta(days=goal.target_window_days - 1)
+
+
+def _moment_key(moment):
+    """Sortable key of when a value was recorded: a date or a UTC datetime"""
+    if isinstance(moment, datetime):
+        return moment.astimezone(dt_timezone.utc).isoformat()
+    return moment.isoformat()
+
+
+def _prune(goal, today):
+    start = _window_start(goal, today).isoformat()
+    days = goal.window_state.setdefault('days', {})
+    for day in [day for day in days if day < start]:
+        del days[day]
+    return days
+
+
+def _add(goal, day, moment, value, today, replace=False):
+    """Fold one value into the window; ``replace`` sets the day's value instead of adding to it"""
+    days = _prune(goal, today)
+    key = day.isoformat()
+    if _window_start(goal, today) <= day <= today:
+        total, count = days.get(key, (0, 0))
+        days[key] = [value, 1] if replace else [total + value, count + 1]
+    latest = goal.window_state.get('latest')
+    if latest is None or _moment_key(moment) >= latest[1]:
+        goal.window_state['latest'] = [value, _moment_key(moment)]
+
+
+def recompute(goal, today=None):
+    """Rebuild the goal's window state from the stored check-ins or readings"""
+    today = today or timezone.localdate()
+    start = _window_start(goal, today)
+    goal.window_state = {'days': {}}
+    metric = goal.target_metric
+    if metric in CHECKIN_TARGETS:
+        checkins = DailyCheckIn.objects.filter(user_id=goal.user_id)
+        rows = (
+            (day, day, value)
+            for day, value in checkins.filter(check_in_date__gte=start).values_list('check_in_date', metric)
+        )
+        latest = checkins.order_by('-check_in_date').values_list('check_in_date', metric).first()
+    else:
+        readings = HealthMetric.objects.filter(
+            user_id=goal.user_id, metric_type=metric,
+            unit_normalized=CANONICAL_UNITS[metric], value_primary__isnull=False,
+        )
+        since = timezone.make_aware(datetime.combine(start, time.min))
+        rows = (
+            (timezone.localdate(recorded_at), recorded_at, value)
+            for recorded_at, value in readings.filter(recorded_at__gte=since).values_list('recorded_at', 'value_primary')
+        )
+        latest = readings.order_by('-recorded_at', '-id').values_list('recorded_at', 'value_primary').first()
+    for day, moment, value in rows:
+        _add(goal, day, moment, value, today, replace=metric in CHECKIN_TARGETS)
+    if latest is not None:
+        goal.window_state['latest'] = [latest[1], _moment_key(latest[0])]
+
+
+def current_value(goal):
+    """Aggregate of the goal's window, or None without data"""
+    state = goal.window_state or {}
+    if goal.target_aggregate == 'latest':
+        latest = state.get('latest')
+        return latest[0] if latest else None
+    days = state.get('days', {}).values()
+    total = sum(day_total for day_total, count in days)
+    if goal.target_aggregate == 'total':
+        return total
+    count = sum(count for day_total, count in days)
+    return total / count if count else None
+
+
+def progress(goal, value):
+    """0-100 towards the target; "at most" goals measure progress from the baseline"""
+    target = goal.target_number
+    if value is None:
+        return 0
+    if goal.target_comparator == 'gte':
+        if value >= target:
+            return 100
+        return max(0, min(100, int(100 * value / target))) if target > 0 else 0
+    if value <= target:
+        return 100
+    baseline = goal.baseline_value
+    if baseline is None or baseline <= target:
+        return 0
+    return max(0, min(100, int(100 * (baseline - value) / (baseline - target))))
+
+
+def evaluate(goal, now=None):
+    """Set the goal's current value, baseline and progress from its window state"""
+    value = current_value(goal)
+    if goal.baseline_value is None:
+        goal.baseline_value = value
+    goal.current_value = value
+    goal.progress = progress(goal, value)
+    goal.evaluated_at = now or timezone.now()
+
+
+def _update(user_id, metrics, apply):
+    """Apply a change to the user's active goals following any of ``metrics``"""
+    if not metrics:
+        return
+    # Part of the caller's transaction when there is one; nothing here is retried
+    with transaction.atomic(savepoint=False):
+        goals = HealthGoal.objects.select_for_update().filter(
+            user_id=user_id, is_active=True, target_metric__in=metrics, target_number__isnull=False,
+        )
+        now = timezone.now()
+        today = timezone.localdate(now)
+        for goal in goals:
+            if goal.evaluated_at is None:
+                # Never evaluated (e.g. migrated); history already includes the change
+                recompute(goal, today)
+            else:
+                apply(goal, today)
+            evaluate(goal, now)
+            goal.save(update_fields=[*HealthGoal.STATE_FIELDS, 'updated_at'])
+
+
+def apply_checkin(checkin, fields=None):
+    """Fold a new or edited check-in into goals following the changed ``fields`` (default all)"""
+    metrics = [name for name in CHECKIN_TARGETS if fields is None or name in fields]
+
+    def apply(goal, today):
+        value = getattr(checkin, goal.target_metric)
+        _add(goal, checkin.check_in_date, checkin.check_in_date, value, today, replace=True)
+
+    _update(checkin.user_id, metrics, apply)
+
+
+def apply_metrics(metrics):
+    """Fold newly created readings into the goals following their metric types"""
+    readings = {}
+    for metric in metrics:
+        if metric.value_primary is not None and metric.unit_normalized == CANONICAL_UNITS.get(metric.metric_type):
+            readings.setdefault(metric.user_id, {}).setdefault(metric.metric_type, []).append(metric)
+
+    for user_id, by_type in readings.items():
+        def apply(goal, today, by_type=by_type):
+            for metric in by_type[goal.target_metric]:
+                _add(goal, timezone.localdate(metric.recorded_at), metric.recorded_at, metric.value_primary, today)
+
+        _update(user_id, list(by_type), apply)
+
+
+def refresh(user_id, metrics):
+    """Recompute the user's goals following any of ``metrics`` from history"""
+    _update(user_id, list(metrics), lambda goal, today: recompute(goal, today))
+
+
+_TARGET_RE = re.compile(r'(\d+(?:\.\d+)?)\s*([a-zA-Z°/]*)')
+
+# Unit written in a free-text target -> (target metric, aggregate, factor to the canonical unit)
+TARGET_UNITS = {
+    'h': ('sleep_hours', 'average', 1),
+    'hr': ('sleep_hours', 'average', 1),
+    'hrs': ('sleep_hours', 'average', 1),
+    'hour': ('sleep_hours', 'average', 1),
+    'hours': ('sleep_hours', 'average', 1),
+    'min': ('exercise_minutes', 'average', 1),
+    'mins': ('exercise_minutes', 'average', 1),
+    'minute': ('exercise_minutes', 'average', 1),
+    'minutes': ('exercise_minutes', 'average', 1),
+    'ml': ('water_intake', 'average', 1),
+    'l': ('water_intake', 'average', 1000),
+    'liter': ('water_intake', 'average', 1000),
+    'liters': ('water_intake', 'average', 1000),
+    'litre': ('water_intake', 'average', 1000),
+    'litres': ('water_intake', 'average', 1000),
+    'glass': ('water_intake', 'average', 250),
+    'glasses': ('water_intake', 'average', 250),
+    'meal': ('meals_logged', 'average', 1),
+    'meals': ('meals_logged', 'average', 1),
+    'kg': ('weight', 'latest', 1),
+    'kgs': ('weight', 'latest', 1),
+    'kilograms': ('weight', 'latest', 1),
+    'lb': ('weight', 'latest', 0.45359237),
+    'lbs': ('weight', 'latest', 0.45359237),
+    'pounds': ('weight', 'latest', 0.45359237),
+    'bpm': ('heart_rate', 'average', 1),
+}
+
+# Metric a bare number refers to, by goal type
+GOAL_TYPE_TARGETS = {
+    'sleep': 'sleep_hours',
+    'hydration': 'water_intake',
+    'weight': 'weight',
+    'nutrition': 'meals_logged',
+    'fitness': 'exercise_minutes',
+}
+
+# Whole words only, so "unless", "lessons" or "maximum" do not count
+_AT_MOST_RE = re.compile(r'\b(under|below|less|max|at most)\b|<')
+# Targets relative to an unknown starting point ("lose 5 kg") cannot be structured
+_RELATIVE_RE = re.compile(r'\b(lose|gain|drop|reduce|increase)\b')
+
+
+def parse_target(goal_type, text):
+    """Structured target fields of a free-text ``target_value``, or None if it is not understood"""
+    match = _TARGET_RE.search(text or '')
+    if not match or _RELATIVE_RE.search(text.lower()):
+        return None
+    number = float(match.group(1))
+    unit = match.group(2).split('/')[0].strip().lower()
+    if unit in TARGET_UNITS:
+        metric, aggregate, factor = TARGET_UNITS[unit]
+    elif not unit and goal_type in GOAL_TYPE_TARGETS:
+        metric, factor = GOAL_TYPE_TARGETS[goal_type], 1
+        aggregate = 'latest' if metric == 'weight' else 'average'
+    else:
+        return None
+
+    lowered = text.lower()
+    if re.search(r'/\s*week|per week|a week|weekly', lowered):
+        aggregate = 'total' if aggregate == 'average' else aggregate
+    at_most = metric in ('weight', 'heart_rate') or bool(_AT_MOST_RE.search(lowered))
+    return {
+        'target_metric': metric,
+        'target_comparator': 'lte' if at_most else 'gte',
+        'target_number': round(number * factor, 3),
+        'target_aggregate': aggregate,
+        'target_window_days': 7,
+    }
@@ -0,0 +1,167 @@
+"""
+Bulk ingestion of health metric readings.
+
+Readings are checked with plain field checks instead of a serializer per item,
+de-duplicated against the batch and the database, and written with batched
+``bulk_create`` inside one transaction, together with their rollups and goal
+progress. Retries are safe: a reading is skipped when its ``idempotency_key``
+or its (metric_type, recorded_at) pair is already stored for the user. Invalid
+readings are reported by index and do not stop the rest of the batch.
+"""
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import HealthMetric
+from . import goals, rollups
+
+MAX_ITEMS = 5000
+BATCH_SIZE = 1000
+LOOKUP_CHUNK = 1000
+FUTURE_TOLERANCE = timedelta(minutes=5)
+
+METRIC_TYPES = frozenset(value for value, label in HealthMetric.METRIC_TYPES)
+MAX_LENGTHS = {
+    name: HealthMetric._meta.get_field(name).max_length
+    for name in ('value', 'unit', 'idempotency_key')
+}
+
+
+class InvalidItem:
+    """Placeholder for an input item that could not be decoded"""
+
+    def __init__(self, message):
+        self.message = message
+
+
+def _text(item, name, errors, required=False, default='', numeric=False):
+    value = item.get(name)
+    if value is None or value == '':
+        if required:
+            errors[name] = 'This field is required.'
+        return default
+    if numeric and isinstance(value, (int, float)) and not isinstance(value, bool):
+        value = str(value)
+    if not isinstance(value, str):
+        errors[name] = 'Must be a string.'
+    elif name in MAX_LENGTHS and len(value) > MAX_LENGTHS[name]:
+        errors[name] = f'Ensure this field has no more than {MAX_LENGTHS[name]} characters.'
+    return value
+
+
+def _recorded_at(item, now, errors):
+    value = item.get('recorded_at')
+    if value in (None, ''):
+        return None
+    try:
+        parsed = parse_datetime(value) if isinstance(value, str) else None
+    except ValueError:
+        # Well formed but impossible, e.g. month 13
+        parsed = None
+    if parsed is None:
+        errors['recorded_at'] = 'Must be an ISO 8601 datetime.'
+        return None
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    if parsed > now + FUTURE_TOLERANCE:
+        errors['recorded_at'] = 'Must not be in the future.'
+    return parsed
+
+
+def validate(items):
+    """Split raw items into ([(index, fields)], [{'index', 'errors'}])"""
+    now = timezone.now()
+    valid, invalid = [], []
+    for index, item in enumerate(items):
+        if isinstance(item, InvalidItem):
+            invalid.append({'index': index, 'errors': {'non_field_errors': item.message}})
+            continue
+        if not isinstance(item, dict):
+            invalid.append({'index': index, 'errors': {'non_field_errors': 'Expected an object.'}})
+            continue
+        errors = {}
+        metric_type = item.get('metric_type')
+        if metric_type not in METRIC_TYPES:
+            errors['metric_type'] = f'"{metric_type}" is not a valid choice.'
+        fields = {
+            'metric_type': metric_type,
+            'value': _text(item, 'value', errors, required=True, numeric=True),
+            'unit': _text(item, 'unit', errors),
+            'notes': _text(item, 'notes', errors),
+            'idempotency_key': _text(item, 'idempotency_key', errors, default=None),
+            'recorded_at': _recorded_at(item, now, errors),
+        }
+        if errors:
+            invalid.append({'index': index, 'errors': errors})
+        else:
+            valid.append((index, fields))
+    return valid, invalid
+
+
+def _chunks(values):
+    values = list(values)
+    for start in range(0, len(values), LOOKUP_CHUNK):
+        yield values[start:start + LOOKUP_CHUNK]
+
+
+def _existing(user, valid):
+    """Idempotency keys and (metric_type, recorded_at) pairs already stored for the user"""
+    stored = HealthMetric.objects.filter(user=user)
+    keys = {fields['idempotency_key'] for index, fields in valid if fields['idempotency_key']}
+    existing_keys = set()
+    for chunk in _chunks(keys):
+        existing_keys.update(stored.filter(idempotency_key__in=chunk).values_list('idempotency_key', flat=True))
+
+    existing_readings = set()
+    timestamps = {fields['recorded_at'] for index, fields in valid if fields['recorded_at']}
+    for chunk in _chunks(timestamps):
+        existing_readings.update(stored.filter(recorded_at__in=chunk).values_list('metric_type', 'recorded_at'))
+    return existing_keys, existing_readings
+
+
+def ingest(user, items):
+    """Store valid, new readings for a user and report what happened to each item"""
+    valid, invalid = validate(items)
+    duplicates = []
+    created = []
+
+    with transaction.atomic():
+        # Serialize batches per user so concurrent retries cannot both insert
+        get_user_model().objects.select_for_update().filter(pk=user.pk).first()
+        seen_keys, seen_readings = _existing(user, valid)
+
+        now = timezone.now()
+        metrics = []
+        for index, fields in valid:
+            key = fields['idempotency_key']
+            # Only readings timestamped by the client can be recognised by time
+            reading = (fields['metric_type'], fields['recorded_at']) if fields['recorded_at'] else None
+            if (key and key in seen_keys) or (reading and reading in seen_readings):
+                duplicates.append(index)
+                continue
+            if key:
+                seen_keys.add(key)
+            if reading:
+                seen_readings.add(reading)
+            else:
+                fields['recorded_at'] = now
+            metric = HealthMetric(user=user, **fields)
+            # bulk_create skips save(), so parse here
+            metric.parse_value()
+            metrics.append(metric)
+            created.append(index)
+
+        HealthMetric.objects.bulk_create(metrics, batch_size=BATCH_SIZE)
+        # bulk_create sends no post_save either
+        rollups.record(metrics)
+        goals.apply_metrics(metrics)
+
+    return {
+        'received': len(items),
+        'created': len(created),
+        'duplicates': duplicates,
+        'errors': invalid,
+    }
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from apps.health.models import HealthMetric
+
+
+class Command(BaseCommand):
+    help = "Parse HealthMetric.value into the numeric columns for rows written before they existed"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--all', action='store_true', help="Re-parse every row, not only unparsed ones")
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        metrics = HealthMetric.objects.only('id', 'metric_type', 'value', 'unit')
+        if not options['all']:
+            metrics = metrics.filter(value_primary__isnull=True, unit_normalized='')
+
+        last_id = 0
+        scanned = parsed = 0
+        while True:
+            # Keyset over the primary key keeps memory bounded to one chunk
+            chunk = list(metrics.filter(pk__gt=last_id).order_by('pk')[:chunk_size])
+            if not chunk:
+                break
+            for metric in chunk:
+                metric.parse_value()
+                parsed += metric.value_primary is not None
+            HealthMetric.objects.bulk_update(chunk, HealthMetric.PARSED_FIELDS)
+            scanned += len(chunk)
+            last_id = chunk[-1].pk
+            self.stdout.write(f"Processed {scanned} metrics")
+
+        self.stdout.write(self.style.SUCCESS(f"Done, {parsed} of {scanned} metrics parsed"))
@@ -0,0 +1,80 @@
+import math
+import statistics
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from apps.health import trends
+
+
+def naive_rolling_mean(values, window):
+    result = []
+    for i in range(len(values)):
+        if i < window - 1:
+            result.append(math.nan)
+        else:
+            result.append(sum(values[i - window + 1:i + 1]) / window)
+    return result
+
+
+def naive_slope(times, values):
+    mean_t = sum(times) / len(times)
+    mean_v = sum(values) / len(values)
+    numerator = sum((t - mean_t) * (v - mean_v) for t, v in zip(times, values))
+    denominator = sum((t - mean_t) ** 2 for t in times)
+    return numerator / denominator
+
+
+def naive_zscore(values, threshold):
+    mean = statistics.fmean(values)
+    std = statistics.pstdev(values)
+    return [abs((v - mean) / std) > threshold for v in values]
+
+
+class Command(BaseCommand):
+    help = "Compare the vectorized trend analytics with naive per-row loops on synthetic data"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--points', type=int, default=100000)
+        parser.add_argument('--window', type=int, default=7)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def _time(self, function, repeat):
+        best = math.inf
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = function()
+            best = min(best, time.perf_counter() - started)
+        return best, result
+
+    def handle(self, *args, **options):
+        points, window, repeat = options['points'], options['window'], options['repeat']
+        rng = np.random.default_rng(42)
+        # One reading a minute with a slow drift and a few spikes, like a wearable heart rate
+        times = np.arange(points, dtype=float) / 1440
+        values = 70 + 0.05 * times + rng.normal(0, 5, points)
+        values[rng.integers(0, points, max(points // 1000, 1))] += 60
+        times_list, values_list = times.tolist(), values.tolist()
+
+        cases = [
+            ('rolling mean',
+             lambda: naive_rolling_mean(values_list, window),
+             lambda: trends.rolling_mean(values, window)),
+            ('slope',
+             lambda: naive_slope(times_list, values_list),
+             lambda: trends.slope(times, values)),
+            ('z-score anomalies',
+             lambda: naive_zscore(values_list, 3.0),
+             lambda: trends.zscore_anomalies(values, 3.0)[0]),
+        ]
+
+        self.stdout.write(f"{points} points, window {window}, best of {repeat}")
+        for name, naive, vectorized in cases:
+            naive_seconds, expected = self._time(naive, repeat)
+            vector_seconds, actual = self._time(vectorized, repeat)
+            same = np.allclose(np.asarray(expected, dtype=float), np.asarray(actual, dtype=float), equal_nan=True)
+            self.stdout.write(
+                f"{name:<20} naive {naive_seconds * 1000:9.2f} ms   numpy {vector_seconds * 1000:8.2f} ms   "
+                f"x{naive_seconds / vector_seconds:7.1f}   {'match' if same else 'MISMATCH'}"
+            )
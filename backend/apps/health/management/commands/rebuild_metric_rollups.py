@@ -0,0 +1,44 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from apps.health.models import HealthMetric, HealthMetricRollup
+from apps.health import rollups
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Rebuild hourly, daily and weekly metric rollups from raw readings"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help="Only rebuild this user's rollups")
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        users = User.objects.filter(
+            Exists(HealthMetric.objects.filter(user=OuterRef('pk')))
+            | Exists(HealthMetricRollup.objects.filter(user=OuterRef('pk')))
+        )
+        if options['user']:
+            users = users.filter(pk=options['user'])
+
+        last_id = 0
+        rebuilt = written = 0
+        while True:
+            # Keyset over the primary key, as in backfill_metric_values
+            user_ids = list(users.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:chunk_size])
+            if not user_ids:
+                break
+            for user_id in user_ids:
+                # One transaction per user: readers see either the old or the
+                # new rollups, and locks are held for one user's rebuild only
+                with transaction.atomic():
+                    HealthMetricRollup.objects.filter(user_id=user_id).delete()
+                    written += rollups.rebuild(HealthMetric.objects.filter(user_id=user_id), chunk_size=chunk_size)
+            rebuilt += len(user_ids)
+            last_id = user_ids[-1]
+            self.stdout.write(f"Rebuilt {rebuilt} users, {written} rollups")
+
+        self.stdout.write(self.style.SUCCESS(f"Done, {written} rollups rebuilt"))
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.8 on 2026-10-18 15:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('health', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dailycheckin',
+            index=models.Index(fields=['user', 'check_in_date', 'id'], name='checkin_user_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='healthmetric',
+            index=models.Index(fields=['user', 'recorded_at', 'id'], name='metric_user_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='healthmetric',
+            index=models.Index(fields=['user', 'metric_type', 'recorded_at', 'id'], name='metric_user_type_keyset_idx'),
+        ),
+    ]
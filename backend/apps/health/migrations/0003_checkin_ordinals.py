@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('health', '0002_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailycheckin',
+            name='mood_ordinal',
+            field=models.PositiveSmallIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='dailycheckin',
+            name='energy_ordinal',
+            field=models.PositiveSmallIntegerField(null=True),
+        ),
+    ]
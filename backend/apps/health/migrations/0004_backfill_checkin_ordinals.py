@@ -0,0 +1,51 @@
+"""
+Copy mood/energy strings into the ordinal columns.
+
+Runs outside a single transaction: each batch of ids is converted with one
+UPDATE and committed on its own, so a large table is never locked as a whole
+and an interrupted run resumes where it stopped (filled rows are skipped).
+"""
+from django.db import migrations, transaction
+from django.db.models import Case, IntegerField, Value, When
+
+BATCH_SIZE = 5000
+
+MOODS = ('very_bad', 'bad', 'neutral', 'good', 'very_good')
+ENERGIES = ('very_low', 'low', 'medium', 'high', 'very_high')
+
+
+def _ordinal(field, values):
+    # Unknown strings fall back to the middle of the scale
+    return Case(
+        *[When(**{field: value}, then=Value(ordinal)) for ordinal, value in enumerate(values, start=1)],
+        default=Value(3),
+        output_field=IntegerField(),
+    )
+
+
+def backfill(apps, schema_editor):
+    DailyCheckIn = apps.get_model('health', 'DailyCheckIn')
+    pending = DailyCheckIn.objects.filter(mood_ordinal__isnull=True)
+    last_id = 0
+    while True:
+        ids = list(pending.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:BATCH_SIZE])
+        if not ids:
+            break
+        with transaction.atomic():
+            DailyCheckIn.objects.filter(id__in=ids).update(
+                mood_ordinal=_ordinal('mood', MOODS),
+                energy_ordinal=_ordinal('energy_level', ENERGIES),
+            )
+        last_id = ids[-1]
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('health', '0003_checkin_ordinals'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
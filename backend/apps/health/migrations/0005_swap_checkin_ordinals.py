@@ -0,0 +1,39 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('health', '0004_backfill_checkin_ordinals'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='dailycheckin',
+            name='mood',
+        ),
+        migrations.RemoveField(
+            model_name='dailycheckin',
+            name='energy_level',
+        ),
+        migrations.RenameField(
+            model_name='dailycheckin',
+            old_name='mood_ordinal',
+            new_name='mood',
+        ),
+        migrations.RenameField(
+            model_name='dailycheckin',
+            old_name='energy_ordinal',
+            new_name='energy_level',
+        ),
+        migrations.AlterField(
+            model_name='dailycheckin',
+            name='mood',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'Very Bad'), (2, 'Bad'), (3, 'Neutral'), (4, 'Good'), (5, 'Very Good')]),
+        ),
+        migrations.AlterField(
+            model_name='dailycheckin',
+            name='energy_level',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'Very Low'), (2, 'Low'), (3, 'Medium'), (4, 'High'), (5, 'Very High')]),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.8 on 2026-10-18 15:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('health', '0005_swap_checkin_ordinals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='healthmetric',
+            name='unit_normalized',
+            field=models.CharField(blank=True, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='healthmetric',
+            name='value_primary',
+            field=models.FloatField(blank=True, help_text='Reading in unit_normalized; systolic for BP', null=True),
+        ),
+        migrations.AddField(
+            model_name='healthmetric',
+            name='value_secondary',
+            field=models.FloatField(blank=True, help_text='Diastolic for BP', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='healthmetric',
+            index=models.Index(fields=['metric_type', 'value_primary'], name='metric_type_value_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.8 on 2026-10-18 15:37
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('health', '0006_metric_numeric_values'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='healthmetric',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AlterField(
+            model_name='healthmetric',
+            name='recorded_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddConstraint(
+            model_name='healthmetric',
+            constraint=models.UniqueConstraint(condition=models.Q(('idempotency_key__isnull', False)), fields=('user', 'idempotency_key'), name='unique_metric_idempotency_key'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.8 on 2026-10-18 15:38
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('health', '0007_metric_idempotency'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HealthMetricRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric_type', models.CharField(choices=[('blood_pressure', 'Blood Pressure'), ('heart_rate', 'Heart Rate'), ('blood_sugar', 'Blood Sugar'), ('temperature', 'Temperature'), ('weight', 'Weight')], max_length=20)),
+                ('resolution', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day'), ('week', 'Week')], max_length=4)),
+                ('bucket_start', models.DateTimeField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('min_value', models.FloatField()),
+                ('max_value', models.FloatField()),
+                ('sum_value', models.FloatField(default=0)),
+                ('last_value', models.FloatField()),
+                ('last_recorded_at', models.DateTimeField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='metric_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Health Metric Rollups',
+                'unique_together': {('user', 'metric_type', 'resolution', 'bucket_start')},
+            },
+        ),
+    ]
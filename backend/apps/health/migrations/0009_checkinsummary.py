@@ -0,0 +1,32 @@
+# Generated by Django 4.2.8 on 2026-10-18 15:43
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('health', '0008_healthmetricrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CheckInSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('current_streak', models.PositiveIntegerField(default=0, help_text='Consecutive days ending on last_check_in_date')),
+                ('longest_streak', models.PositiveIntegerField(default=0)),
+                ('total_checkins', models.PositiveIntegerField(default=0)),
+                ('last_check_in_date', models.DateField(blank=True, null=True)),
+                ('calendar', models.BinaryField(default=bytes, max_length=46)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='checkin_summary', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Check-in Summaries',
+            },
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 4.2.8 on 2026-10-18 15:46
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('health', '0009_checkinsummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='healthgoal',
+            name='baseline_value',
+            field=models.FloatField(blank=True, help_text='First evaluated value', null=True),
+        ),
+        migrations.AddField(
+            model_name='healthgoal',
+            name='current_value',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='healthgoal',
+            name='evaluated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='healthgoal',
+            name='target_aggregate',
+            field=models.CharField(choices=[('average', 'Average over the window'), ('total', 'Total over the window'), ('latest', 'Latest value')], default='average', max_length=7),
+        ),
+        migrations.AddField(
+            model_name='healthgoal',
+            name='target_comparator',
+            field=models.CharField(choices=[('gte', 'At least'), ('lte', 'At most')], default='gte', max_length=3),
+        ),
+        migrations.AddField(
+            model_name='healthgoal',
+            name='target_metric',
+            field=models.CharField(blank=True, choices=[('sleep_hours', 'Sleep Hours'), ('exercise_minutes', 'Exercise Minutes'), ('water_intake', 'Water Intake (ml)'), ('meals_logged', 'Meals Logged'), ('mood', 'Mood (1-5)'), ('energy_level', 'Energy Level (1-5)'), ('blood_pressure', 'Blood Pressure (systolic)'), ('heart_rate', 'Heart Rate'), ('blood_sugar', 'Blood Sugar'), ('temperature', 'Temperature'), ('weight', 'Weight')], max_length=20),
+        ),
+        migrations.AddField(
+            model_name='healthgoal',
+            name='target_number',
+            field=models.FloatField(blank=True, help_text="In the metric's canonical unit", null=True),
+        ),
+        migrations.AddField(
+            model_name='healthgoal',
+            name='target_window_days',
+            field=models.PositiveSmallIntegerField(default=7, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(90)]),
+        ),
+        migrations.AddField(
+            model_name='healthgoal',
+            name='window_state',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddIndex(
+            model_name='healthgoal',
+            index=models.Index(fields=['user', 'target_metric', 'is_active'], name='goal_user_target_idx'),
+        ),
+    ]
@@ -0,0 +1,108 @@
+"""
+Fill the structured target of existing goals from their free-text target_value.
+
+Goals whose text is not understood (e.g. "10000 steps/day", "5km") stay
+unstructured and keep manual progress. Parsed goals are left unevaluated and
+are evaluated from history on the next check-in or reading of their metric.
+"""
+import re
+
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+# Frozen copy of goals.parse_target
+TARGET_RE = re.compile(r'(\d+(?:\.\d+)?)\s*([a-zA-Z°/]*)')
+RELATIVE_RE = re.compile(r'\b(lose|gain|drop|reduce|increase)\b')
+TARGET_UNITS = {
+    'h': ('sleep_hours', 'average', 1),
+    'hr': ('sleep_hours', 'average', 1),
+    'hrs': ('sleep_hours', 'average', 1),
+    'hour': ('sleep_hours', 'average', 1),
+    'hours': ('sleep_hours', 'average', 1),
+    'min': ('exercise_minutes', 'average', 1),
+    'mins': ('exercise_minutes', 'average', 1),
+    'minute': ('exercise_minutes', 'average', 1),
+    'minutes': ('exercise_minutes', 'average', 1),
+    'ml': ('water_intake', 'average', 1),
+    'l': ('water_intake', 'average', 1000),
+    'liter': ('water_intake', 'average', 1000),
+    'liters': ('water_intake', 'average', 1000),
+    'litre': ('water_intake', 'average', 1000),
+    'litres': ('water_intake', 'average', 1000),
+    'glass': ('water_intake', 'average', 250),
+    'glasses': ('water_intake', 'average', 250),
+    'meal': ('meals_logged', 'average', 1),
+    'meals': ('meals_logged', 'average', 1),
+    'kg': ('weight', 'latest', 1),
+    'kgs': ('weight', 'latest', 1),
+    'kilograms': ('weight', 'latest', 1),
+    'lb': ('weight', 'latest', 0.45359237),
+    'lbs': ('weight', 'latest', 0.45359237),
+    'pounds': ('weight', 'latest', 0.45359237),
+    'bpm': ('heart_rate', 'average', 1),
+}
+GOAL_TYPE_TARGETS = {
+    'sleep': 'sleep_hours',
+    'hydration': 'water_intake',
+    'weight': 'weight',
+    'nutrition': 'meals_logged',
+    'fitness': 'exercise_minutes',
+}
+AT_MOST_RE = re.compile(r'\b(under|below|less|max|at most)\b|<')
+TARGET_FIELDS = ('target_metric', 'target_comparator', 'target_number', 'target_aggregate', 'target_window_days')
+
+
+def parse_target(goal_type, text):
+    match = TARGET_RE.search(text or '')
+    if not match or RELATIVE_RE.search(text.lower()):
+        return None
+    number = float(match.group(1))
+    unit = match.group(2).split('/')[0].strip().lower()
+    if unit in TARGET_UNITS:
+        metric, aggregate, factor = TARGET_UNITS[unit]
+    elif not unit and goal_type in GOAL_TYPE_TARGETS:
+        metric, factor = GOAL_TYPE_TARGETS[goal_type], 1
+        aggregate = 'latest' if metric == 'weight' else 'average'
+    else:
+        return None
+
+    lowered = text.lower()
+    if re.search(r'/\s*week|per week|a week|weekly', lowered):
+        aggregate = 'total' if aggregate == 'average' else aggregate
+    at_most = metric in ('weight', 'heart_rate') or bool(AT_MOST_RE.search(lowered))
+    return {
+        'target_metric': metric,
+        'target_comparator': 'lte' if at_most else 'gte',
+        'target_number': round(number * factor, 3),
+        'target_aggregate': aggregate,
+        'target_window_days': 7,
+    }
+
+
+def parse_targets(apps, schema_editor):
+    HealthGoal = apps.get_model('health', 'HealthGoal')
+    batch = []
+    goals = HealthGoal.objects.filter(target_metric='').only('id', 'goal_type', 'target_value')
+    for goal in goals.iterator(chunk_size=BATCH_SIZE):
+        target = parse_target(goal.goal_type, goal.target_value)
+        if target is None:
+            continue
+        for name, value in target.items():
+            setattr(goal, name, value)
+        batch.append(goal)
+        if len(batch) >= BATCH_SIZE:
+            HealthGoal.objects.bulk_update(batch, TARGET_FIELDS)
+            batch = []
+    HealthGoal.objects.bulk_update(batch, TARGET_FIELDS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('health', '0010_goal_targets'),
+    ]
+
+    operations = [
+        migrations.RunPython(parse_targets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,69 @@
+"""
+Give every user with check-ins a check-in summary.
+
+Summaries used to be built on first read of the summary endpoint; check-ins
+now create and repair them, and reads never write.
+"""
+from django.db import migrations
+
+BATCH_SIZE = 1000
+# Frozen copy of CheckInSummary.CALENDAR_DAYS
+CALENDAR_DAYS = 366
+
+
+def summarize(user_id, days, CheckInSummary):
+    """Frozen copy of streaks.rebuild over a user's check-in dates, in order"""
+    current = longest = total = bits = 0
+    last = None
+    for day in days:
+        if last is not None and day <= last:
+            continue
+        if last is None:
+            bits, current = 1, 1
+        else:
+            gap = (day - last).days
+            bits = (bits << gap) | 1
+            current = current + 1 if gap == 1 else 1
+        last = day
+        total += 1
+        longest = max(longest, current)
+    bits &= (1 << CALENDAR_DAYS) - 1
+    return CheckInSummary(
+        user_id=user_id, current_streak=current, longest_streak=longest, total_checkins=total,
+        last_check_in_date=last, calendar=bits.to_bytes((CALENDAR_DAYS + 7) // 8, 'little'),
+    )
+
+
+def create_missing_summaries(apps, schema_editor):
+    DailyCheckIn = apps.get_model('health', 'DailyCheckIn')
+    CheckInSummary = apps.get_model('health', 'CheckInSummary')
+    db = schema_editor.connection.alias
+    rows = (
+        DailyCheckIn.objects.using(db).filter(user__checkin_summary__isnull=True)
+        .order_by('user_id', 'check_in_date').values_list('user_id', 'check_in_date')
+    )
+    batch = []
+    user_id, days = None, []
+    for row_user_id, day in rows.iterator(chunk_size=BATCH_SIZE):
+        if row_user_id != user_id:
+            if days:
+                batch.append(summarize(user_id, days, CheckInSummary))
+            user_id, days = row_user_id, []
+        days.append(day)
+        if len(batch) >= BATCH_SIZE:
+            CheckInSummary.objects.using(db).bulk_create(batch)
+            batch = []
+    if days:
+        batch.append(summarize(user_id, days, CheckInSummary))
+    CheckInSummary.objects.using(db).bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('health', '0011_parse_goal_targets'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_missing_summaries, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,23 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
+from .units import parse_reading
 
 User = get_user_model()
 
+
+def ordinals(choices):
+    """Map each choice value to its position 1..n in the listed order"""
+    return {value: ordinal for ordinal, (value, label) in enumerate(choices, start=1)}
+
+
+def ordinal_choices(choices):
+    """Integer choices 1..n labelled in the listed order"""
+    positions = ordinals(choices)
+    return [(positions[value], label) for value, label in choices]
+
+
 class DailyCheckIn(models.Model):
     """Daily health check-in tracking"""
     MOOD_CHOICES = [
@@ -22,11 +36,16 @@ class DailyCheckIn(models.Model):
         ('very_high', 'Very High'),
     ]
     
+    # Stored as ordinals (1 for the first choice above) so they can be averaged in
+    # SQL; the API keeps exchanging the string values
+    MOOD_ORDINALS = ordinals(MOOD_CHOICES)
+    ENERGY_ORDINALS = ordinals(ENERGY_CHOICES)
+    
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_checkins')
     
     # Mood and energy tracking
-    mood = models.CharField(max_length=20, choices=MOOD_CHOICES)
-    energy_level = models.CharField(max_length=20, choices=ENERGY_CHOICES)
+    mood = models.PositiveSmallIntegerField(choices=ordinal_choices(MOOD_CHOICES))
+    energy_level = models.PositiveSmallIntegerField(choices=ordinal_choices(ENERGY_CHOICES))
     
     # Health metrics
     sleep_hours = models.FloatField(
@@ -59,10 +78,13 @@ class DailyCheckIn(models.Model):
     class Meta:
         ordering = ['-check_in_date']
         unique_together = ('user', 'check_in_date')
+        indexes = [
+            models.Index(fields=['user', 'check_in_date', 'id'], name='checkin_user_keyset_idx'),
+        ]
         verbose_name_plural = 'Daily Check-ins'
     
     def __str__(self):
-        return f"{self.user.email} - {self.check_in_date} ({self.mood})"
+        return f"{self.user.email} - {self.check_in_date} ({self.get_mood_display()})"
 
 
 class HealthGoal(models.Model):
@@ -76,6 +98,37 @@ class HealthGoal(models.Model):
         ('hydration', 'Hydration'),
     ]
     
+    # Check-in fields and metric types a structured target can follow
+    TARGET_METRICS = [
+        ('sleep_hours', 'Sleep Hours'),
+        ('exercise_minutes', 'Exercise Minutes'),
+        ('water_intake', 'Water Intake (ml)'),
+        ('meals_logged', 'Meals Logged'),
+        ('mood', 'Mood (1-5)'),
+        ('energy_level', 'Energy Level (1-5)'),
+        ('blood_pressure', 'Blood Pressure (systolic)'),
+        ('heart_rate', 'Heart Rate'),
+        ('blood_sugar', 'Blood Sugar'),
+        ('temperature', 'Temperature'),
+        ('weight', 'Weight'),
+    ]
+    
+    COMPARATORS = [
+        ('gte', 'At least'),
+        ('lte', 'At most'),
+    ]
+    
+    AGGREGATES = [
+        ('average', 'Average over the window'),
+        ('total', 'Total over the window'),
+        ('latest', 'Latest value'),
+    ]
+    
+    MAX_WINDOW_DAYS = 90
+    
+    TARGET_FIELDS = ('target_metric', 'target_comparator', 'target_number', 'target_aggregate', 'target_window_days')
+    STATE_FIELDS = ('progress', 'current_value', 'baseline_value', 'window_state', 'evaluated_at')
+    
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='health_goals')
     goal_type = models.CharField(max_length=20, choices=GOAL_TYPES)
     description = models.TextField()
@@ -86,6 +139,23 @@ class HealthGoal(models.Model):
     )
     is_active = models.BooleanField(default=True)
     
+    # Structured target; progress of goals with a target_metric is kept up to
+    # date from check-ins and metrics (see goals.py)
+    target_metric = models.CharField(max_length=20, choices=TARGET_METRICS, blank=True)
+    target_comparator = models.CharField(max_length=3, choices=COMPARATORS, default='gte')
+    target_number = models.FloatField(null=True, blank=True, help_text="In the metric's canonical unit")
+    target_aggregate = models.CharField(max_length=7, choices=AGGREGATES, default='average')
+    target_window_days = models.PositiveSmallIntegerField(
+        default=7,
+        validators=[MinValueValidator(1), MaxValueValidator(MAX_WINDOW_DAYS)]
+    )
+    
+    # Evaluator state: running per-day sums and counts over the window
+    current_value = models.FloatField(null=True, blank=True)
+    baseline_value = models.FloatField(null=True, blank=True, help_text="First evaluated value")
+    window_state = models.JSONField(default=dict, blank=True)
+    evaluated_at = models.DateTimeField(null=True, blank=True)
+    
     # Timestamps
     start_date = models.DateField(auto_now_add=True)
     target_date = models.DateField(null=True, blank=True)
@@ -94,9 +164,16 @@ class HealthGoal(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'target_metric', 'is_active'], name='goal_user_target_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.email} - {self.goal_type}"
+    
+    @property
+    def is_structured(self):
+        return bool(self.target_metric) and self.target_number is not None
 
 
 class HealthMetric(models.Model):
@@ -109,18 +186,115 @@ class HealthMetric(models.Model):
         ('weight', 'Weight'),
     ]
     
+    PARSED_FIELDS = ('value_primary', 'value_secondary', 'unit_normalized')
+    
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='health_metrics')
     metric_type = models.CharField(max_length=20, choices=METRIC_TYPES)
     value = models.CharField(max_length=50)  # Can store "120/80" for BP, "72" for HR, etc.
     unit = models.CharField(max_length=20, blank=True)  # mmHg, bpm, mg/dL, °C, kg
     notes = models.TextField(blank=True)
     
+    # Parsed from value/unit on save (see units.py)
+    value_primary = models.FloatField(null=True, blank=True, help_text="Reading in unit_normalized; systolic for BP")
+    value_secondary = models.FloatField(null=True, blank=True, help_text="Diastolic for BP")
+    unit_normalized = models.CharField(max_length=20, blank=True)
+    
+    # Client-supplied key that makes retried uploads safe (see ingest.py)
+    idempotency_key = models.CharField(max_length=64, null=True, blank=True)
+    
     # Timestamp
-    recorded_at = models.DateTimeField(auto_now_add=True)
+    recorded_at = models.DateTimeField(default=timezone.now)
     
     class Meta:
         ordering = ['-recorded_at']
+        indexes = [
+            models.Index(fields=['user', 'recorded_at', 'id'], name='metric_user_keyset_idx'),
+            models.Index(fields=['user', 'metric_type', 'recorded_at', 'id'], name='metric_user_type_keyset_idx'),
+            models.Index(fields=['metric_type', 'value_primary'], name='metric_type_value_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'idempotency_key'],
+                condition=models.Q(idempotency_key__isnull=False),
+                name='unique_metric_idempotency_key',
+            ),
+        ]
         verbose_name_plural = 'Health Metrics'
     
     def __str__(self):
         return f"{self.user.email} - {self.metric_type}: {self.value}{self.unit}"
+    
+    def parse_value(self):
+        """Fill the numeric columns from value and unit"""
+        self.value_primary, self.value_secondary, self.unit_normalized = parse_reading(
+            self.metric_type, self.value, self.unit
+        )
+    
+    def save(self, *args, **kwargs):
+        self.parse_value()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'metric_type', 'value', 'unit'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, *self.PARSED_FIELDS}
+        super().save(*args, **kwargs)
+
+
+class HealthMetricRollup(models.Model):
+    """Aggregate of one user's metric readings over an hour, day or week"""
+    RESOLUTIONS = [
+        ('hour', 'Hour'),
+        ('day', 'Day'),
+        ('week', 'Week'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='metric_rollups')
+    metric_type = models.CharField(max_length=20, choices=HealthMetric.METRIC_TYPES)
+    resolution = models.CharField(max_length=4, choices=RESOLUTIONS)
+    bucket_start = models.DateTimeField()
+    
+    # Over value_primary of readings in the metric type's canonical unit
+    count = models.PositiveIntegerField(default=0)
+    min_value = models.FloatField()
+    max_value = models.FloatField()
+    sum_value = models.FloatField(default=0)
+    last_value = models.FloatField()
+    last_recorded_at = models.DateTimeField()
+    
+    class Meta:
+        unique_together = ('user', 'metric_type', 'resolution', 'bucket_start')
+        verbose_name_plural = 'Health Metric Rollups'
+    
+    def __str__(self):
+        return f"{self.user.email} - {self.metric_type} {self.resolution} {self.bucket_start}"
+    
+    @property
+    def mean_value(self):
+        return self.sum_value / self.count if self.count else None
+
+
+class CheckInSummary(models.Model):
+    """Streaks and a one-year check-in calendar per user, kept up to date on every check-in"""
+    CALENDAR_DAYS = 366
+    
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='checkin_summary')
+    current_streak = models.PositiveIntegerField(default=0, help_text="Consecutive days ending on last_check_in_date")
+    longest_streak = models.PositiveIntegerField(default=0)
+    total_checkins = models.PositiveIntegerField(default=0)
+    last_check_in_date = models.DateField(null=True, blank=True)
+    # Bit i is set when the user checked in i days before last_check_in_date
+    calendar = models.BinaryField(max_length=(CALENDAR_DAYS + 7) // 8, default=bytes)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name_plural = 'Check-in Summaries'
+    
+    def __str__(self):
+        return f"{self.user.email} - {self.current_streak} day streak"
+    
+    @property
+    def calendar_bits(self):
+        return int.from_bytes(bytes(self.calendar), 'little')
+    
+    @calendar_bits.setter
+    def calendar_bits(self, bits):
+        bits &= (1 << self.CALENDAR_DAYS) - 1
+        self.calendar = bits.to_bytes((self.CALENDAR_DAYS + 7) // 8, 'little')
@@ -0,0 +1,12 @@
+from core.pagination import KeysetPagination
+
+
+class CheckInPagination(KeysetPagination):
+    """Most recent check-ins first"""
+    ordering = ('-check_in_date', '-id')
+
+
+class HealthMetricPagination(KeysetPagination):
+    """Most recent readings first"""
+    ordering = ('-recorded_at', '-id')
+    page_size = 50
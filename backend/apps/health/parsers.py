@@ -0,0 +1,34 @@
+import codecs
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+from .ingest import MAX_ITEMS, InvalidItem
+
+
+class NDJSONParser(BaseParser):
+    """
+    Newline-delimited JSON, one object per line.
+
+    The body is decoded line by line as it is read. Lines that are not valid
+    JSON become InvalidItem entries so they can be reported per item.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        items = []
+        for number, raw in enumerate(stream, start=1):
+            line = decoder.decode(raw).strip()
+            if not line:
+                continue
+            if len(items) >= MAX_ITEMS:
+                raise ParseError(f'At most {MAX_ITEMS} items can be sent at once')
+            try:
+                items.append(json.loads(line))
+            except ValueError:
+                items.append(InvalidItem(f'Line {number} is not valid JSON'))
+        return items
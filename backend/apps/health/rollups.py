@@ -0,0 +1,193 @@
+"""
+Hourly, daily and weekly rollups of health metric readings.
+
+New readings are folded into their buckets with single UPDATE statements
+(count and sum add up, min/max use LEAST/GREATEST, the last value follows the
+latest reading), so writes never re-read raw rows. Edits and deletions cannot
+be subtracted from a min or max, so the affected buckets are recomputed from
+the raw readings instead. Only numeric readings in the metric type's
+canonical unit are rolled up.
+"""
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, Max, Min, Sum, Value, When
+from django.db.models.functions import Greatest, Least
+from django.utils import timezone
+
+from .models import HealthMetric, HealthMetricRollup
+from .units import CANONICAL_UNITS
+
+# Finest first
+RESOLUTION_SPANS = {
+    'hour': timedelta(hours=1),
+    'day': timedelta(days=1),
+    'week': timedelta(weeks=1),
+}
+
+
+def bucket_start(moment, resolution):
+    """Start of the bucket containing ``moment``, in the current time zone"""
+    local = timezone.make_naive(moment)
+    if resolution == 'hour':
+        return timezone.make_aware(local.replace(minute=0, second=0, microsecond=0))
+    start = local.replace(hour=0, minute=0, second=0, microsecond=0)
+    if resolution == 'week':
+        start -= timedelta(days=start.weekday())
+    return timezone.make_aware(start)
+
+
+def bucket_end(start, resolution):
+    return timezone.make_aware(timezone.make_naive(start) + RESOLUTION_SPANS[resolution])
+
+
+def is_rollable(metric_type, value, unit):
+    return value is not None and unit == CANONICAL_UNITS.get(metric_type)
+
+
+def _add(summaries, user_id, metric_type, recorded_at, value):
+    """Fold one reading into per-bucket [count, min, max, sum, last value, last time]"""
+    for resolution in RESOLUTION_SPANS:
+        key = (user_id, metric_type, resolution, bucket_start(recorded_at, resolution))
+        summary = summaries.get(key)
+        if summary is None:
+            summaries[key] = [1, value, value, value, value, recorded_at]
+            continue
+        summary[0] += 1
+        summary[1] = min(summary[1], value)
+        summary[2] = max(summary[2], value)
+        summary[3] += value
+        if recorded_at >= summary[5]:
+            summary[4], summary[5] = value, recorded_at
+
+
+def _rollup(key, summary):
+    user_id, metric_type, resolution, start = key
+    count, low, high, total, last, last_at = summary
+    return HealthMetricRollup(
+        user_id=user_id, metric_type=metric_type, resolution=resolution, bucket_start=start,
+        count=count, min_value=low, max_value=high, sum_value=total,
+        last_value=last, last_recorded_at=last_at,
+    )
+
+
+def _merge(key, summary):
+    user_id, metric_type, resolution, start = key
+    count, low, high, total, last, last_at = summary
+    return HealthMetricRollup.objects.filter(
+        user_id=user_id, metric_type=metric_type, resolution=resolution, bucket_start=start,
+    ).update(
+        count=F('count') + count,
+        min_value=Least(F('min_value'), Value(low)),
+        max_value=Greatest(F('max_value'), Value(high)),
+        sum_value=F('sum_value') + total,
+        last_value=Case(When(last_recorded_at__lte=last_at, then=Value(last)), default=F('last_value')),
+        last_recorded_at=Greatest(F('last_recorded_at'), Value(last_at)),
+    )
+
+
+def record(metrics):
+    """Fold newly created metrics into their rollups"""
+    summaries = {}
+    for metric in metrics:
+        if is_rollable(metric.metric_type, metric.value_primary, metric.unit_normalized):
+            _add(summaries, metric.user_id, metric.metric_type, metric.recorded_at, metric.value_primary)
+    if not summaries:
+        return
+    with transaction.atomic():
+        # A fixed order keeps concurrent writers from deadlocking on bucket rows
+        for key in sorted(summaries):
+            if _merge(key, summaries[key]):
+                continue
+            try:
+                with transaction.atomic():
+                    _rollup(key, summaries[key]).save(force_insert=True)
+            except IntegrityError:
+                # Created concurrently since the UPDATE above
+                _merge(key, summaries[key])
+
+
+def refresh(user_id, metric_type, moment):
+    """Recompute the buckets containing ``moment`` from the raw readings"""
+    readings = HealthMetric.objects.filter(
+        user_id=user_id, metric_type=metric_type,
+        unit_normalized=CANONICAL_UNITS.get(metric_type), value_primary__isnull=False,
+    )
+    for resolution in RESOLUTION_SPANS:
+        start = bucket_start(moment, resolution)
+        bucket = readings.filter(recorded_at__gte=start, recorded_at__lt=bucket_end(start, resolution))
+        rollups = HealthMetricRollup.objects.filter(
+            user_id=user_id, metric_type=metric_type, resolution=resolution, bucket_start=start,
+        )
+        stats = bucket.aggregate(count=Count('id'), low=Min('value_primary'), high=Max('value_primary'),
+                                 total=Sum('value_primary'))
+        if not stats['count']:
+            rollups.delete()
+            continue
+        last, last_at = bucket.order_by('-recorded_at', '-id').values_list('value_primary', 'recorded_at')[0]
+        HealthMetricRollup.objects.update_or_create(
+            user_id=user_id, metric_type=metric_type, resolution=resolution, bucket_start=start,
+            defaults={
+                'count': stats['count'], 'min_value': stats['low'], 'max_value': stats['high'],
+                'sum_value': stats['total'], 'last_value': last, 'last_recorded_at': last_at,
+            },
+        )
+
+
+def rebuild(readings, chunk_size=2000, progress=None):
+    """
+    Recreate rollups from raw readings, one (user, metric type) at a time.
+
+    ``readings`` is a HealthMetric queryset; existing rollups of the users and
+    metric types it covers must have been deleted. Returns the number of
+    rollup rows written.
+    """
+    rows = (
+        readings.filter(value_primary__isnull=False)
+        .order_by('user_id', 'metric_type', 'recorded_at')
+        .values_list('user_id', 'metric_type', 'recorded_at', 'value_primary', 'unit_normalized')
+    )
+    written = 0
+    summaries = {}
+    current = None
+
+    def flush():
+        HealthMetricRollup.objects.bulk_create(
+            [_rollup(key, summary) for key, summary in summaries.items()], batch_size=chunk_size
+        )
+        return len(summaries)
+
+    for user_id, metric_type, recorded_at, value, unit in rows.iterator(chunk_size=chunk_size):
+        if (user_id, metric_type) != current:
+            written += flush()
+            summaries.clear()
+            current = (user_id, metric_type)
+            if progress:
+                progress(written)
+        if is_rollable(metric_type, value, unit):
+            _add(summaries, user_id, metric_type, recorded_at, value)
+    written += flush()
+    return written
+
+
+def max_window(points):
+    """Longest window that the coarsest resolution draws in ``points`` buckets"""
+    return list(RESOLUTION_SPANS.values())[-1] * points
+
+
+def choose_resolution(start, end, points):
+    """Finest resolution that draws the window in at most ``points`` buckets"""
+    for resolution, span in RESOLUTION_SPANS.items():
+        if (end - start) / span <= points:
+            return resolution
+    raise ValueError(f"Window longer than {max_window(points)} for {points} points")
+
+
+def series(user, metric_type, start, end, points):
+    """(resolution, rollups) covering a time window within a point budget"""
+    resolution = choose_resolution(start, end, points)
+    rollups = HealthMetricRollup.objects.filter(
+        user=user, metric_type=metric_type, resolution=resolution,
+        bucket_start__gte=bucket_start(start, resolution), bucket_start__lte=end,
+    ).order_by('bucket_start')
+    return resolution, rollups
@@ -1,8 +1,30 @@
+from datetime import timedelta
+from django.utils import timezone
 from rest_framework import serializers
-from .models import DailyCheckIn, HealthGoal, HealthMetric
+from .models import CheckInSummary, DailyCheckIn, HealthGoal, HealthMetric, HealthMetricRollup
+from . import analytics, goals, rollups, streaks, trends
+
+class OrdinalChoiceField(serializers.ChoiceField):
+    """Choice field exchanging string values for the ordinals stored in the database"""
+    
+    def __init__(self, choices, **kwargs):
+        self.values = [value for value, label in choices]
+        super().__init__(choices=choices, **kwargs)
+    
+    def to_internal_value(self, data):
+        return self.values.index(super().to_internal_value(data)) + 1
+    
+    def to_representation(self, value):
+        if value in (None, ''):
+            return value
+        return self.values[value - 1]
+
 
 class DailyCheckInSerializer(serializers.ModelSerializer):
     """Serializer for Daily Check-in"""
+    mood = OrdinalChoiceField(DailyCheckIn.MOOD_CHOICES)
+    energy_level = OrdinalChoiceField(DailyCheckIn.ENERGY_CHOICES)
+    
     class Meta:
         model = DailyCheckIn
         fields = ('id', 'mood', 'energy_level', 'sleep_hours', 'exercise_minutes',
@@ -11,27 +33,133 @@ class DailyCheckInSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'check_in_date', 'created_at', 'updated_at')
 
 
+class CheckInSummarySerializer(serializers.ModelSerializer):
+    """Serializer for a user's streaks and check-in heatmap"""
+    current_streak = serializers.SerializerMethodField()
+    heatmap = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = CheckInSummary
+        fields = ('current_streak', 'longest_streak', 'total_checkins', 'last_check_in_date', 'heatmap')
+    
+    def get_current_streak(self, obj):
+        return streaks.current_streak(obj)
+    
+    def get_heatmap(self, obj):
+        start, days = streaks.heatmap(obj)
+        return {'start': start, 'days': days}
+
+
 class HealthGoalSerializer(serializers.ModelSerializer):
     """Serializer for Health Goals"""
     class Meta:
         model = HealthGoal
         fields = ('id', 'goal_type', 'description', 'target_value', 'progress',
-                  'is_active', 'start_date', 'target_date', 'created_at', 'updated_at')
-        read_only_fields = ('id', 'start_date', 'created_at', 'updated_at')
+                  'is_active', 'start_date', 'target_date', 'created_at', 'updated_at',
+                  'target_metric', 'target_comparator', 'target_number', 'target_aggregate',
+                  'target_window_days', 'current_value', 'baseline_value', 'evaluated_at')
+        read_only_fields = ('id', 'start_date', 'created_at', 'updated_at',
+                            'current_value', 'baseline_value', 'evaluated_at')
+    
+    def validate(self, attrs):
+        if self.instance is None and not attrs.get('target_metric'):
+            # Structure targets written as text ("8 hours", "2 l/day") where possible
+            attrs.update(goals.parse_target(attrs.get('goal_type'), attrs.get('target_value')) or {})
+        
+        def current(name):
+            return attrs.get(name, getattr(self.instance, name, None))
+        
+        if current('target_metric') and current('target_number') is None:
+            raise serializers.ValidationError({'target_number': 'Required when target_metric is set.'})
+        return attrs
 
 
 class HealthMetricSerializer(serializers.ModelSerializer):
     """Serializer for Health Metrics"""
     class Meta:
         model = HealthMetric
-        fields = ('id', 'metric_type', 'value', 'unit', 'notes', 'recorded_at')
-        read_only_fields = ('id', 'recorded_at')
+        fields = ('id', 'metric_type', 'value', 'unit', 'notes', 'recorded_at',
+                  'value_primary', 'value_secondary', 'unit_normalized')
+        read_only_fields = ('id', 'recorded_at', 'value_primary', 'value_secondary', 'unit_normalized')
 
 
 class CheckInStatsSerializer(serializers.Serializer):
     """Serializer for check-in statistics"""
     total_checkins = serializers.IntegerField()
-    average_mood = serializers.CharField()
-    average_energy = serializers.CharField()
+    average_mood = serializers.CharField(help_text="Mood level nearest to the mean")
+    average_energy = serializers.CharField(help_text="Energy level nearest to the mean")
+    mood_score = serializers.FloatField(help_text="Mean mood on a 1-5 scale")
+    energy_score = serializers.FloatField(help_text="Mean energy on a 1-5 scale")
     average_sleep = serializers.FloatField()
     total_exercise_minutes = serializers.IntegerField()
+
+
+class CheckInAnalyticsParamsSerializer(serializers.Serializer):
+    """Query parameters for check-in analytics; the window defaults to the last 30 days"""
+    granularity = serializers.ChoiceField(choices=analytics.GRANULARITIES, default='day')
+    
+    def get_fields(self):
+        # 'from' is a Python keyword, so these cannot be declared as class attributes
+        fields = super().get_fields()
+        fields['from'] = serializers.DateField(required=False)
+        fields['to'] = serializers.DateField(required=False)
+        return fields
+    
+    def validate(self, attrs):
+        end = attrs.get('to') or timezone.now().date()
+        start = attrs.get('from') or end - timedelta(days=29)
+        if start > end:
+            raise serializers.ValidationError("from must not be after to")
+        if analytics.bucket_count(start, end, attrs['granularity']) > analytics.MAX_BUCKETS:
+            raise serializers.ValidationError(
+                f"Window is limited to {analytics.MAX_BUCKETS} {attrs['granularity']} buckets"
+            )
+        attrs['from'], attrs['to'] = start, end
+        return attrs
+
+
+class MetricSeriesParamsSerializer(serializers.Serializer):
+    """
+    Query parameters for a metric series; the window defaults to the last 30
+    days and must fit into ``points`` weekly buckets
+    """
+    type = serializers.ChoiceField(choices=HealthMetric.METRIC_TYPES)
+    points = serializers.IntegerField(min_value=1, max_value=1000, default=200)
+    
+    def get_fields(self):
+        # 'from' is a Python keyword, so these cannot be declared as class attributes
+        fields = super().get_fields()
+        fields['from'] = serializers.DateTimeField(required=False)
+        fields['to'] = serializers.DateTimeField(required=False)
+        return fields
+    
+    def validate(self, attrs):
+        end = attrs.get('to') or timezone.now()
+        start = attrs.get('from') or end - timedelta(days=30)
+        if start >= end:
+            raise serializers.ValidationError("from must be before to")
+        if end - start > rollups.max_window(attrs['points']):
+            raise serializers.ValidationError(
+                f"The window is limited to {rollups.max_window(attrs['points']).days} days for {attrs['points']} points"
+            )
+        attrs['from'], attrs['to'] = start, end
+        return attrs
+
+
+class HealthMetricRollupSerializer(serializers.ModelSerializer):
+    """Serializer for one bucket of a metric series"""
+    mean_value = serializers.FloatField(read_only=True)
+    
+    class Meta:
+        model = HealthMetricRollup
+        fields = ('bucket_start', 'count', 'min_value', 'max_value', 'mean_value',
+                  'last_value', 'last_recorded_at')
+
+
+class MetricTrendParamsSerializer(serializers.Serializer):
+    """Query parameters for metric and check-in trends"""
+    series = serializers.ChoiceField(choices=trends.SERIES)
+    days = serializers.IntegerField(min_value=1, max_value=730, default=90)
+    window = serializers.IntegerField(min_value=2, max_value=500, default=7)
+    method = serializers.ChoiceField(choices=trends.ANOMALY_METHODS, default='zscore')
+    threshold = serializers.FloatField(min_value=0, required=False)
@@ -0,0 +1,90 @@
+from django.db.models import QuerySet
+from django.db.models.signals import post_init, post_save, post_delete, pre_save
+from django.dispatch import receiver
+from .models import DailyCheckIn, HealthGoal, HealthMetric
+from . import goals, rollups, streaks
+
+
+def _deleting(model, origin):
+    """Whether a deletion was started on ``model`` rather than cascaded from the user"""
+    return isinstance(origin, model) or (isinstance(origin, QuerySet) and origin.model is model)
+
+
+@receiver(post_init, sender=HealthMetric)
+def remember_reading(sender, instance, **kwargs):
+    """Remember which rollup buckets the metric counted in when it was loaded"""
+    instance._rollup_key = (instance.metric_type, instance.recorded_at) if instance.pk else None
+
+
+@receiver(post_save, sender=HealthMetric)
+def update_rollups_on_save(sender, instance, created, **kwargs):
+    """Fold new readings into their rollups and goals; recompute buckets and goals of edited ones"""
+    key = (instance.metric_type, instance.recorded_at)
+    if created:
+        rollups.record([instance])
+        goals.apply_metrics([instance])
+    else:
+        rollups.refresh(instance.user_id, *key)
+        old_key = getattr(instance, '_rollup_key', None)
+        if old_key and old_key != key:
+            rollups.refresh(instance.user_id, *old_key)
+        goals.refresh(instance.user_id, {instance.metric_type, (old_key or key)[0]})
+    instance._rollup_key = key
+
+
+@receiver(post_delete, sender=HealthMetric)
+def update_rollups_on_delete(sender, instance, origin=None, **kwargs):
+    """Recompute the buckets and goals a deleted reading counted in"""
+    # Deleting the user cascades to the rollups and goals as well
+    key = getattr(instance, '_rollup_key', None)
+    if _deleting(HealthMetric, origin) and key:
+        rollups.refresh(instance.user_id, *key)
+        goals.refresh(instance.user_id, [key[0]])
+
+
+@receiver(post_init, sender=DailyCheckIn)
+def remember_checkin(sender, instance, **kwargs):
+    """Remember the goal-tracked values as loaded, to tell which ones an edit changes"""
+    values = instance.__dict__
+    instance._goal_values = {name: values.get(name) for name in goals.CHECKIN_TARGETS} if instance.pk else None
+
+
+@receiver(post_save, sender=DailyCheckIn)
+def update_summary_on_save(sender, instance, created, **kwargs):
+    """Extend the user's streak and calendar with a new check-in and update goals it affects"""
+    if created:
+        streaks.record(instance.user_id, instance.check_in_date)
+    loaded = getattr(instance, '_goal_values', None)
+    changed = None if created or loaded is None else {
+        name for name, value in loaded.items() if getattr(instance, name) != value
+    }
+    goals.apply_checkin(instance, changed)
+    instance._goal_values = {name: getattr(instance, name) for name in goals.CHECKIN_TARGETS}
+
+
+@receiver(post_delete, sender=DailyCheckIn)
+def update_summary_on_delete(sender, instance, origin=None, **kwargs):
+    """Rebuild the user's streaks and check-in goals without the deleted check-in"""
+    # Deleting the user cascades to the summary and goals as well
+    if _deleting(DailyCheckIn, origin):
+        streaks.rebuild(instance.user_id)
+        goals.refresh(instance.user_id, goals.CHECKIN_TARGETS)
+
+
+@receiver(post_init, sender=HealthGoal)
+def remember_target(sender, instance, **kwargs):
+    """Remember the target as loaded, to re-evaluate the goal when it changes"""
+    values = instance.__dict__
+    instance._target = tuple(values.get(name) for name in (*HealthGoal.TARGET_FIELDS, 'is_active'))
+
+
+@receiver(pre_save, sender=HealthGoal)
+def evaluate_changed_target(sender, instance, update_fields=None, **kwargs):
+    """Evaluate new goals and goals whose target changed from the stored history"""
+    target = tuple(getattr(instance, name) for name in (*HealthGoal.TARGET_FIELDS, 'is_active'))
+    changed = instance._state.adding or target != getattr(instance, '_target', None)
+    if update_fields is None and instance.is_structured and changed:
+        instance.baseline_value = None
+        goals.recompute(instance)
+        goals.evaluate(instance)
+    instance._target = target
@@ -0,0 +1,87 @@
+"""
+Per-user check-in streaks and calendar heatmap.
+
+``CheckInSummary`` is updated in constant time when a check-in is written:
+a new day shifts the one-year calendar bitmap and either extends or restarts
+the current streak. Only deletions and out-of-order days, which cannot be
+applied incrementally, rebuild the summary from the user's check-in dates.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import CheckInSummary, DailyCheckIn
+
+
+def _mark(summary, day):
+    """Add a check-in day after the last one; False if the summary is unchanged"""
+    last = summary.last_check_in_date
+    if last is not None and day <= last:
+        return False
+    if last is None:
+        summary.calendar_bits = 1
+        summary.current_streak = 1
+    else:
+        gap = (day - last).days
+        summary.calendar_bits = (summary.calendar_bits << gap) | 1
+        summary.current_streak = summary.current_streak + 1 if gap == 1 else 1
+    summary.last_check_in_date = day
+    summary.total_checkins += 1
+    summary.longest_streak = max(summary.longest_streak, summary.current_streak)
+    return True
+
+
+def rebuild(user_id):
+    """Recompute a user's summary from all of their check-in dates"""
+    summary = CheckInSummary(user_id=user_id)
+    days = (
+        DailyCheckIn.objects.filter(user_id=user_id)
+        .order_by('check_in_date').values_list('check_in_date', flat=True)
+    )
+    for day in days.iterator():
+        _mark(summary, day)
+    summary, created = CheckInSummary.objects.update_or_create(
+        user_id=user_id,
+        defaults={
+            field: getattr(summary, field)
+            for field in ('current_streak', 'longest_streak', 'total_checkins', 'last_check_in_date', 'calendar')
+        },
+    )
+    return summary
+
+
+def record(user_id, day):
+    """Account for a new check-in of the user on ``day``"""
+    # Part of the caller's transaction when there is one; nothing here is retried
+    with transaction.atomic(savepoint=False):
+        summary = CheckInSummary.objects.select_for_update().filter(user_id=user_id).first()
+        if summary is None:
+            # First check-in since summaries were introduced; the new one is already stored
+            rebuild(user_id)
+            return
+        if day > (summary.last_check_in_date or day - timedelta(days=1)):
+            _mark(summary, day)
+            summary.save()
+        elif day < summary.last_check_in_date:
+            rebuild(user_id)
+
+
+def current_streak(summary, today=None):
+    """Streak as of ``today``; it stays alive until a full day is missed"""
+    today = today or timezone.localdate()
+    last = summary.last_check_in_date
+    if last is None or (today - last).days > 1:
+        return 0
+    return summary.current_streak
+
+
+def heatmap(summary, today=None):
+    """'0'/'1' per day for the year ending today, oldest first, and its first day"""
+    today = today or timezone.localdate()
+    days = CheckInSummary.CALENDAR_DAYS
+    bits = 0
+    if summary.last_check_in_date is not None:
+        bits = summary.calendar_bits << max((today - summary.last_check_in_date).days, 0)
+    marks = format(bits & ((1 << days) - 1), f'0{days}b')
+    return today - timedelta(days=days - 1), marks
@@ -0,0 +1,99 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from . import goals
+from .models import CheckInSummary, HealthMetric
+
+User = get_user_model()
+
+
+class MetricSeriesWindowTests(APITestCase):
+    """Metric series stay within the requested point budget"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='patient@example.com', email='patient@example.com')
+        cls.end = timezone.now()
+        for week in range(0, 300, 2):
+            HealthMetric.objects.create(
+                user=cls.user, metric_type='heart_rate', value='60', unit='bpm',
+                recorded_at=cls.end - timedelta(weeks=week),
+            )
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def get_series(self, days, points=None):
+        params = {
+            'type': 'heart_rate',
+            'from': (self.end - timedelta(days=days)).isoformat(),
+            'to': self.end.isoformat(),
+        }
+        if points is not None:
+            params['points'] = points
+        return self.client.get('/api/metrics/series/', params)
+
+    def test_long_window_within_budget(self):
+        response = self.get_series(days=7 * 150, points=200)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['resolution'], 'week')
+        self.assertTrue(response.data['points'])
+        self.assertLessEqual(len(response.data['points']), 200)
+
+    def test_window_longer_than_budget_is_rejected(self):
+        self.assertEqual(self.get_series(days=7 * 201, points=200).status_code, 400)
+        self.assertEqual(self.get_series(days=7 * 201).status_code, 400)
+        self.assertEqual(self.get_series(days=365 * 100, points=1000).status_code, 400)
+
+    def test_more_points_allow_longer_window(self):
+        response = self.get_series(days=7 * 201, points=1000)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['resolution'], 'week')
+
+
+class ParseTargetTests(SimpleTestCase):
+    """Free-text goal targets parse into the right comparator"""
+
+    def comparator(self, goal_type, text):
+        return goals.parse_target(goal_type, text)['target_comparator']
+
+    def test_at_most_words(self):
+        for text in ('under 2000 ml', 'Below 30 minutes', 'less than 6 hours', 'max 3 meals',
+                     'at most 2 litres', '< 4 glasses', 'Max. 5 hours'):
+            with self.subTest(text=text):
+                self.assertEqual(self.comparator('fitness', text), 'lte')
+
+    def test_words_containing_at_most_words(self):
+        for goal_type, text in (('sleep', '8 hours unless travelling'), ('fitness', '30 minutes of lessons'),
+                                ('fitness', 'maximum effort 45 minutes'), ('hydration', '8 glasses, no thunder')):
+            with self.subTest(text=text):
+                self.assertEqual(self.comparator(goal_type, text), 'gte')
+
+
+class CheckInSummaryTests(APITestCase):
+    """Check-ins maintain the summary and reading it never writes"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='patient@example.com', email='patient@example.com')
+        self.client.force_authenticate(self.user)
+
+    def test_summary_without_checkins_is_not_stored(self):
+        response = self.client.get('/api/checkins/summary/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_checkins'], 0)
+        self.assertEqual(response.data['current_streak'], 0)
+        self.assertFalse(CheckInSummary.objects.exists())
+
+    def test_checkin_creates_summary(self):
+        response = self.client.put('/api/checkins/today/', {
+            'mood': 'good', 'energy_level': 'high', 'sleep_hours': 7,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(CheckInSummary.objects.filter(user=self.user).exists())
+        response = self.client.get('/api/checkins/summary/')
+        self.assertEqual(response.data['total_checkins'], 1)
+        self.assertEqual(response.data['current_streak'], 1)
@@ -0,0 +1,194 @@
+"""
+Trend and anomaly analytics over a user's metric and check-in history.
+
+A series is loaded with one ``values_list`` query into columnar NumPy arrays
+(timestamps in days, values). Rolling statistics, slopes, baselines and
+anomaly scores are then computed with whole-array operations instead of
+per-row Python loops.
+"""
+from datetime import date, datetime, timezone as dt_timezone
+
+import numpy as np
+
+from .models import DailyCheckIn, HealthMetric
+from .units import CANONICAL_UNITS
+
+SECONDS_PER_DAY = 86400
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+CHECKIN_SERIES = {
+    'sleep_hours': 'hours',
+    'exercise_minutes': 'minutes',
+    'water_intake': 'ml',
+}
+SERIES = tuple(value for value, label in HealthMetric.METRIC_TYPES) + tuple(CHECKIN_SERIES)
+
+# Reference ranges in the canonical unit, used for out-of-range flags
+REFERENCE_RANGES = {
+    'heart_rate': (50, 100),
+    'blood_pressure': (90, 140),
+    'blood_sugar': (70, 140),
+    'temperature': (35.5, 37.8),
+    'sleep_hours': (7, 9),
+}
+
+ANOMALY_METHODS = ('zscore', 'iqr')
+
+
+def load_series(user, series, since):
+    """(days since epoch, values) of a user's series from ``since`` onwards, oldest first"""
+    if series in CHECKIN_SERIES:
+        rows = list(
+            DailyCheckIn.objects.filter(user=user, check_in_date__gte=since.date())
+            .order_by('check_in_date').values_list('check_in_date', series)
+        )
+        times = np.fromiter((day.toordinal() for day, value in rows), dtype=float, count=len(rows))
+        times -= EPOCH_ORDINAL
+    else:
+        rows = list(
+            HealthMetric.objects.filter(
+                user=user, metric_type=series, recorded_at__gte=since,
+                unit_normalized=CANONICAL_UNITS[series], value_primary__isnull=False,
+            ).order_by('recorded_at').values_list('recorded_at', 'value_primary')
+        )
+        times = np.fromiter((moment.timestamp() for moment, value in rows), dtype=float, count=len(rows))
+        times /= SECONDS_PER_DAY
+    values = np.fromiter((value for moment, value in rows), dtype=float, count=len(rows))
+    return times, values
+
+
+def rolling_mean(values, window):
+    """Mean of each point and the ``window - 1`` before it; NaN until the window fills"""
+    result = np.full(values.shape, np.nan)
+    if window <= len(values):
+        sums = np.cumsum(np.concatenate(([0.0], values)))
+        result[window - 1:] = (sums[window:] - sums[:-window]) / window
+    return result
+
+
+def rolling_std(values, window):
+    """Population standard deviation over the same windows as ``rolling_mean``"""
+    result = np.full(values.shape, np.nan)
+    if window <= len(values):
+        # Centred so large, nearly constant readings (weight in grams) do not
+        # cancel out in the sum of squares minus the squared sum
+        centred = values - values.mean()
+        sums = np.cumsum(np.concatenate(([0.0], centred)))
+        squares = np.cumsum(np.concatenate(([0.0], centred * centred)))
+        mean = (sums[window:] - sums[:-window]) / window
+        variance = (squares[window:] - squares[:-window]) / window - mean * mean
+        result[window - 1:] = np.sqrt(np.maximum(variance, 0))
+    return result
+
+
+def slope(times, values):
+    """Least-squares change per day"""
+    if len(values) < 2:
+        return None
+    dx = times - times.mean()
+    denominator = np.dot(dx, dx)
+    if not denominator:
+        return None
+    return float(np.dot(dx, values - values.mean()) / denominator)
+
+
+def zscore_anomalies(values, threshold=3.0):
+    """(mask, scores) of points more than ``threshold`` standard deviations from the mean"""
+    if len(values) < 2:
+        return np.zeros(values.shape, dtype=bool), np.zeros(values.shape)
+    std = values.std()
+    if not std:
+        return np.zeros(values.shape, dtype=bool), np.zeros(values.shape)
+    scores = (values - values.mean()) / std
+    return np.abs(scores) > threshold, scores
+
+
+def iqr_anomalies(values, threshold=1.5):
+    """(mask, scores) of points beyond ``threshold`` interquartile ranges outside the quartiles"""
+    if not len(values):
+        return np.zeros(values.shape, dtype=bool), np.zeros(values.shape)
+    q1, q3 = np.percentile(values, [25, 75])
+    iqr = q3 - q1
+    below = (q1 - values) / iqr if iqr else np.zeros(values.shape)
+    above = (values - q3) / iqr if iqr else np.zeros(values.shape)
+    scores = np.where(values < q1, -below, np.where(values > q3, above, 0.0))
+    return (values < q1 - threshold * iqr) | (values > q3 + threshold * iqr), scores
+
+
+def daily_minimums(times, values):
+    """(days, minimum value of each day) for points sorted by time"""
+    days = np.floor(times)
+    starts = np.flatnonzero(np.concatenate(([True], days[1:] != days[:-1])))
+    return days[starts], np.minimum.reduceat(values, starts)
+
+
+def resting_baseline(times, values, days=30):
+    """Median of the daily minimum heart rate over the last ``days`` days"""
+    if not len(values):
+        return None
+    day_starts, minimums = daily_minimums(times, values)
+    recent = minimums[day_starts > day_starts[-1] - days]
+    return float(np.median(recent))
+
+
+def _isoformat(series, day):
+    if series in CHECKIN_SERIES:
+        return date.fromordinal(int(round(day)) + EPOCH_ORDINAL).isoformat()
+    return datetime.fromtimestamp(day * SECONDS_PER_DAY, dt_timezone.utc).isoformat()
+
+
+def _number(value):
+    return None if np.isnan(value) else round(float(value), 3)
+
+
+def analyze(user, series, since, window=7, method='zscore', threshold=None, limit=1000):
+    """Summary, rolling statistics, anomalies and out-of-range points of a series"""
+    times, values = load_series(user, series, since)
+    if method == 'iqr':
+        anomalous, scores = iqr_anomalies(values, 1.5 if threshold is None else threshold)
+    else:
+        anomalous, scores = zscore_anomalies(values, 3.0 if threshold is None else threshold)
+
+    low, high = REFERENCE_RANGES.get(series, (None, None))
+    out_of_range = np.zeros(values.shape, dtype=bool)
+    if low is not None:
+        out_of_range = (values < low) | (values > high)
+
+    means = rolling_mean(values, window)
+    stds = rolling_std(values, window)
+    # Only the most recent points are returned; statistics cover the whole series
+    shown = np.arange(max(len(values) - limit, 0), len(values))
+    flagged = np.flatnonzero(anomalous | out_of_range)
+
+    return {
+        'series': series,
+        'unit': CANONICAL_UNITS.get(series) or CHECKIN_SERIES.get(series),
+        'count': len(values),
+        'mean': _number(values.mean()) if len(values) else None,
+        'std': _number(values.std()) if len(values) else None,
+        'min': _number(values.min()) if len(values) else None,
+        'max': _number(values.max()) if len(values) else None,
+        'slope_per_day': slope(times, values),
+        'recent_slope_per_day': slope(times[-window:], values[-window:]),
+        'resting_baseline': resting_baseline(times, values) if series == 'heart_rate' else None,
+        'reference_range': [low, high] if low is not None else None,
+        'points': [
+            {
+                'at': _isoformat(series, times[i]),
+                'value': _number(values[i]),
+                'rolling_mean': _number(means[i]),
+                'rolling_std': _number(stds[i]),
+            }
+            for i in shown
+        ],
+        'flags': [
+            {
+                'at': _isoformat(series, times[i]),
+                'value': _number(values[i]),
+                'score': _number(scores[i]),
+                'anomaly': bool(anomalous[i]),
+                'out_of_range': bool(out_of_range[i]),
+            }
+            for i in flagged[-limit:]
+        ],
+    }
@@ -0,0 +1,91 @@
+"""
+Parsing and unit normalization of health metric readings.
+
+``HealthMetric.value`` is free text such as "120/80", "72" or "98.6 F". It is
+parsed into a primary number, an optional secondary number (diastolic blood
+pressure) and converted to the canonical unit of the metric type, so numeric
+queries can run on the stored columns.
+"""
+import re
+
+# Canonical unit of each metric type
+CANONICAL_UNITS = {
+    'blood_pressure': 'mmHg',
+    'heart_rate': 'bpm',
+    'blood_sugar': 'mg/dL',
+    'temperature': '°C',
+    'weight': 'kg',
+}
+
+# Spellings seen in the wild, lower-cased and without spaces
+UNIT_ALIASES = {
+    'mmhg': 'mmHg',
+    'kpa': 'kPa',
+    'bpm': 'bpm',
+    'beats/min': 'bpm',
+    '/min': 'bpm',
+    'mg/dl': 'mg/dL',
+    'mgdl': 'mg/dL',
+    'mmol/l': 'mmol/L',
+    'mmol': 'mmol/L',
+    '°c': '°C',
+    'c': '°C',
+    'degc': '°C',
+    'celsius': '°C',
+    '°f': '°F',
+    'f': '°F',
+    'degf': '°F',
+    'fahrenheit': '°F',
+    'kg': 'kg',
+    'kgs': 'kg',
+    'kilograms': 'kg',
+    'g': 'g',
+    'lb': 'lb',
+    'lbs': 'lb',
+    'pounds': 'lb',
+}
+
+# (metric type, unit) -> (factor, offset) so that canonical = value * factor + offset
+CONVERSIONS = {
+    ('blood_pressure', 'kPa'): (7.50062, 0),
+    ('blood_sugar', 'mmol/L'): (18.0182, 0),
+    ('temperature', '°F'): (5 / 9, -32 * 5 / 9),
+    ('weight', 'lb'): (0.45359237, 0),
+    ('weight', 'g'): (0.001, 0),
+}
+
+_VALUE_RE = re.compile(r'^\s*(-?\d+(?:\.\d+)?)\s*(?:/\s*(-?\d+(?:\.\d+)?))?\s*(.*?)\s*$')
+
+
+def normalize_unit(unit):
+    """Canonical spelling of a unit, or the stripped input if it is unknown"""
+    unit = (unit or '').strip()
+    return UNIT_ALIASES.get(unit.lower().replace(' ', ''), unit)
+
+
+def parse_reading(metric_type, value, unit=''):
+    """
+    (primary, secondary, unit) of a reading in the metric's canonical unit.
+
+    Numbers in an unknown unit are kept unconverted along with that unit;
+    unparseable values give (None, None, '').
+    """
+    match = _VALUE_RE.match(value or '')
+    if not match:
+        return None, None, ''
+    primary = float(match.group(1))
+    secondary = float(match.group(2)) if match.group(2) is not None else None
+
+    canonical = CANONICAL_UNITS.get(metric_type, '')
+    # A unit typed into the value ("72 bpm") counts when the unit field is blank
+    unit = normalize_unit(unit or match.group(3)) or canonical
+    if unit != canonical:
+        conversion = CONVERSIONS.get((metric_type, unit))
+        if conversion is None:
+            return primary, secondary, unit
+        factor, offset = conversion
+        primary = primary * factor + offset
+        if secondary is not None:
+            secondary = secondary * factor + offset
+        unit = canonical
+    return round(primary, 3), None if secondary is None else round(secondary, 3), unit
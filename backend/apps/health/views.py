@@ -1,19 +1,25 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.parsers import JSONParser
 from django.utils import timezone
 from datetime import timedelta
-from .models import DailyCheckIn, HealthGoal, HealthMetric
+from .models import CheckInSummary, DailyCheckIn, HealthGoal, HealthMetric
 from .serializers import (
-    DailyCheckInSerializer, HealthGoalSerializer, HealthMetricSerializer,
-    CheckInStatsSerializer
+    DailyCheckInSerializer, CheckInSummarySerializer, HealthGoalSerializer, HealthMetricSerializer,
+    CheckInStatsSerializer, CheckInAnalyticsParamsSerializer, MetricSeriesParamsSerializer,
+    HealthMetricRollupSerializer, MetricTrendParamsSerializer
 )
+from .pagination import CheckInPagination, HealthMetricPagination
+from .parsers import NDJSONParser
+from . import analytics, checkins, ingest, rollups, trends
 
 class DailyCheckInViewSet(viewsets.ModelViewSet):
     """ViewSet for Daily Check-in operations"""
     serializer_class = DailyCheckInSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = CheckInPagination
     
     def get_queryset(self):
         return DailyCheckIn.objects.filter(user=self.request.user)
@@ -21,9 +27,18 @@ class DailyCheckInViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
     
-    @action(detail=False, methods=['get'])
+    @action(detail=False, methods=['get', 'put'])
     def today(self, request):
-        """Get today's check-in"""
+        """Get today's check-in, or create or replace it with PUT"""
+        if request.method == 'PUT':
+            serializer = self.get_serializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            checkin, created = checkins.upsert_today(request.user, serializer.validated_data)
+            return Response(
+                self.get_serializer(checkin).data,
+                status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+            )
+        
         today = timezone.now().date()
         try:
             checkin = DailyCheckIn.objects.get(user=request.user, check_in_date=today)
@@ -32,6 +47,15 @@ class DailyCheckInViewSet(viewsets.ModelViewSet):
         except DailyCheckIn.DoesNotExist:
             return Response({'detail': 'No check-in for today'}, status=status.HTTP_404_NOT_FOUND)
     
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        """Get current and longest streak and a one-year check-in heatmap"""
+        summary = CheckInSummary.objects.filter(user=request.user).first()
+        if summary is None:
+            # No check-ins yet: the first one creates the summary, reads never write
+            summary = CheckInSummary(user=request.user)
+        return Response(CheckInSummarySerializer(summary).data)
+    
     @action(detail=False, methods=['get'])
     def weekly(self, request):
         """Get past 7 days check-ins"""
@@ -41,10 +65,11 @@ class DailyCheckInViewSet(viewsets.ModelViewSet):
         checkins = DailyCheckIn.objects.filter(
             user=request.user,
             check_in_date__gte=seven_days_ago
-        ).order_by('-check_in_date')
+        )
         
-        serializer = self.get_serializer(checkins, many=True)
-        return Response(serializer.data)
+        page = self.paginate_queryset(checkins)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
     
     @action(detail=False, methods=['get'])
     def monthly(self, request):
@@ -55,10 +80,11 @@ class DailyCheckInViewSet(viewsets.ModelViewSet):
         checkins = DailyCheckIn.objects.filter(
             user=request.user,
             check_in_date__gte=thirty_days_ago
-        ).order_by('-check_in_date')
+        )
         
-        serializer = self.get_serializer(checkins, many=True)
-        return Response(serializer.data)
+        page = self.paginate_queryset(checkins)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
     
     @action(detail=False, methods=['get'])
     def stats(self, request):
@@ -71,25 +97,44 @@ class DailyCheckInViewSet(viewsets.ModelViewSet):
             check_in_date__gte=thirty_days_ago
         )
         
-        if not checkins.exists():
+        summary = analytics.summary(checkins)
+        if not summary['checkins']:
             return Response({'detail': 'No check-ins available'}, status=status.HTTP_404_NOT_FOUND)
         
-        # Calculate stats
-        moods = [c.mood for c in checkins]
-        energies = [c.energy_level for c in checkins]
-        avg_sleep = sum([c.sleep_hours for c in checkins]) / len(checkins)
-        total_exercise = sum([c.exercise_minutes for c in checkins])
-        
         stats_data = {
-            'total_checkins': len(checkins),
-            'average_mood': max(moods, key=moods.count) if moods else 'N/A',
-            'average_energy': max(energies, key=energies.count) if energies else 'N/A',
-            'average_sleep': round(avg_sleep, 2),
-            'total_exercise_minutes': total_exercise,
+            'total_checkins': summary['checkins'],
+            'average_mood': DailyCheckIn.MOOD_CHOICES[int(summary['average_mood'] + 0.5) - 1][0],
+            'average_energy': DailyCheckIn.ENERGY_CHOICES[int(summary['average_energy_level'] + 0.5) - 1][0],
+            'mood_score': summary['average_mood'],
+            'energy_score': summary['average_energy_level'],
+            'average_sleep': summary['average_sleep_hours'],
+            'total_exercise_minutes': summary['total_exercise_minutes'],
         }
         
         serializer = CheckInStatsSerializer(stats_data)
         return Response(serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    def analytics(self, request):
+        """Get check-in totals, averages and mood/energy distributions bucketed by day, week or month"""
+        return self._analytics_response(request, DailyCheckIn.objects.filter(user=request.user))
+    
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def cohort_analytics(self, request):
+        """Get check-in analytics across all users (staff only)"""
+        return self._analytics_response(request, DailyCheckIn.objects.all())
+    
+    def _analytics_response(self, request, checkins):
+        params = CheckInAnalyticsParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        
+        data = analytics.analyze(
+            checkins,
+            params.validated_data['from'],
+            params.validated_data['to'],
+            params.validated_data['granularity'],
+        )
+        return Response(data)
 
 
 class HealthGoalViewSet(viewsets.ModelViewSet):
@@ -124,6 +169,7 @@ class HealthMetricViewSet(viewsets.ModelViewSet):
     """ViewSet for Health Metrics"""
     serializer_class = HealthMetricSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = HealthMetricPagination
     
     def get_queryset(self):
         return HealthMetric.objects.filter(user=self.request.user)
@@ -142,7 +188,56 @@ class HealthMetricViewSet(viewsets.ModelViewSet):
         metrics = HealthMetric.objects.filter(
             user=request.user,
             metric_type=metric_type
-        ).order_by('-recorded_at')[:50]
+        )
         
-        serializer = self.get_serializer(metrics, many=True)
-        return Response(serializer.data)
+        page = self.paginate_queryset(metrics)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    def series(self, request):
+        """Get hourly, daily or weekly aggregates of a metric type over a time window"""
+        params = MetricSeriesParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        
+        resolution, buckets = rollups.series(request.user, data['type'], data['from'], data['to'], data['points'])
+        return Response({
+            'type': data['type'],
+            'unit': rollups.CANONICAL_UNITS[data['type']],
+            'resolution': resolution,
+            'from': data['from'],
+            'to': data['to'],
+            'points': HealthMetricRollupSerializer(buckets, many=True).data,
+        })
+    
+    @action(detail=False, methods=['get'])
+    def trends(self, request):
+        """Get rolling statistics, slope, anomalies and out-of-range readings of a metric or check-in series"""
+        params = MetricTrendParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        
+        result = trends.analyze(
+            request.user,
+            data['series'],
+            timezone.now() - timedelta(days=data['days']),
+            window=data['window'],
+            method=data['method'],
+            threshold=data.get('threshold'),
+        )
+        return Response(result)
+    
+    @action(detail=False, methods=['post'], parser_classes=[JSONParser, NDJSONParser])
+    def bulk(self, request):
+        """Record many metrics from a JSON array or an NDJSON stream"""
+        items = request.data
+        if not isinstance(items, list):
+            return Response({'detail': 'Expected a JSON array or NDJSON body'},
+                          status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > ingest.MAX_ITEMS:
+            return Response({'detail': f'At most {ingest.MAX_ITEMS} items can be sent at once'},
+                          status=status.HTTP_400_BAD_REQUEST)
+        
+        result = ingest.ingest(request.user, items)
+        return Response(result)
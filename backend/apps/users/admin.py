@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import CustomUser, UserProfile
+from .models import CustomUser, RevokedToken, UserProfile
 
 @admin.register(CustomUser)
 class UserAdmin(BaseUserAdmin):
@@ -13,3 +13,9 @@ class UserAdmin(BaseUserAdmin):
 class UserProfileAdmin(admin.ModelAdmin):
     list_display = ('user', 'height', 'weight', 'blood_type', 'created_at')
     search_fields = ('user__email',)
+
+@admin.register(RevokedToken)
+class RevokedTokenAdmin(admin.ModelAdmin):
+    list_display = ('jti', 'user', 'token_type', 'expires_at', 'created_at')
+    list_filter = ('token_type',)
+    search_fields = ('jti', 'user__email')
@@ -0,0 +1,125 @@
+"""
+JWT authentication that resolves the user from a short-lived cache.
+
+The stock ``JWTAuthentication`` loads the user row on every request. Here the
+few fields needed to authorize a request (id, active and staff flags, token
+version) are cached per (user id, token version), and a cache hit yields a
+user instance with only those fields loaded; the rest of the row is fetched
+in one query the first time another field is read. Most views only filter by
+``request.user`` and so run without any authentication query.
+
+Tokens carry the user's ``token_version``. Changing the password or revoking
+all sessions bumps it, which rejects every token issued before; any save or
+deletion of the user drops the cached entry once the transaction commits.
+Individually revoked tokens (logout, rotated refresh tokens) are rejected
+through the revocation list.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import router, transaction
+from django.db.models import DEFERRED, F
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import revocation
+
+TOKEN_VERSION_CLAIM = 'token_version'
+PRINCIPAL_KEY = 'auth:principal:{user_id}:{version}'
+
+# Fields cached per user; everything else is loaded lazily
+PRINCIPAL_FIELDS = ('id', 'email', 'username', 'is_active', 'is_staff', 'is_superuser', 'token_version')
+
+
+def principal_key(user_id, version):
+    return PRINCIPAL_KEY.format(user_id=user_id, version=version)
+
+
+def forget_principal(user_id, *versions):
+    """Drop cached principals of a user once the current transaction commits"""
+    keys = [principal_key(user_id, version) for version in versions]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def revoke_all_sessions(user):
+    """Revoke every token issued to the user so far"""
+    get_user_model().objects.filter(pk=user.pk).update(token_version=F('token_version') + 1)
+    # update() sends no post_save
+    forget_principal(user.pk, user.token_version)
+    user.token_version += 1
+
+
+def token_version_is_current(user_id, version):
+    """Whether tokens of this version are still valid for an active user"""
+    if cache.get(principal_key(user_id, version)) is not None:
+        return True
+    current = (
+        get_user_model().objects.filter(pk=user_id, is_active=True)
+        .values_list('token_version', flat=True).first()
+    )
+    return current == version
+
+
+def lazy_user(principal):
+    """User instance with only the cached fields loaded"""
+    User = get_user_model()
+    values = [principal.get(field.attname, DEFERRED) for field in User._meta.concrete_fields]
+    user = User.from_db(router.db_for_read(User), None, values)
+    user._lazy_principal = True
+    return user
+
+
+class VersionedRefreshToken(RefreshToken):
+    """Refresh token (and the access tokens made from it) carrying the user's token version"""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token[TOKEN_VERSION_CLAIM] = user.token_version
+        return token
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that serves the user from the principal cache"""
+    
+    def get_validated_token(self, raw_token):
+        validated_token = super().get_validated_token(raw_token)
+        if settings.AUTH_CHECK_ACCESS_REVOCATION and revocation.is_revoked(validated_token):
+            raise InvalidToken(_('Token has been revoked'))
+        return validated_token
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+        # Tokens issued before versioning count as version 0
+        version = validated_token.get(TOKEN_VERSION_CLAIM, 0)
+
+        key = principal_key(user_id, version)
+        principal = cache.get(key)
+        if principal is not None:
+            return lazy_user(principal)
+
+        try:
+            user = self.user_model.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        if not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        if user.token_version != version:
+            raise AuthenticationFailed(_('Token has been revoked'), code='token_revoked')
+
+        if settings.AUTH_PRINCIPAL_CACHE_TIMEOUT:
+            principal = {field: getattr(user, field) for field in PRINCIPAL_FIELDS}
+            cache.set(key, principal, settings.AUTH_PRINCIPAL_CACHE_TIMEOUT)
+        return user
+
+
+async def authenticate(request):
+    """(user, token) for a request to a plain async view, None without credentials"""
+    return await sync_to_async(CachedJWTAuthentication().authenticate)(request)
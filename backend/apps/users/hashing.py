@@ -0,0 +1,139 @@
+"""
+Password hashing off the request workers.
+
+PBKDF2 is deliberately slow, and a burst of logins used to pin every worker
+on it. Hashes are now computed on a dedicated, bounded thread pool (hashlib
+releases the GIL while hashing) and awaited by the async auth views, so the
+event loop and the workers keep serving other requests. Admission is bounded:
+when ``PASSWORD_HASHING_WORKERS`` hashes are running and
+``PASSWORD_HASHING_QUEUE`` more are waiting, new ones are refused straight
+away with ``HashingBusy`` (HTTP 429), and a hash that does not finish within
+``PASSWORD_HASHING_TIMEOUT`` seconds raises ``HashingTimeout`` (HTTP 503).
+
+Hashing threads run at the lowest OS scheduling priority where supported
+(``HASHING_NICENESS``), so during a login storm request threads keep the CPU
+and hashes take the time they leave idle rather than an equal share of it.
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+HASHING_NICENESS = 19
+
+
+class HashingBusy(Exception):
+    """The hashing pool and its queue are full"""
+
+
+class HashingTimeout(Exception):
+    """A hash did not finish in time"""
+
+
+def _lower_priority():
+    """Pool thread initializer; Linux applies niceness to single threads"""
+    if hasattr(os, 'setpriority') and hasattr(threading, 'get_native_id'):
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), HASHING_NICENESS)
+        except OSError:
+            pass
+
+
+class HashingPool:
+    """Thread pool with a hard limit on running plus queued hashes"""
+
+    def __init__(self, workers, queue):
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix='password-hashing', initializer=_lower_priority,
+        )
+        self.limit = workers + queue
+        self.pending = 0
+        self.lock = threading.Lock()
+
+    def busy(self):
+        return self.pending >= self.limit
+
+    def _release(self, future=None):
+        with self.lock:
+            self.pending -= 1
+
+    def submit(self, function, *args):
+        with self.lock:
+            if self.pending >= self.limit:
+                raise HashingBusy()
+            self.pending += 1
+        try:
+            future = self.executor.submit(function, *args)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = HashingPool(settings.PASSWORD_HASHING_WORKERS, settings.PASSWORD_HASHING_QUEUE)
+    return _pool
+
+
+def check_capacity():
+    """Raise HashingBusy early, before a request does any other work, if the pool is full"""
+    if get_pool().busy():
+        raise HashingBusy()
+
+
+async def run(function, *args):
+    """Run a hashing function on the pool and wait for it without blocking the event loop"""
+    future = get_pool().submit(function, *args)
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(future), settings.PASSWORD_HASHING_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HashingTimeout()
+
+
+def _verify(password, encoded):
+    """(valid, needs rehash) of a password against a stored hash"""
+    if not encoded or not hashers.is_password_usable(encoded):
+        # Hash anyway so unusable passwords take as long as wrong ones
+        hashers.make_password(password)
+        return False, False
+    # Django's own check, which also hardens the runtime of wrong passwords
+    # against hashes with an outdated work factor; the setter only notes the rehash
+    outdated = []
+    valid = hashers.check_password(password, encoded, setter=outdated.append)
+    return valid, bool(outdated)
+
+
+async def make_password(password):
+    return await run(hashers.make_password, password)
+
+
+async def check_password(user, password):
+    """
+    Whether the password is the user's; ``user.password`` must be loaded.
+
+    A correct password stored with outdated hasher settings is re-hashed and
+    saved, as Django's check_password() does, without counting as a password
+    change (existing tokens stay valid).
+    """
+    valid, needs_rehash = await run(_verify, password, user.password)
+    if needs_rehash:
+        user.password = await make_password(password)
+        await user.asave(update_fields=['password'])
+    return valid
+
+
+async def reject_password(password):
+    """Spend the time of one hash, so unknown accounts are not revealed by timing"""
+    await make_password(password)
@@ -0,0 +1,100 @@
+import json
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure read latency of a running server alone and during a storm of logins; "
+        "run against an ASGI server with production hasher settings"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://localhost:8000')
+        parser.add_argument('--username', required=True)
+        parser.add_argument('--password', required=True)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--storm', type=int, default=32, help="Concurrent login clients")
+        parser.add_argument('--seconds', type=float, default=10)
+
+    def _post(self, path, data):
+        """(status, JSON body or None, Retry-After seconds or None)"""
+        request = urllib.request.Request(
+            self.url + path, data=json.dumps(data).encode(), headers={'Content-Type': 'application/json'},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                return response.status, json.loads(response.read()), None
+        except urllib.error.HTTPError as error:
+            retry_after = error.headers.get('Retry-After')
+            return error.code, None, float(retry_after) if retry_after else None
+
+    def _read(self, access):
+        request = urllib.request.Request(self.url + '/api/users/me/', headers={'Authorization': f'Bearer {access}'})
+        with urllib.request.urlopen(request, timeout=60) as response:
+            response.read()
+
+    def _phase(self, access, storm):
+        stop = threading.Event()
+        latencies, statuses, lock = [], Counter(), threading.Lock()
+
+        def reader():
+            while not stop.is_set():
+                started = time.perf_counter()
+                self._read(access)
+                with lock:
+                    latencies.append(time.perf_counter() - started)
+
+        def login():
+            while not stop.is_set():
+                status, _, retry_after = self._post('/api/auth/token/', self.credentials)
+                with lock:
+                    statuses[status] += 1
+                if retry_after:
+                    # Back off as well-behaved clients do
+                    stop.wait(retry_after)
+
+        threads = [threading.Thread(target=reader) for _ in range(self.readers)]
+        threads += [threading.Thread(target=login) for _ in range(storm)]
+        for thread in threads:
+            thread.start()
+        time.sleep(self.seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        return latencies, statuses
+
+    def _report(self, name, latencies, statuses):
+        ms = [latency * 1000 for latency in latencies]
+        line = (
+            f"{name:<12} {len(ms):6} reads   p50 {statistics.median(ms):8.1f} ms   "
+            f"p95 {percentile(ms, 0.95):8.1f} ms   p99 {percentile(ms, 0.99):8.1f} ms"
+        )
+        if statuses:
+            line += '   logins ' + ', '.join(f"{status}: {count}" for status, count in sorted(statuses.items()))
+        self.stdout.write(line)
+
+    def handle(self, *args, **options):
+        self.url = options['url'].rstrip('/')
+        self.readers, self.seconds = options['readers'], options['seconds']
+        self.credentials = {'username': options['username'], 'password': options['password']}
+
+        status, tokens, _ = self._post('/api/auth/token/', self.credentials)
+        if status != 200:
+            self.stderr.write(f"Login failed with HTTP {status}")
+            return
+
+        self._report('baseline', *self._phase(tokens['access'], 0))
+        self._report('login storm', *self._phase(tokens['access'], options['storm']))
+        self.stdout.write(self.style.SUCCESS("Done"))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from apps.users import revocation
+
+
+class Command(BaseCommand):
+    help = "Delete revoked token rows whose tokens have expired anyway; run periodically (e.g. daily)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        deleted = revocation.prune(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"Done, {deleted} expired revoked tokens deleted"))
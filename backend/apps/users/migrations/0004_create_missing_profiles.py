@@ -0,0 +1,34 @@
+"""
+Give every existing user a profile.
+
+Profiles used to be created on first read of the profile endpoints; users
+are now created together with their profile, and reads expect one to exist.
+"""
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def create_missing_profiles(apps, schema_editor):
+    CustomUser = apps.get_model('users', 'CustomUser')
+    UserProfile = apps.get_model('users', 'UserProfile')
+    db = schema_editor.connection.alias
+    batch = []
+    missing = CustomUser.objects.using(db).filter(profile__isnull=True).values_list('pk', flat=True)
+    for user_id in missing.iterator(chunk_size=BATCH_SIZE):
+        batch.append(UserProfile(user_id=user_id))
+        if len(batch) >= BATCH_SIZE:
+            UserProfile.objects.using(db).bulk_create(batch)
+            batch = []
+    UserProfile.objects.using(db).bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_revokedtoken'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_missing_profiles, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, router, transaction
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MinValueValidator, MaxValueValidator
 
@@ -26,6 +26,9 @@ class CustomUser(AbstractUser):
     # Onboarding status
     onboarding_completed = models.BooleanField(default=False)
     
+    # Embedded in issued JWTs; bumping it revokes every token issued before
+    token_version = models.PositiveIntegerField(default=0, editable=False)
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -36,6 +39,35 @@ class CustomUser(AbstractUser):
     
     def __str__(self):
         return self.email
+    
+    def set_encoded_password(self, encoded, raw_password):
+        """set_password() with the hash computed elsewhere (see hashing.py)"""
+        self.password = encoded
+        self._password = raw_password
+    
+    def save(self, *args, **kwargs):
+        # set_password() was called since the user was loaded: log out other sessions
+        if self.pk and self._password is not None:
+            self.token_version += 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'token_version'}
+        if not self._state.adding:
+            super().save(*args, **kwargs)
+            return
+        # A user never exists without a profile, so reading one never writes
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+            UserProfile.objects.using(using).create(user=self)
+    
+    def refresh_from_db(self, using=None, fields=None):
+        # A user resolved from the principal cache loads the rest of its row at
+        # once, not one query per field read
+        if fields is not None and getattr(self, '_lazy_principal', False):
+            fields = {*fields, *self.get_deferred_fields()}
+            self._lazy_principal = False
+        super().refresh_from_db(using=using, fields=fields)
 
 
 class UserProfile(models.Model):
@@ -74,3 +106,25 @@ class UserProfile(models.Model):
     
     def __str__(self):
         return f"{self.user.email}'s Profile"
+
+
+class RevokedToken(models.Model):
+    """JWT revoked before its expiry (logout or refresh token rotation)"""
+    TOKEN_TYPES = [
+        ('access', 'Access'),
+        ('refresh', 'Refresh'),
+    ]
+    
+    jti = models.CharField(max_length=255, unique=True)
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, null=True, blank=True, related_name='revoked_tokens')
+    token_type = models.CharField(max_length=10, choices=TOKEN_TYPES)
+    # Rows can be pruned once the token would have expired anyway
+    expires_at = models.DateTimeField(db_index=True)
+    # Processes catch up with new revocations by creation time
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.token_type} {self.jti}"
@@ -0,0 +1,46 @@
+"""
+Cached reads of user profiles.
+
+Users are created together with their profile (see CustomUser.save), so
+profile reads never write. The serialized profile is cached per user; when a
+profile change commits, the cache entry is rewritten with the new data rather
+than dropped, so the next read does not refill it from a read replica that
+may not have the change yet.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import UserProfile
+from .serializers import UserProfileSerializer
+
+PROFILE_KEY = 'users:profile:{user_id}'
+
+
+def profile_key(user_id):
+    return PROFILE_KEY.format(user_id=user_id)
+
+
+def cached_profile(user_id):
+    """Serialized profile of the user; raises UserProfile.DoesNotExist"""
+    key = profile_key(user_id)
+    data = cache.get(key)
+    if data is None:
+        data = dict(UserProfileSerializer(UserProfile.objects.get(user_id=user_id)).data)
+        if settings.PROFILE_CACHE_TIMEOUT:
+            cache.set(key, data, settings.PROFILE_CACHE_TIMEOUT)
+    return data
+
+
+def remember_profile(profile):
+    """Cache the saved profile once the current transaction commits"""
+    if not settings.PROFILE_CACHE_TIMEOUT:
+        return
+    key, data = profile_key(profile.user_id), dict(UserProfileSerializer(profile).data)
+    transaction.on_commit(lambda: cache.set(key, data, settings.PROFILE_CACHE_TIMEOUT))
+
+
+def forget_profile(user_id):
+    """Drop the cached profile once the current transaction commits"""
+    key = profile_key(user_id)
+    transaction.on_commit(lambda: cache.delete(key))
@@ -0,0 +1,159 @@
+"""
+Revocation of individual JWTs.
+
+Revoked token ids (JTIs) are stored in ``RevokedToken`` until the token would
+have expired. Each process keeps a Bloom filter of the unexpired JTIs, caught
+up with new rows at most every ``SYNC_INTERVAL`` seconds, so checking a token
+that was never revoked (nearly all of them) is a few hash computations. Only
+when the filter reports a match, for a revoked token or a rare false
+positive, is the database asked for the exact answer.
+
+Catching up reads rows created since the previous sync less ``SYNC_SLACK``:
+ids and timestamps are assigned before commit, so a row can become visible
+after rows with later ones. JTIs seen within the slack are remembered so a
+re-read row is not counted twice.
+
+Revoking every session of a user does not go through here: it bumps the
+user's token version instead (see ``authentication.revoke_all_sessions``).
+"""
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import RevokedToken
+
+SYNC_INTERVAL = 5
+SYNC_SLACK = timedelta(minutes=1)
+REBUILD_INTERVAL = 60 * 60
+CAPACITY = 100000
+ERROR_RATE = 0.01
+
+
+class BloomFilter:
+    """Set membership in a fixed bit array; no false negatives, ``error_rate`` false positives"""
+
+    def __init__(self, capacity, error_rate=ERROR_RATE):
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        step = int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * step) % self.size for i in range(self.hashes))
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationList:
+    """This process's Bloom filter of revoked JTIs, kept in step with the database"""
+
+    def __init__(self):
+        self.filter = None
+        # JTIs created since ``synced_from - SYNC_SLACK``, with their creation time
+        self.recent = {}
+        self.synced_from = None
+        self.synced_at = None
+        self.built_at = None
+        self.lock = threading.Lock()
+
+    def _rebuild(self, started):
+        read_at = timezone.now()
+        rows = RevokedToken.objects.filter(expires_at__gt=read_at).values_list('jti', 'created_at')
+        jtis = []
+        self.recent = {}
+        for jti, created_at in rows.iterator(chunk_size=5000):
+            jtis.append(jti)
+            if created_at >= read_at - SYNC_SLACK:
+                self.recent[jti] = created_at
+        # Room to grow until the next rebuild drops expired entries
+        self.filter = BloomFilter(max(CAPACITY, 2 * len(jtis)))
+        for jti in jtis:
+            self.filter.add(jti)
+        self.synced_from = read_at
+        self.built_at = started
+
+    def _catch_up(self):
+        read_at = timezone.now()
+        rows = RevokedToken.objects.filter(created_at__gte=self.synced_from - SYNC_SLACK).values_list('jti', 'created_at')
+        for jti, created_at in rows:
+            if jti not in self.recent:
+                self.filter.add(jti)
+            self.recent[jti] = created_at
+        # Older rows are below the next sync's window and cannot be read again
+        self.recent = {jti: created_at for jti, created_at in self.recent.items() if created_at >= read_at - SYNC_SLACK}
+        self.synced_from = read_at
+
+    def sync(self, force=False):
+        """Catch up with revocations made by any process since the last sync"""
+        now = time.monotonic()
+        if not force and self.synced_at is not None and now - self.synced_at < SYNC_INTERVAL:
+            return
+        with self.lock:
+            if self.filter is None or self.filter.count >= self.filter.capacity or now - self.built_at >= REBUILD_INTERVAL:
+                self._rebuild(now)
+            else:
+                self._catch_up()
+            self.synced_at = now
+
+    def add(self, jti):
+        with self.lock:
+            if self.filter is not None and jti not in self.recent:
+                self.filter.add(jti)
+                self.recent[jti] = timezone.now()
+
+    def is_revoked(self, jti):
+        self.sync()
+        if jti not in self.filter:
+            return False
+        return RevokedToken.objects.filter(jti=jti).exists()
+
+
+revoked = RevocationList()
+
+
+def is_revoked(token):
+    return revoked.is_revoked(token[api_settings.JTI_CLAIM])
+
+
+def revoke(token):
+    """Revoke a token until it expires; False if it had been revoked already"""
+    jti = token[api_settings.JTI_CLAIM]
+    try:
+        with transaction.atomic():
+            RevokedToken.objects.create(
+                jti=jti,
+                user_id=token.get(api_settings.USER_ID_CLAIM),
+                token_type=token[api_settings.TOKEN_TYPE_CLAIM],
+                expires_at=datetime.fromtimestamp(token['exp'], dt_timezone.utc),
+            )
+    except IntegrityError:
+        return False
+    revoked.add(jti)
+    return True
+
+
+def prune(chunk_size=5000):
+    """Delete rows of tokens that have expired anyway; returns the number deleted"""
+    deleted = 0
+    expired = RevokedToken.objects.filter(expires_at__lte=timezone.now())
+    while True:
+        ids = list(expired.values_list('id', flat=True)[:chunk_size])
+        if not ids:
+            return deleted
+        deleted += RevokedToken.objects.filter(id__in=ids).delete()[0]
@@ -1,5 +1,10 @@
 from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
 from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
+from . import revocation
+from .authentication import TOKEN_VERSION_CLAIM, VersionedRefreshToken, token_version_is_current
 from .models import UserProfile
 
 User = get_user_model()
@@ -49,7 +54,15 @@ class UserSignUpSerializer(serializers.ModelSerializer):
     
     def create(self, validated_data):
         validated_data.pop('password_confirm')
-        user = User.objects.create_user(**validated_data)
+        password = validated_data.pop('password')
+        # Hash computed on the hashing pool by the signup view, if given
+        encoded = validated_data.pop('encoded_password', None)
+        user = User(username=validated_data['email'], **validated_data)
+        if encoded:
+            user.set_encoded_password(encoded, password)
+        else:
+            user.set_password(password)
+        user.save()
         return user
 
 
@@ -63,3 +76,39 @@ class ChangePasswordSerializer(serializers.Serializer):
         if data['new_password'] != data['new_password_confirm']:
             raise serializers.ValidationError("Passwords do not match")
         return data
+
+
+class TokenRefreshSerializer(serializers.Serializer):
+    """Refresh serializer that rejects revoked refresh tokens and revokes rotated ones"""
+    refresh = serializers.CharField()
+    access = serializers.CharField(read_only=True)
+    
+    def validate(self, attrs):
+        refresh = VersionedRefreshToken(attrs['refresh'])
+        if revocation.is_revoked(refresh):
+            raise TokenError(_('Token has been revoked'))
+        if not token_version_is_current(refresh[api_settings.USER_ID_CLAIM], refresh.get(TOKEN_VERSION_CLAIM, 0)):
+            raise TokenError(_('Token has been revoked'))
+        
+        data = {'access': str(refresh.access_token)}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            # Revoking is also the exact check: a concurrent refresh with the same token loses
+            if api_settings.BLACKLIST_AFTER_ROTATION and not revocation.revoke(refresh):
+                raise TokenError(_('Token has been revoked'))
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+        return data
+
+
+class TokenRevokeSerializer(serializers.Serializer):
+    """Serializer for revoking a refresh token (logout)"""
+    refresh = serializers.CharField()
+    
+    def validate(self, attrs):
+        try:
+            attrs['token'] = VersionedRefreshToken(attrs['refresh'])
+        except TokenError as error:
+            raise serializers.ValidationError({'refresh': str(error)})
+        return attrs
@@ -0,0 +1,45 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+from .authentication import forget_principal
+from .models import UserProfile
+from .profiles import forget_profile, remember_profile
+
+User = get_user_model()
+
+
+def _token_versions(instance):
+    """Token versions the user had when loaded and has now, without loading deferred fields"""
+    return {instance._loaded_token_version, instance.__dict__.get('token_version')} - {None}
+
+
+@receiver(post_init, sender=User)
+def remember_token_version(sender, instance, **kwargs):
+    """Remember the token version the user was loaded with"""
+    instance._loaded_token_version = instance.__dict__.get('token_version')
+
+
+@receiver(post_save, sender=User)
+def forget_principal_on_save(sender, instance, created, **kwargs):
+    """Drop the cached principal so flags and token version are re-read"""
+    if not created:
+        forget_principal(instance.pk, *_token_versions(instance))
+    instance._loaded_token_version = instance.__dict__.get('token_version')
+
+
+@receiver(post_delete, sender=User)
+def forget_principal_on_delete(sender, instance, **kwargs):
+    """Drop the cached principal of a deleted user"""
+    forget_principal(instance.pk, *_token_versions(instance))
+
+
+@receiver(post_save, sender=UserProfile)
+def remember_profile_on_save(sender, instance, **kwargs):
+    """Replace the cached profile with the saved one"""
+    remember_profile(instance)
+
+
+@receiver(post_delete, sender=UserProfile)
+def forget_profile_on_delete(sender, instance, **kwargs):
+    """Drop the cached profile of a deleted profile or user"""
+    forget_profile(instance.user_id)
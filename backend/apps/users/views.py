@@ -1,12 +1,24 @@
-from rest_framework import viewsets, status, generics
+import json
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from rest_framework import viewsets, generics
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import update_last_login
+from django.db import router
+from django.http import Http404
+from django.http import JsonResponse
+from . import hashing, profiles, revocation
+from .authentication import VersionedRefreshToken, authenticate, revoke_all_sessions
 from .models import UserProfile
 from .serializers import (
     UserSerializer, UserDetailSerializer, UserSignUpSerializer,
-    UserProfileSerializer, ChangePasswordSerializer
+    UserProfileSerializer, ChangePasswordSerializer, TokenRevokeSerializer
 )
 
 User = get_user_model()
@@ -17,7 +29,7 @@ class UserViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        return User.objects.filter(id=self.request.user.id)
+        return User.objects.filter(id=self.request.user.id).select_related('profile')
     
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -27,22 +39,14 @@ class UserViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def me(self, request):
         """Get current user details"""
-        serializer = UserDetailSerializer(request.user)
+        serializer = UserDetailSerializer(self.get_queryset().get())
         return Response(serializer.data)
     
     @action(detail=False, methods=['post'])
-    def change_password(self, request):
-        """Change user password"""
-        serializer = ChangePasswordSerializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        
-        user = request.user
-        if not user.check_password(serializer.validated_data['old_password']):
-            return Response({'detail': 'Invalid old password'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        user.set_password(serializer.validated_data['new_password'])
-        user.save()
-        return Response({'detail': 'Password changed successfully'})
+    def revoke_sessions(self, request):
+        """Revoke every access and refresh token issued to the current user"""
+        revoke_all_sessions(request.user)
+        return Response({'detail': 'All sessions revoked'})
     
     @action(detail=False, methods=['post'])
     def complete_onboarding(self, request):
@@ -53,15 +57,118 @@ class UserViewSet(viewsets.ModelViewSet):
         return Response({'detail': 'Onboarding completed'})
 
 
-class UserSignUpView(generics.CreateAPIView):
+def auth_endpoint(view):
+    """
+    POST-only, CSRF-exempt async view whose password hashing runs on the hashing
+    pool; a saturated pool answers 429 and a slow one 503 instead of queueing.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != 'POST':
+            return JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+        try:
+            # Turned away before any parsing or queries, which would compete with other requests
+            hashing.check_capacity()
+            return await view(request, *args, **kwargs)
+        except hashing.HashingBusy:
+            response = JsonResponse({'detail': 'Too many sign-in requests, retry shortly'}, status=429)
+            response['Retry-After'] = '1'
+            return response
+        except hashing.HashingTimeout:
+            response = JsonResponse({'detail': 'Password check timed out, retry later'}, status=503)
+            response['Retry-After'] = '5'
+            return response
+    
+    wrapper.csrf_exempt = True
+    return wrapper
+
+
+def _json_body(request):
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _token_pair(user):
+    refresh = VersionedRefreshToken.for_user(user)
+    return {'refresh': str(refresh), 'access': str(refresh.access_token)}
+
+
+@auth_endpoint
+async def token_obtain_pair(request):
+    """Login endpoint returning an access and refresh token pair"""
+    data = _json_body(request)
+    if data is None:
+        return JsonResponse({'detail': 'JSON parse error'}, status=400)
+    # Accounts are created with the email as username, so either identifies the user
+    login_field = User.USERNAME_FIELD if User.USERNAME_FIELD in data else 'email'
+    credentials = {name: data.get(name) for name in (login_field, 'password')}
+    missing = {name: ['This field is required.'] for name, value in credentials.items() if not isinstance(value, str) or not value}
+    if missing:
+        return JsonResponse(missing, status=400)
+    
+    password = credentials['password']
+    user = await User.objects.filter(**{login_field: credentials[login_field]}).afirst()
+    if user is None:
+        await hashing.reject_password(password)
+    elif await hashing.check_password(user, password) and user.is_active:
+        if api_settings.UPDATE_LAST_LOGIN:
+            await sync_to_async(update_last_login)(None, user)
+        return JsonResponse(_token_pair(user))
+    return JsonResponse({'detail': 'No active account found with the given credentials'}, status=401)
+
+
+@auth_endpoint
+async def signup(request):
     """User registration endpoint"""
-    serializer_class = UserSignUpSerializer
+    serializer = UserSignUpSerializer(data=_json_body(request))
+    if not await sync_to_async(serializer.is_valid)():
+        return JsonResponse(serializer.errors, status=400)
+    encoded = await hashing.make_password(serializer.validated_data['password'])
+    # Creates the profile too
+    await sync_to_async(serializer.save)(encoded_password=encoded)
+    return JsonResponse(serializer.data, status=201)
+
+
+@auth_endpoint
+async def change_password(request):
+    """Change the current user's password; returns a fresh token pair"""
+    try:
+        authenticated = await authenticate(request)
+    except (AuthenticationFailed, InvalidToken) as error:
+        return JsonResponse(error.detail, status=401)
+    if authenticated is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+    
+    serializer = ChangePasswordSerializer(data=_json_body(request))
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=400)
+    
+    user = await User.objects.aget(pk=authenticated[0].pk)
+    if not await hashing.check_password(user, serializer.validated_data['old_password']):
+        return JsonResponse({'detail': 'Invalid old password'}, status=400)
+    
+    new_password = serializer.validated_data['new_password']
+    user.set_encoded_password(await hashing.make_password(new_password), new_password)
+    await user.asave()
+    # Saving revoked all earlier tokens, including this one; hand out fresh ones
+    return JsonResponse({'detail': 'Password changed successfully', **_token_pair(user)})
+
+
+class TokenRevokeView(generics.GenericAPIView):
+    """Logout endpoint revoking a refresh token and the access token sent with it"""
+    serializer_class = TokenRevokeSerializer
     permission_classes = [AllowAny]
     
-    def perform_create(self, serializer):
-        user = serializer.save()
-        # Create user profile
-        UserProfile.objects.create(user=user)
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        revocation.revoke(serializer.validated_data['token'])
+        if request.auth is not None:
+            revocation.revoke(request.auth)
+        return Response({'detail': 'Token revoked'})
 
 
 class UserProfileViewSet(viewsets.ModelViewSet):
@@ -73,19 +180,28 @@ class UserProfileViewSet(viewsets.ModelViewSet):
         return UserProfile.objects.filter(user=self.request.user)
     
     def get_object(self):
-        obj, created = UserProfile.objects.get_or_create(user=self.request.user)
-        return obj
+        # Only writes load the instance: read it from the primary, not a lagging replica
+        try:
+            return self.get_queryset().using(router.db_for_write(UserProfile)).get()
+        except UserProfile.DoesNotExist:
+            raise Http404
+    
+    def _cached_profile(self):
+        try:
+            return profiles.cached_profile(self.request.user.id)
+        except UserProfile.DoesNotExist:
+            raise Http404
+    
+    def retrieve(self, request, *args, **kwargs):
+        return Response(self._cached_profile())
     
     @action(detail=False, methods=['get', 'put'])
     def me(self, request):
         """Get or update current user profile"""
-        profile, created = UserProfile.objects.get_or_create(user=request.user)
-        
         if request.method == 'PUT':
-            serializer = self.get_serializer(profile, data=request.data, partial=True)
+            serializer = self.get_serializer(self.get_object(), data=request.data, partial=True)
             serializer.is_valid(raise_exception=True)
             serializer.save()
             return Response(serializer.data)
         
-        serializer = self.get_serializer(profile)
-        return Response(serializer.data)
+        return Response(self._cached_profile())
@@ -0,0 +1,237 @@
+"""
+Everything the app shows on launch in one request.
+
+``GET /api/bootstrap/`` returns the sections the client used to fetch one by
+one (``users/me``, ``profiles/me``, ``checkins/today``, ``goals/active``,
+``appointments/upcoming`` and ``appointments/stats``) in the same shapes,
+after authenticating once. ``?sections=`` picks a subset.
+
+A single query first reads a fingerprint of the selected sections (last
+change and row count of the tables behind them), which becomes the response's
+ETag; a client sending it back in ``If-None-Match`` gets a 304 without any
+section being loaded. Otherwise the sections are loaded by independent
+loaders (the profile from its cache), concurrently on a small pool of threads
+(each with its own database connection) unless ``BOOTSTRAP_QUERY_THREADS`` is
+0 or the database is SQLite.
+"""
+import asyncio
+import functools
+import hashlib
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections, connections, router
+from django.db.models import Count, F, Max, OuterRef, Subquery
+from django.http import HttpResponseNotModified, JsonResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import parse_etags, quote_etag
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+from apps.appointments import counters, directory_cache
+from apps.appointments.models import DoctorAppointment, Prescription
+from apps.appointments.pagination import UpcomingAppointmentPagination
+from apps.appointments.serializers import AppointmentStatsSerializer, DoctorAppointmentSerializer
+from apps.health.models import DailyCheckIn, HealthGoal
+from apps.health.serializers import DailyCheckInSerializer, HealthGoalSerializer
+from apps.users import profiles
+from apps.users.authentication import authenticate
+from apps.users.models import UserProfile
+from apps.users.serializers import UserDetailSerializer
+
+User = get_user_model()
+
+SECTIONS = ('user', 'profile', 'today_checkin', 'active_goals', 'upcoming_appointments', 'appointment_stats')
+
+
+def _user(user_id, context):
+    user = User.objects.select_related('profile').get(pk=user_id)
+    return {'user': UserDetailSerializer(user).data}
+
+
+def _profile(user_id, context):
+    try:
+        return {'profile': profiles.cached_profile(user_id)}
+    except UserProfile.DoesNotExist:
+        return {'profile': None}
+
+
+def _today_checkin(user_id, context):
+    checkin = DailyCheckIn.objects.filter(user_id=user_id, check_in_date=context['today']).first()
+    return {'today_checkin': DailyCheckInSerializer(checkin).data if checkin else None}
+
+
+def _active_goals(user_id, context):
+    goals = HealthGoal.objects.filter(user_id=user_id, is_active=True)
+    return {'active_goals': HealthGoalSerializer(goals, many=True).data}
+
+
+def _upcoming_appointments(user_id, context):
+    appointments = DoctorAppointment.objects.filter(user_id=user_id).upcoming().for_serializer()
+    paginator = UpcomingAppointmentPagination()
+    page = paginator.first_page(appointments, context['upcoming_url'])
+    return {'upcoming_appointments': {
+        'next': paginator.get_next_link(),
+        'results': DoctorAppointmentSerializer(page, many=True).data,
+    }}
+
+
+def _appointment_stats(user_id, context):
+    stats = counters.read(user_id) if counters.enabled() else None
+    if stats is None:
+        stats = DoctorAppointment.objects.filter(user_id=user_id).stats()
+    return {'appointment_stats': AppointmentStatsSerializer(stats).data}
+
+
+# Independent loaders and the sections each returns
+LOADERS = (
+    (('user',), _user),
+    (('profile',), _profile),
+    (('today_checkin',), _today_checkin),
+    (('active_goals',), _active_goals),
+    (('upcoming_appointments',), _upcoming_appointments),
+    (('appointment_stats',), _appointment_stats),
+)
+
+
+def _owned(model, aggregate, owner='user', **filters):
+    """Subquery of ``aggregate`` over the user's rows of ``model``"""
+    rows = model.objects.filter(**{owner: OuterRef('pk')}, **filters).order_by()
+    return Subquery(rows.values(owner).annotate(value=aggregate).values('value'))
+
+
+def _fingerprints(today, now):
+    """Per section, the values whose change changes the section"""
+    appointments = {
+        'appointments_changed': _owned(DoctorAppointment, Max('updated_at')),
+        'appointments': _owned(DoctorAppointment, Count('id')),
+    }
+    return {
+        'user': {'user_changed': F('updated_at'), 'profile_changed': F('profile__updated_at')},
+        'profile': {'profile_changed': F('profile__updated_at')},
+        'today_checkin': {'checkin_changed': _owned(DailyCheckIn, Max('updated_at'), check_in_date=today)},
+        'active_goals': {
+            'goals_changed': _owned(HealthGoal, Max('updated_at')),
+            'goals': _owned(HealthGoal, Count('id')),
+        },
+        'upcoming_appointments': {
+            **appointments,
+            # Serialized upcoming/past flags flip as today's appointments start
+            'started_today': _owned(
+                DoctorAppointment, Count('id'), appointment_date=today, appointment_time__lte=now.time(),
+            ),
+            'prescriptions_changed': _owned(Prescription, Max('updated_at'), owner='appointment__user'),
+            'prescriptions': _owned(Prescription, Count('id'), owner='appointment__user'),
+        },
+        'appointment_stats': appointments,
+    }
+
+
+async def _etag(user_id, sections, today, now):
+    """ETag of the selected sections, or None if the user is gone"""
+    annotations = {}
+    for section, values in _fingerprints(today, now).items():
+        if section in sections:
+            annotations.update(values)
+    state = await User.objects.filter(pk=user_id).values(**annotations).afirst()
+    if state is None:
+        return None
+    if 'upcoming_appointments' in sections:
+        # Appointments embed doctor details
+        state['doctors'] = await sync_to_async(directory_cache.directory_version)()
+    key = json.dumps([user_id, today, sorted(sections), sorted(state.items())], default=str)
+    return quote_etag(hashlib.md5(key.encode()).hexdigest())
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(settings.BOOTSTRAP_QUERY_THREADS, thread_name_prefix='bootstrap')
+    return _executor
+
+
+def _run_on_pool(loader, *args):
+    """Run a loader on a pool thread, which keeps its own (persistent) connection"""
+    close_old_connections()
+    try:
+        return loader(*args)
+    finally:
+        close_old_connections()
+
+
+def _concurrent():
+    # Threads of an in-memory SQLite database would each see an empty database
+    return settings.BOOTSTRAP_QUERY_THREADS > 0 and connections[router.db_for_read(User)].vendor != 'sqlite'
+
+
+def _load_all(loaders, user_id, context):
+    data = {}
+    for loader in loaders:
+        data.update(loader(user_id, context))
+    return data
+
+
+async def _load(loaders, user_id, context):
+    if not _concurrent() or len(loaders) < 2:
+        return await sync_to_async(_load_all)(loaders, user_id, context)
+    loop = asyncio.get_running_loop()
+    executor = _get_executor()
+    results = await asyncio.gather(*(
+        loop.run_in_executor(executor, functools.partial(_run_on_pool, loader, user_id, context))
+        for loader in loaders
+    ))
+    data = {}
+    for result in results:
+        data.update(result)
+    return data
+
+
+async def bootstrap(request):
+    """Launch dashboard: the selected sections under one ETag"""
+    if request.method != 'GET':
+        return JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+    try:
+        authenticated = await authenticate(request)
+    except (AuthenticationFailed, InvalidToken) as error:
+        return JsonResponse(error.detail, status=401)
+    if authenticated is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+    user_id = authenticated[0].pk
+
+    requested = [name.strip() for name in request.GET.get('sections', '').split(',') if name.strip()]
+    unknown = sorted(set(requested) - set(SECTIONS))
+    if unknown:
+        return JsonResponse({'detail': f'Unknown sections: {", ".join(unknown)}'}, status=400)
+    sections = set(requested or SECTIONS)
+
+    now = timezone.localtime()
+    today = now.date()
+    etag = await _etag(user_id, sections, today, now)
+    if etag is None:
+        return JsonResponse({'detail': 'User not found'}, status=401)
+    if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+    if etag in if_none_match or '*' in if_none_match:
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    context = {
+        'today': today,
+        'upcoming_url': request.build_absolute_uri(reverse('appointment-upcoming')),
+    }
+    loaders = [loader for returns, loader in LOADERS if sections.intersection(returns)]
+    data = await _load(loaders, user_id, context)
+    response = JsonResponse({name: data[name] for name in SECTIONS if name in sections})
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
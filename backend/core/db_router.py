@@ -0,0 +1,28 @@
+from django.conf import settings
+
+REPLICA = 'replica'
+
+
+class ReplicaRouter:
+    """
+    Send reads of the models in ``DATABASE_REPLICA_MODELS`` to the read replica.
+
+    Only models whose reads tolerate replication lag are listed; everything else,
+    and every write, uses the primary. Code that reads a row in order to update
+    it should read it with ``router.db_for_write``.
+    """
+
+    def db_for_read(self, model, **hints):
+        if model._meta.label_lower in settings.DATABASE_REPLICA_MODELS:
+            return REPLICA
+        return None
+
+    def db_for_write(self, model, **hints):
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return False if db == REPLICA else None
@@ -2,7 +2,7 @@ import os
 import dj_database_url
 from pathlib import Path
 from datetime import timedelta
-from decouple import config
+from decouple import Csv, config
 
 # Build paths inside the project
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -90,6 +90,38 @@ DATABASES = {
     )
 }
 
+# Optional read replica. Reads of the models listed in DATABASE_REPLICA_MODELS
+# (app_label.model) go to it; everything else stays on the primary.
+
+DATABASE_REPLICA_URL = config('DATABASE_REPLICA_URL', default='')
+DATABASE_REPLICA_MODELS = config('DATABASE_REPLICA_MODELS', default='users.userprofile', cast=Csv())
+
+if DATABASE_REPLICA_URL:
+    DATABASES['replica'] = dj_database_url.parse(DATABASE_REPLICA_URL, conn_max_age=600, ssl_require=True)
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+    DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+
+
+# CACHE
+# Local memory by default (development and tests); set REDIS_URL in production
+# so every worker shares the same cache.
+
+REDIS_URL = config('REDIS_URL', default='')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 
 # CUSTOM USER MODEL (IMPORTANT)
 
@@ -125,7 +157,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -145,8 +177,48 @@ SIMPLE_JWT = {
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
     'AUTH_HEADER_TYPES': ('Bearer',),
+    # Rotated refresh tokens are revoked through apps/users/revocation.py, not
+    # simplejwt's token_blacklist app
+    'TOKEN_REFRESH_SERIALIZER': 'apps.users.serializers.TokenRefreshSerializer',
 }
 
+# Seconds an authenticated user's id, flags and token version are cached (see
+# apps/users/authentication.py); 0 loads the user on every request.
+
+AUTH_PRINCIPAL_CACHE_TIMEOUT = config('AUTH_PRINCIPAL_CACHE_TIMEOUT', default=300, cast=int)
+
+# Serialized profiles are cached per user for this many seconds and rewritten
+# when a profile change commits; 0 disables the cache.
+
+PROFILE_CACHE_TIMEOUT = config('PROFILE_CACHE_TIMEOUT', default=300, cast=int)
+
+# Reject revoked access tokens too, not only refresh tokens. The check is an
+# in-process Bloom filter lookup and does not query the database.
+
+AUTH_CHECK_ACCESS_REVOCATION = config('AUTH_CHECK_ACCESS_REVOCATION', default=True, cast=bool)
+
+# Login, signup and password changes hash on a dedicated pool of this many
+# threads per process, by default half the cores so requests keep the rest.
+# When that many hashes run and PASSWORD_HASHING_QUEUE more wait, further
+# requests get 429; hashes slower than the timeout get 503. The queue default
+# keeps the longest wait, a few hash times, well under the timeout.
+
+PASSWORD_HASHING_WORKERS = config('PASSWORD_HASHING_WORKERS', default=max(1, (os.cpu_count() or 2) // 2), cast=int)
+PASSWORD_HASHING_QUEUE = config('PASSWORD_HASHING_QUEUE', default=4 * PASSWORD_HASHING_WORKERS, cast=int)
+PASSWORD_HASHING_TIMEOUT = config('PASSWORD_HASHING_TIMEOUT', default=10, cast=float)
+
+# /api/bootstrap/ loads its sections concurrently on this many threads per
+# process, each keeping its own database connection; 0 loads them one after
+# another on the request's connection.
+
+BOOTSTRAP_QUERY_THREADS = config('BOOTSTRAP_QUERY_THREADS', default=8, cast=int)
+
+# APPOINTMENTS
+# Keep per-user appointment counters so the dashboard stats take a single query.
+# Run `manage.py reconcile_appointment_counters --fix` after enabling.
+
+APPOINTMENT_COUNTERS_ENABLED = config('APPOINTMENT_COUNTERS_ENABLED', default=False, cast=bool)
+
 # CORS
 
 CORS_ALLOWED_ORIGINS = config(
@@ -3,13 +3,16 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from rest_framework.routers import DefaultRouter
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from rest_framework_simplejwt.views import TokenRefreshView
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 
 # Import ViewSets
-from apps.users.views import UserViewSet, UserProfileViewSet, UserSignUpView
+from apps.users.views import (
+    UserViewSet, UserProfileViewSet, TokenRevokeView, change_password, signup, token_obtain_pair
+)
 from apps.health.views import DailyCheckInViewSet, HealthGoalViewSet, HealthMetricViewSet
-from apps.appointments.views import DoctorViewSet, DoctorAppointmentViewSet
+from apps.appointments.views import DoctorViewSet, DoctorAppointmentViewSet, appointment_calendar_feed
+from core.bootstrap import bootstrap
 
 # Create router
 router = DefaultRouter()
@@ -26,11 +29,17 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     
     # Authentication
-    path('api/auth/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    # Async views hashing passwords on a bounded pool (see apps/users/hashing.py)
+    path('api/auth/token/', token_obtain_pair, name='token_obtain_pair'),
     path('api/auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
-    path('api/auth/signup/', UserSignUpView.as_view(), name='user_signup'),
+    path('api/auth/token/revoke/', TokenRevokeView.as_view(), name='token_revoke'),
+    path('api/auth/signup/', signup, name='user_signup'),
+    path('api/users/change_password/', change_password, name='user_change_password'),
     
     # API
+    path('api/bootstrap/', bootstrap, name='bootstrap'),
+    # Ahead of the router, whose format-suffix routes would read this as appointment "calendar"
+    path('api/appointments/calendar.ics', appointment_calendar_feed, name='appointment_calendar'),
     path('api/', include(router.urls)),
     
     # API Documentation